@@ -0,0 +1,50 @@
+"""
+Benchmark: BelgianDrugPronunciation.enhance_drug_recognition on long transcripts,
+where every candidate drug of every word gets a context boost
+
+Usage: python benchmarks/bench_context_boost.py [word_count]
+"""
+
+import sys
+import time
+import logging
+import tempfile
+import cProfile
+import pstats
+
+from corpus import long_transcript
+
+from core.belgian_drug_pronunciation import BelgianDrugPronunciation
+
+MEDICAL_CONTEXT = "cardiologie consultatie hypertensie en hartfalen"
+
+def main():
+    logging.disable(logging.CRITICAL)
+    word_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    system = BelgianDrugPronunciation(tempfile.mktemp(suffix='.db'))
+    transcript = long_transcript(word_count)
+    system.enhance_drug_recognition(transcript, MEDICAL_CONTEXT)
+
+    runs = 5
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = system.enhance_drug_recognition(transcript, MEDICAL_CONTEXT)
+        best = min(best, time.perf_counter() - start)
+
+    profile = cProfile.Profile()
+    profile.enable()
+    system.enhance_drug_recognition(transcript, MEDICAL_CONTEXT)
+    profile.disable()
+    boost_time = sum(
+        stat[3] for function, stat in pstats.Stats(profile).stats.items()
+        if 'context_boost' in function[2]
+    )
+
+    print(f"{len(transcript.split())} words, {len(result['drug_corrections'])} corrections")
+    print(f"enhance_drug_recognition  {best * 1000:>8.1f} ms (best of {runs})")
+    print(f"context boost (profiled)  {boost_time * 1000:>8.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: the per-feature re.search/re.findall context extraction vs the single-pass
+scanner of ContextualDrugSelector.analyze_prescription_context and analyze_many, in
+transcripts per second
+
+Usage: python benchmarks/bench_context_extraction.py [transcript_count]
+"""
+
+import re
+import sys
+import time
+import random
+import logging
+import tempfile
+
+from corpus import CARDIOLOGY_TRANSCRIPTS
+
+from core.contextual_drug_selector import ContextualDrugSelector, DrugContext
+
+# Sentences that exercise every context feature, mixed into the corpus dictations
+CONTEXT_SENTENCES = [
+    "Ouder patiënt, 80 jaar, met hoge bloeddruk en pijn op de borst.",
+    "Kind met koorts, antibiotica gestart. Mild beeld, stabiel.",
+    "Ernstig decompensatie, spoed opname. Gekende astma en chronische bronchitis.",
+    "Neemt al bisoprolol en gebruikt furosemide, krijgt nu ook spironolactone.",
+    "Creatinine gestegen bij nierinsufficiëntie, leverinsufficiëntie uitgesloten.",
+    "Zwanger, geen hypertension. Acuut beginnende tachycardie en fibrillatie.",
+    "DM type 2, op metformin. Geen chest pain, geen heart failure.",
+]
+
+def legacy_analyze(transcript: str) -> DrugContext:
+    """The separate-search extraction the scanner replaced"""
+    transcript_lower = transcript.lower()
+
+    conditions = []
+    condition_patterns = {
+        'hypertensie': r'\b(hypertensie|hoge bloeddruk|hypertension)\b',
+        'hartfalen': r'\b(hartfalen|heart failure|decompensatie)\b',
+        'diabetes': r'\b(diabetes|suikerziekte|dm type)\b',
+        'angina': r'\b(angina|pijn op de borst|chest pain)\b',
+        'aritmie': r'\b(aritmie|fibrillatie|tachycardie|bradycardie)\b',
+        'infectie': r'\b(infectie|koorts|antibiotica)\b',
+        'pijn': r'\b(pijn|pain|analgesie)\b'
+    }
+    for condition, pattern in condition_patterns.items():
+        if re.search(pattern, transcript_lower):
+            conditions.append(condition)
+
+    age_group = 'adult'
+    if re.search(r'\b(ouder|elderly|geriatrisch|80|90)\b', transcript_lower):
+        age_group = 'elderly'
+    elif re.search(r'\b(kind|pediatr|jong)\b', transcript_lower):
+        age_group = 'pediatric'
+
+    severity = 'moderate'
+    if re.search(r'\b(ernstig|severe|acuut|emergency)\b', transcript_lower):
+        severity = 'severe'
+    elif re.search(r'\b(mild|licht|stabiel)\b', transcript_lower):
+        severity = 'mild'
+
+    urgency = 'routine'
+    if re.search(r'\b(urgent|spoed|emergency|acuut)\b', transcript_lower):
+        urgency = 'urgent'
+
+    contraindications = []
+    contraindication_patterns = {
+        'asthma': r'\b(astma|asthma|bronchospasme)\b',
+        'copd': r'\b(copd|emphyseem|chronische bronchitis)\b',
+        'kidney_disease': r'\b(nierinsufficiëntie|kidney|creatinine)\b',
+        'liver_disease': r'\b(leverinsufficiëntie|liver|hepatisch)\b',
+        'pregnancy': r'\b(zwanger|pregnancy|gravida)\b'
+    }
+    for contraindication, pattern in contraindication_patterns.items():
+        if re.search(pattern, transcript_lower):
+            contraindications.append(contraindication)
+
+    current_meds = []
+    for pattern in [r'neemt al (\w+)', r'gebruikt (\w+)', r'op (\w+)', r'krijgt (\w+)']:
+        current_meds.extend(re.findall(pattern, transcript_lower))
+
+    return DrugContext(
+        medical_condition=', '.join(conditions) if conditions else 'onbekend',
+        department='General',
+        patient_age_group=age_group,
+        contraindications=contraindications,
+        current_medications=current_meds,
+        allergies=[],
+        severity=severity,
+        urgency=urgency
+    )
+
+def backlog(count: int, seed: int = 11) -> list:
+    """Dictations of a few corpus transcripts and context sentences each"""
+    rng = random.Random(seed)
+    sources = CARDIOLOGY_TRANSCRIPTS + CONTEXT_SENTENCES
+    return [' '.join(rng.choice(sources) for _ in range(rng.randint(2, 6))) for _ in range(count)]
+
+def throughput(function, transcripts: list, repeat: int = 3) -> float:
+    """Best transcripts per second of a few runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(transcripts)
+        best = min(best, time.perf_counter() - start)
+    return len(transcripts) / best
+
+def main():
+    logging.disable(logging.CRITICAL)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    selector = ContextualDrugSelector(tempfile.mktemp(suffix='.db'))
+    transcripts = backlog(count)
+
+    mismatches = sum(
+        legacy_analyze(transcript) != selector.analyze_prescription_context(transcript)
+        for transcript in transcripts
+    )
+    print(f"{count} transcripts, {mismatches} differ from the separate searches")
+
+    results = [
+        ('separate searches', throughput(lambda batch: [legacy_analyze(t) for t in batch], transcripts)),
+        ('single pass', throughput(lambda batch: [selector.analyze_prescription_context(t) for t in batch], transcripts)),
+        ('analyze_many', throughput(selector.analyze_many, transcripts)),
+    ]
+    for name, rate in results:
+        print(f"{name:>18} {rate:>10.0f} transcripts/s")
+    print(f"{'speedup':>18} {results[2][1] / results[0][1]:>10.1f}x")
+
+if __name__ == '__main__':
+    main()
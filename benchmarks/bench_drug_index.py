@@ -0,0 +1,50 @@
+"""
+Benchmark: linear Levenshtein scan vs the n-gram drug index, on formularies of growing size
+
+Usage: python benchmarks/bench_drug_index.py [formulary_size ...]
+"""
+
+import re
+import sys
+import time
+import logging
+
+from corpus import long_transcript, synthetic_formulary
+
+from core.drug_fuzzy_index import FuzzyIndex, normalize_drug_name
+from core.edit_distance import levenshtein_similarity
+
+def main():
+    logging.disable(logging.CRITICAL)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [40, 1000, 3000]
+    threshold = 0.7
+
+    queries = sorted({normalize_drug_name(word) for word in re.findall(r'\b\w+\b', long_transcript(1000))
+                      if len(word) >= 3})
+
+    print(f"{len(queries)} distinct query words, similarity > {threshold}")
+    print(f"{'names':>6} {'scan ms':>9} {'index ms':>9} {'speedup':>8}  candidates/query")
+    for size in sizes:
+        names = [normalize_drug_name(name) for name in synthetic_formulary(size)]
+        index = FuzzyIndex()
+        for name in names:
+            index.add(name)
+
+        start = time.perf_counter()
+        scanned = {query: sorted(name for name in names if levenshtein_similarity(query, name) > threshold)
+                   for query in queries}
+        scan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed = {query: sorted(key for key, _ in index.search(query, threshold)) for query in queries}
+        index_time = time.perf_counter() - start
+
+        if scanned != indexed:
+            print(f"Results differ for {sum(scanned[q] != indexed[q] for q in queries)} queries")
+
+        candidates = sum(len(index.candidates(query)) for query in queries) / len(queries)
+        print(f"{size:>6} {scan_time * 1000:>9.1f} {index_time * 1000:>9.1f} "
+              f"{scan_time / index_time:>7.1f}x  {candidates:.0f}")
+
+if __name__ == '__main__':
+    main()
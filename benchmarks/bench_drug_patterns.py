@@ -0,0 +1,64 @@
+"""
+Benchmark: per-pattern re.match loop vs the compiled drug-pattern matcher of OddWordsDetector
+
+Usage: python benchmarks/bench_drug_patterns.py [word_count]
+"""
+
+import re
+import sys
+import time
+import logging
+import tempfile
+
+from corpus import long_transcript
+
+from core.odd_words_detector import OddWordsDetector, DRUG_INDICATOR_PATTERNS
+
+def pattern_loop_score(detector: OddWordsDetector, word: str) -> float:
+    """The scoring loop the compiled matcher replaced"""
+    word_lower = word.lower()
+    pattern_score = 0.0
+
+    for patterns in detector.drug_patterns.values():
+        for pattern in patterns:
+            if re.match(pattern, word_lower):
+                pattern_score = max(pattern_score, 0.8)
+
+    for pattern in DRUG_INDICATOR_PATTERNS:
+        if re.match(pattern, word_lower):
+            pattern_score = max(pattern_score, 0.6)
+
+    return pattern_score
+
+def timed(function, words, repeat: int = 5) -> float:
+    """Best wall time of scoring every word, over a few runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for word in words:
+            function(word)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    logging.disable(logging.CRITICAL)
+    word_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    detector = OddWordsDetector(tempfile.mktemp(suffix='.db'))
+    words = re.findall(r'\b\w+\b', long_transcript(word_count))
+
+    mismatches = [word for word in set(words)
+                  if pattern_loop_score(detector, word) != detector._check_drug_patterns(word)]
+    if mismatches:
+        print(f"Scores differ for: {sorted(mismatches)}")
+
+    loop_time = timed(lambda word: pattern_loop_score(detector, word), words)
+    compiled_time = timed(detector._check_drug_patterns, words)
+
+    print(f"{len(words)} tokens")
+    print(f"{'pattern loop':>14} {loop_time * 1000:>9.2f} ms  {loop_time / len(words) * 1e6:>6.2f} us/token")
+    print(f"{'compiled':>14} {compiled_time * 1000:>9.2f} ms  {compiled_time / len(words) * 1e6:>6.2f} us/token")
+    print(f"{'speedup':>14} {loop_time / compiled_time:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
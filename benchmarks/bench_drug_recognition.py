@@ -0,0 +1,85 @@
+"""
+Benchmark: recognize_drugs_in_text querying every pattern and testing each against the
+transcript, as before, vs the compiled DrugRecognizer, over a synthetic knowledge base.
+Also checks that both report the same drugs
+
+Usage: python benchmarks/bench_drug_recognition.py [drug_count] [transcript_words]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+
+from corpus import CARDIOLOGY_TRANSCRIPTS, long_transcript, synthetic_formulary
+
+from core.medical_knowledge_system import MedicalKnowledgeSystem, Drug
+from core.transcript_document import build_transcript_document
+
+def legacy_recognize(system: MedicalKnowledgeSystem, text: str) -> list:
+    """The query-and-loop recognition the recognizer replaced"""
+    document = build_transcript_document(text)
+    text_lower = document.normalized_text
+    words = document.normalized_words
+    cursor = system.db.connection().execute('''
+        SELECT p.pattern, p.pattern_type, d.generic_name, d.brand_names, d.atc_code
+        FROM drug_patterns p
+        JOIN drugs d ON p.drug_id = d.id
+        ORDER BY p.id
+    ''')
+
+    recognized = []
+    for pattern, pattern_type, generic, brands, atc in cursor.fetchall():
+        if pattern_type == 'exact' and pattern in text_lower:
+            confidence = 0.9
+        elif pattern_type == 'prefix' and any(word.startswith(pattern) for word in words):
+            confidence = 0.7
+        else:
+            continue
+        recognized.append({'found_text': pattern, 'generic_name': generic,
+                           'brand_names': json.loads(brands) if brands else [],
+                           'atc_code': atc, 'confidence': confidence})
+    return recognized
+
+def without_spans(recognized: list) -> list:
+    return [{key: value for key, value in drug.items() if key != 'spans'} for drug in recognized]
+
+def timed(function, repeat: int = 5) -> float:
+    """Best wall time of a few runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    logging.disable(logging.CRITICAL)
+    drug_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    words = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    with tempfile.TemporaryDirectory() as directory:
+        system = MedicalKnowledgeSystem(os.path.join(directory, 'knowledge.db'))
+        system.drug_collection = system.document_collection = None  # SQLite only
+        for name in synthetic_formulary(drug_count):
+            system.add_drug(Drug(generic_name=name, brand_names=[f"{name.capitalize()} EG"],
+                                 atc_code='', indications='', dosage_forms=['tablet'], source='benchmark'))
+
+        texts = CARDIOLOGY_TRANSCRIPTS + [long_transcript(words)]
+        for text in texts:
+            assert without_spans(system.recognize_drugs_in_text(text)) == legacy_recognize(system, text)
+
+        compile_time = timed(system._load_drug_patterns, repeat=3)
+        legacy_time = timed(lambda: [legacy_recognize(system, text) for text in texts])
+        compiled_time = timed(lambda: [system.recognize_drugs_in_text(text) for text in texts])
+
+    print(f"{drug_count} drugs, {len(texts)} transcripts, identical results")
+    print(f"{'compile':>10} {compile_time * 1000:>10.1f} ms (after each import)")
+    print(f"{'legacy':>10} {legacy_time / len(texts) * 1000:>10.2f} ms/transcript")
+    print(f"{'compiled':>10} {compiled_time / len(texts) * 1000:>10.2f} ms/transcript")
+    print(f"{'speedup':>10} {legacy_time / compiled_time:>10.1f}x")
+
+if __name__ == '__main__':
+    main()
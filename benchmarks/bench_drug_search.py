@@ -0,0 +1,81 @@
+"""
+Benchmark: search_drugs scanning the drugs table with LIKE on names and JSON-encoded brand
+names, as before, vs the FTS5 trigram index, over a synthetic formulary with several
+brands per drug. Also checks that both find the same drugs
+
+Usage: python benchmarks/bench_drug_search.py [drug_count] [brands_per_drug]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import tempfile
+
+from corpus import synthetic_formulary
+
+from core.medical_knowledge_system import MedicalKnowledgeSystem
+
+BRAND_SUFFIXES = ['EG', 'Sandoz', 'Teva', 'Mylan', 'Apotex', 'Retard', 'Mite', 'Forte']
+
+def legacy_search(system: MedicalKnowledgeSystem, query: str) -> list:
+    """The LIKE scan the index replaced"""
+    cursor = system.db.connection().execute('''
+        SELECT generic_name, brand_names, atc_code, indications, source
+        FROM drugs
+        WHERE generic_name LIKE ? OR brand_names LIKE ?
+        ORDER BY generic_name
+    ''', (f'%{query}%', f'%{query}%'))
+    return [{'generic_name': row[0], 'brand_names': json.loads(row[1]) if row[1] else [],
+             'atc_code': row[2], 'indications': row[3], 'source': row[4]} for row in cursor.fetchall()]
+
+def timed(function, repeat: int = 5) -> float:
+    """Best wall time of a few runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    logging.disable(logging.CRITICAL)
+    drug_count = int(sys.argv[1]) if len(sys.argv) > 1 else 6000
+    brands = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    names = synthetic_formulary(drug_count)
+    rng = random.Random(3)
+    # What a user types: part of a drug name, and a few terms matching much of the formulary
+    narrow = [name[rng.randrange(3):][:rng.choice([4, 6, 8])] for name in rng.sample(names, 50)]
+    broad = ['sandoz', 'prolol', 'xaban', 'mite']
+    queries = narrow + broad
+
+    with tempfile.TemporaryDirectory() as directory:
+        system = MedicalKnowledgeSystem(os.path.join(directory, 'knowledge.db'))
+        with system.db.transaction() as cursor:
+            cursor.executemany('INSERT OR REPLACE INTO drugs (generic_name, brand_names, atc_code, source) VALUES (?, ?, ?, ?)',
+                               [(name.capitalize(),
+                                 json.dumps([f"{name.capitalize()} {suffix}" for suffix in BRAND_SUFFIXES[:brands]]),
+                                 f"C0{i % 10}AB{i % 100:02d}", 'benchmark') for i, name in enumerate(names)])
+
+        for query in queries:
+            found = {row['generic_name'] for row in system.search_drugs(query)}
+            assert found == {row['generic_name'] for row in legacy_search(system, query)}, query
+
+        results = []
+        for label, group in [('narrow', narrow), ('broad', broad)]:
+            results.append((label, len(group),
+                            timed(lambda: [legacy_search(system, query) for query in group]),
+                            timed(lambda: [system.search_drugs(query) for query in group]),
+                            timed(lambda: [system.search_drugs(query, limit=50) for query in group])))
+
+    print(f"{len(names)} drugs x {brands} brands, same drugs found; ms/search")
+    print(f"{'':>8} {'LIKE scan':>10} {'FTS5':>10} {'FTS5 page':>10} {'speedup':>8}")
+    for label, count, legacy_time, indexed_time, page_time in results:
+        print(f"{label:>8} {legacy_time / count * 1000:>10.2f} {indexed_time / count * 1000:>10.2f} "
+              f"{page_time / count * 1000:>10.2f} {legacy_time / indexed_time:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
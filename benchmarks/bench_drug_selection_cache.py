@@ -0,0 +1,86 @@
+"""
+Benchmark: ContextualDrugSelector.select_optimal_drug recomputed on every call vs the
+shared recommendation cache, on the repeated selections of multi-agent feedback loops
+
+Usage: python benchmarks/bench_drug_selection_cache.py [loop_count] [rounds_per_loop]
+"""
+
+import sys
+import time
+import random
+import logging
+import tempfile
+
+import corpus  # noqa: F401 - puts src on the path
+
+from core.contextual_drug_selector import ContextualDrugSelector, DrugContext, _selection_cache
+
+CONDITIONS = ['hypertensie', 'hartfalen', 'diabetes', 'aritmie']
+DEPARTMENTS = ['Cardiologie', 'Interne', 'General']
+CANDIDATES = ['bisoprolol', 'metoprolol', 'enalapril', 'amlodipine', 'furosemide', 'warfarin', 'metformin']
+
+def feedback_loops(count: int, rounds: int, seed: int = 17) -> list:
+    """(condition, context, candidates) calls, each loop repeating its call every round"""
+    rng = random.Random(seed)
+    calls = []
+    for _ in range(count):
+        condition = rng.choice(CONDITIONS)
+        context = DrugContext(
+            medical_condition=condition,
+            department=rng.choice(DEPARTMENTS),
+            patient_age_group=rng.choice(['adult', 'elderly']),
+            contraindications=rng.sample(['asthma', 'kidney_disease', 'pregnancy'], rng.randint(0, 2)),
+            current_medications=rng.sample(CANDIDATES, rng.randint(0, 3)),
+            allergies=[],
+            severity=rng.choice(['mild', 'moderate', 'severe']),
+            urgency='routine'
+        )
+        candidates = rng.sample(CANDIDATES, rng.randint(1, 3))
+        calls.extend([(condition, context, candidates)] * rounds)
+    return calls
+
+def timed(function, repeat: int = 3) -> float:
+    """Best wall time of a few runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        _selection_cache.clear()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    logging.disable(logging.CRITICAL)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    selector = ContextualDrugSelector(tempfile.mktemp(suffix='.db'))
+    calls = feedback_loops(count, rounds)
+
+    def uncached():
+        for condition, context, candidates in calls:
+            selector._sync_formulary()
+            selector._select_optimal_drug(condition.lower(), context.canonical(), tuple(candidates))
+
+    def cached():
+        for condition, context, candidates in calls:
+            selector.select_optimal_drug(condition, context, candidates)
+
+    mismatches = sum(
+        selector._select_optimal_drug(condition.lower(), context.canonical(), tuple(candidates))
+        != selector.select_optimal_drug(condition, context, candidates)
+        for condition, context, candidates in calls
+    )
+    print(f"{len(calls)} selections in {count} loops, {mismatches} differ from uncached selection")
+
+    uncached_time = timed(uncached)
+    cached_time = timed(cached)
+    stats = selector.get_stats()
+
+    print(f"{'uncached':>10} {len(calls) / uncached_time:>10.0f} selections/s")
+    print(f"{'cached':>10} {len(calls) / cached_time:>10.0f} selections/s")
+    print(f"{'hit rate':>10} {stats['hit_rate']:>10.1%}")
+    print(f"{'speedup':>10} {uncached_time / cached_time:>10.1f}x")
+
+if __name__ == '__main__':
+    main()
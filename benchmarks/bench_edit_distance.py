@@ -0,0 +1,79 @@
+"""
+Benchmark: the row-by-row Levenshtein function vs the bounded and bit-parallel kernels,
+scoring transcript words against formularies of growing size
+
+Usage: python benchmarks/bench_edit_distance.py [formulary_size ...]
+"""
+
+import re
+import sys
+import time
+import logging
+
+from corpus import long_transcript, synthetic_formulary
+
+from core.drug_fuzzy_index import normalize_drug_name
+from core.edit_distance import (
+    BitParallelPattern, batch_similarity, bounded_levenshtein_distance,
+    levenshtein_distance, similarity_bound
+)
+
+def full_scan(query, names, threshold):
+    """The scan the kernels replace: full distance matrix for every name"""
+    results = []
+    for name in names:
+        score = 1 - levenshtein_distance(query, name) / max(len(query), len(name))
+        if score > threshold:
+            results.append((name, score))
+    return results
+
+def banded_scan(query, names, threshold):
+    results = []
+    for name in names:
+        max_distance = similarity_bound(len(query), len(name), threshold)
+        distance = bounded_levenshtein_distance(query, name, max_distance)
+        if distance <= max_distance:
+            results.append((name, 1 - distance / max(len(query), len(name))))
+    return results
+
+def bit_parallel_scan(query, names, threshold):
+    pattern = BitParallelPattern(query)
+    return [(name, 1 - distance / max(len(query), len(name)))
+            for name in names
+            for distance in [pattern.distance(name)]
+            if 1 - distance / max(len(query), len(name)) > threshold]
+
+def main():
+    logging.disable(logging.CRITICAL)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [40, 1000, 3000]
+    threshold = 0.7
+
+    queries = sorted({normalize_drug_name(word) for word in re.findall(r'\b\w+\b', long_transcript(1000))
+                      if len(word) >= 3})
+    kernels = [
+        ('full matrix', full_scan),
+        ('banded', banded_scan),
+        ('bit-parallel', bit_parallel_scan),
+        ('batched', batch_similarity),
+    ]
+
+    print(f"{len(queries)} distinct query words, similarity > {threshold}")
+    print(f"{'names':>6} " + ' '.join(f"{name:>13}" for name, _ in kernels) + "   (ms, speedup vs full matrix)")
+    for size in sizes:
+        names = [normalize_drug_name(name) for name in synthetic_formulary(size)]
+        timings = []
+        reference = None
+
+        for label, scan in kernels:
+            start = time.perf_counter()
+            results = {query: sorted(scan(query, names, threshold)) for query in queries}
+            timings.append(time.perf_counter() - start)
+            if reference is None:
+                reference = results
+            elif results != reference:
+                print(f"{label}: results differ for {sum(results[q] != reference[q] for q in queries)} queries")
+
+        print(f"{size:>6} " + ' '.join(f"{t * 1000:>7.0f} {timings[0] / t:>4.1f}x" for t in timings))
+
+if __name__ == '__main__':
+    main()
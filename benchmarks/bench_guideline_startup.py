@@ -0,0 +1,62 @@
+"""
+Benchmark: selector startup. Loading the clinical guidelines from the JSON data file vs
+the compiled snapshot, and creating a ContextualDrugSelector per request as the factory
+does, in microseconds
+
+Usage: python benchmarks/bench_guideline_startup.py [selector_count]
+"""
+
+import sys
+import json
+import time
+import logging
+import tempfile
+
+import corpus  # noqa: F401 - puts src on the path
+
+from core.clinical_guidelines import (
+    GUIDELINES_FILE, ClinicalGuidelines, _index, compile_guidelines, load_clinical_guidelines
+)
+from core.contextual_drug_selector import ContextualDrugSelector, DrugContext
+
+def from_source() -> ClinicalGuidelines:
+    """Parse and index the data file, as every process would without a snapshot"""
+    with open(GUIDELINES_FILE, encoding='utf-8') as data_file:
+        return ClinicalGuidelines(_index(json.load(data_file)))
+
+def timed(function, repeat: int = 20) -> float:
+    """Best wall time of a few runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    logging.disable(logging.CRITICAL)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        compile_time = timed(lambda: compile_guidelines(GUIDELINES_FILE, f"{cache_dir}/guidelines.bin"), repeat=3)
+        load_clinical_guidelines(cache_dir=cache_dir)
+        source_time = timed(from_source)
+        snapshot_time = timed(lambda: load_clinical_guidelines(cache_dir=cache_dir))
+
+    # The first selector compiles the formulary; every later one takes the shared tables
+    db_path = tempfile.mktemp(suffix='.db')
+    ContextualDrugSelector(db_path)
+    context = DrugContext('hypertensie', 'Cardiologie', 'elderly', [], ['warfarin'], [], 'moderate', 'routine')
+    construct_time = timed(lambda: [ContextualDrugSelector(db_path) for _ in range(count)], repeat=3) / count
+    request_time = timed(lambda: [ContextualDrugSelector(db_path).select_optimal_drug('hypertensie', context, ['bisoprolol'])
+                                  for _ in range(count)], repeat=3) / count
+
+    print(f"{'compile snapshot':>18} {compile_time * 1e6:>10.0f} us (once, at build time)")
+    print(f"{'load from JSON':>18} {source_time * 1e6:>10.0f} us")
+    print(f"{'load snapshot':>18} {snapshot_time * 1e6:>10.0f} us")
+    print(f"{'new selector':>18} {construct_time * 1e6:>10.1f} us")
+    print(f"{'selector + select':>18} {request_time * 1e6:>10.1f} us")
+    print(f"{'speedup':>18} {source_time / snapshot_time:>10.1f}x snapshot over JSON")
+
+if __name__ == '__main__':
+    main()
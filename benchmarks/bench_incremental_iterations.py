@@ -0,0 +1,48 @@
+"""
+Benchmark: full-pass vs dirty-region incremental multi-agent iterations
+
+Usage: python benchmarks/bench_incremental_iterations.py [word_count ...]
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+
+from corpus import long_transcript
+
+from core.multi_agent_orchestrator import MultiAgentOrchestrator
+
+class TimedOrchestrator(MultiAgentOrchestrator):
+    """Records the wall time of every iteration"""
+
+    def _run_agent_iteration(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = super()._run_agent_iteration(*args, **kwargs)
+        self.iteration_times.append(time.perf_counter() - start)
+        return result
+
+def main():
+    logging.disable(logging.CRITICAL)
+    word_counts = [int(arg) for arg in sys.argv[1:]] or [500, 2000]
+
+    # The knowledge system writes its database to the working directory
+    os.chdir(tempfile.mkdtemp())
+    orchestrator = TimedOrchestrator(os.path.join(os.getcwd(), 'bench.db'))
+
+    print(f"{'words':>6} {'mode':>12} {'iters':>6} {'tokens':>8} {'total s':>8}  per-iteration s")
+    for word_count in word_counts:
+        transcript = long_transcript(word_count)
+        for incremental in (False, True):
+            orchestrator.incremental_processing = incremental
+            orchestrator.iteration_times = []
+            result = orchestrator.process_transcript_intelligently(transcript, medical_context="cardiologie")
+            details = result['iteration_details']
+            tokens = sum(d['tokens_analyzed'] for d in details)
+            times = ' '.join(f"{t:.3f}" for t in orchestrator.iteration_times)
+            print(f"{word_count:>6} {'incremental' if incremental else 'full':>12} {len(details):>6} "
+                  f"{tokens:>8} {sum(orchestrator.iteration_times):>8.3f}  {times}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: whole-regimen interaction and contraindication checks with the list scans
+_evaluate_drug_candidate used, per drug pair, vs InteractionGraph.check_regimen, on a
+synthetic formulary with thousands of interacting pairs
+
+Usage: python benchmarks/bench_interaction_graph.py [formulary_size] [pair_count]
+"""
+
+import sys
+import time
+import random
+
+from corpus import synthetic_formulary
+
+from core.interaction_graph import InteractionGraph, SEVERITIES
+
+CONDITIONS = ['asthma', 'copd', 'heart_block', 'kidney_disease', 'liver_disease', 'pregnancy', 'elderly']
+
+def synthetic_tables(names: list, pair_count: int, seed: int = 3):
+    """Interaction rows and contraindication rows over the formulary"""
+    rng = random.Random(seed)
+    interactions = set()
+    while len(interactions) < pair_count:
+        drug, other_drug = rng.sample(names, 2)
+        interactions.add((drug, other_drug, rng.choice(SEVERITIES), 'INR'))
+    contraindications = {(condition, drug) for condition in CONDITIONS for drug in rng.sample(names, len(names) // 20)}
+    return sorted(interactions), sorted(contraindications)
+
+def scan_regimen(interactions: dict, rules: dict, medications: list, conditions: list):
+    """Every pair and contraindication found with the per-drug list scans"""
+    pairs = set()
+    for drug in medications:
+        for severity in SEVERITIES:
+            listed = [med.lower() for med in interactions.get(drug, {}).get(severity, [])]
+            for other_drug in medications:
+                if other_drug.lower() in listed:
+                    pairs.add((frozenset((drug, other_drug)), severity))
+    contraindicated = {(drug, condition) for condition in conditions for drug in medications
+                       if drug in rules.get(condition, [])}
+    return pairs, contraindicated
+
+def graph_regimen(graph: InteractionGraph, medications: list, conditions: list):
+    check = graph.check_regimen(medications, conditions)
+    pairs = {(frozenset((i.drug, i.other_drug)), i.severity) for i in check.interactions}
+    return pairs, set(check.contraindications)
+
+def timed(function, repeat: int = 3) -> float:
+    """Best wall time of a few runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    pair_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    names = synthetic_formulary(size)
+    interaction_rows, contraindication_rows = synthetic_tables(names, pair_count)
+
+    # The dict-of-lists layout the selector scanned
+    interactions, rules = {}, {}
+    for drug, other_drug, severity, _ in interaction_rows:
+        interactions.setdefault(drug, {}).setdefault(severity, []).append(other_drug)
+    for condition, drug in contraindication_rows:
+        rules.setdefault(condition, []).append(drug)
+
+    start = time.perf_counter()
+    graph = InteractionGraph(interaction_rows, contraindication_rows, names)
+    build_time = time.perf_counter() - start
+
+    # Regimens drawn mostly from drugs that do interact, so there is something to find
+    rng = random.Random(5)
+    interacting = sorted({row[0] for row in interaction_rows} | {row[1] for row in interaction_rows})
+    regimens = [(rng.sample(interacting, rng.randint(5, 20)), rng.sample(CONDITIONS, rng.randint(0, 3)))
+                for _ in range(500)]
+
+    mismatches = sum(scan_regimen(interactions, rules, meds, conditions) != graph_regimen(graph, meds, conditions)
+                     for meds, conditions in regimens)
+    found = sum(len(graph.check_regimen(meds, conditions).interactions) for meds, conditions in regimens)
+    print(f"{len(graph)} drugs, {graph.pair_count} pairs, built in {build_time * 1000:.1f} ms")
+    print(f"{len(regimens)} regimens, {found} interactions found, {mismatches} differ from the list scans")
+
+    scan_time = timed(lambda: [scan_regimen(interactions, rules, meds, conditions) for meds, conditions in regimens])
+    graph_time = timed(lambda: [graph.check_regimen(meds, conditions) for meds, conditions in regimens])
+
+    print(f"{'list scans':>12} {len(regimens) / scan_time:>10.0f} regimens/s")
+    print(f"{'bitset graph':>12} {len(regimens) / graph_time:>10.0f} regimens/s")
+    print(f"{'speedup':>12} {scan_time / graph_time:>10.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: concurrent MedicalKnowledgeSystem reads and writes with a connection per call
+in the default rollback journal, as before, vs pooled per-thread connections in WAL mode.
+Reader threads search drugs and read the data version while a writer adds drugs
+
+Usage: python benchmarks/bench_knowledge_concurrency.py [readers] [reads_per_reader] [writes]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import logging
+import tempfile
+import threading
+
+from corpus import synthetic_formulary
+
+from core.formulary import DRUGS_TABLE, DRUG_PATTERNS_TABLE, drug_recognition_patterns
+from core.medical_knowledge_system import MedicalKnowledgeSystem, Drug
+
+class LegacyKnowledge:
+    """The connect-per-call storage the pool replaced"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        conn.execute(DRUGS_TABLE)
+        conn.execute(DRUG_PATTERNS_TABLE)
+        conn.execute('CREATE TABLE IF NOT EXISTS learned_documents (id INTEGER PRIMARY KEY AUTOINCREMENT)')
+        conn.commit()
+        conn.close()
+
+    def add_drug(self, drug: Drug) -> bool:
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO drugs (generic_name, brand_names, atc_code, indications, dosage_forms, source)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (drug.generic_name, json.dumps(drug.brand_names), drug.atc_code, drug.indications,
+                  json.dumps(drug.dosage_forms), drug.source))
+            drug_id = cursor.lastrowid
+            conn.commit()
+
+            # A second connection for the patterns while the first is still open
+            patterns_conn = sqlite3.connect(self.db_path)
+            for pattern, pattern_type in drug_recognition_patterns(drug.generic_name, drug.brand_names):
+                patterns_conn.execute('INSERT OR IGNORE INTO drug_patterns (pattern, drug_id, pattern_type) VALUES (?, ?, ?)',
+                                      (pattern, drug_id, pattern_type))
+            patterns_conn.commit()
+            patterns_conn.close()
+            conn.close()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def search_drugs(self, query: str) -> list:
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('''
+            SELECT generic_name, brand_names, atc_code, indications, source FROM drugs
+            WHERE generic_name LIKE ? OR brand_names LIKE ? ORDER BY generic_name
+        ''', (f'%{query}%', f'%{query}%')).fetchall()
+        conn.close()
+        return rows
+
+    @property
+    def data_version(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = [conn.execute('SELECT COUNT(*), MAX(id), MAX(updated_at) FROM drugs').fetchone(),
+                conn.execute('SELECT COUNT(*), MAX(id) FROM drug_patterns').fetchone(),
+                conn.execute('SELECT COUNT(*), MAX(id) FROM learned_documents').fetchone()]
+        conn.close()
+        return rows
+
+def make_drug(name: str, source: str = 'benchmark') -> Drug:
+    return Drug(generic_name=name, brand_names=[f"{name.capitalize()} EG", f"{name.capitalize()} Sandoz"],
+                atc_code='C07AB07', indications='', dosage_forms=['tablet'], source=source)
+
+def run(system, readers: int, reads: int, new_drugs: list) -> dict:
+    """Readers and one writer at once; returns wall time, writer time and failures"""
+    queries = [name[:3] for name in new_drugs] or ['bis']
+    failures = []
+    write_time = []
+    barrier = threading.Barrier(readers + 1)
+
+    def reader(seed: int):
+        rng = random.Random(seed)
+        barrier.wait()
+        for _ in range(reads):
+            try:
+                system.search_drugs(rng.choice(queries))
+                system.data_version
+            except sqlite3.Error as e:
+                failures.append(str(e))
+
+    def writer():
+        barrier.wait()
+        start = time.perf_counter()
+        for name in new_drugs:
+            if not system.add_drug(make_drug(name)):
+                failures.append('add_drug')
+        write_time.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)] + [threading.Thread(target=writer)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {'time': time.perf_counter() - start, 'write_time': write_time[0], 'failures': len(failures)}
+
+def main():
+    logging.disable(logging.CRITICAL)
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    reads = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    writes = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    names = synthetic_formulary(1500 + writes)
+    existing, new_drugs = names[:1500], names[1500:]
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = LegacyKnowledge(os.path.join(directory, 'legacy.db'))
+        pooled = MedicalKnowledgeSystem(os.path.join(directory, 'pooled.db'))
+        pooled.drug_collection = pooled.document_collection = None  # SQLite only
+        for name in existing:
+            legacy.add_drug(make_drug(name, 'seed'))
+            pooled.add_drug(make_drug(name, 'seed'))
+
+        print(f"{len(existing)} drugs, {readers} readers x {reads} reads, 1 writer x {len(new_drugs)} drugs")
+        results = [('connect per call', run(legacy, readers, reads, new_drugs)),
+                   ('pooled WAL', run(pooled, readers, reads, new_drugs))]
+
+        total = readers * reads * 2 + len(new_drugs)
+        for name, result in results:
+            print(f"{name:>18} {result['time']:>8.2f} s {total / result['time']:>10.0f} ops/s "
+                  f"{result['write_time'] / len(new_drugs) * 1000:>8.2f} ms/write {result['failures']:>5} failed")
+        print(f"{'speedup':>18} {results[0][1]['time'] / results[1][1]['time']:>8.1f}x")
+        print(f"{'connections':>18} {pooled.db.opened:>8} opened by the pool")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: per-token _calculate_oddness_score loop vs the batch scorer of OddWordsDetector,
+over the tokens detect_odd_words scores on a long transcript
+
+Usage: python benchmarks/bench_oddness_scoring.py [word_count]
+"""
+
+import sys
+import time
+import logging
+import tempfile
+
+import numpy as np
+
+from corpus import long_transcript
+
+from core.odd_words_detector import OddWordsDetector
+from core.transcript_document import build_transcript_document
+
+def candidate_indices(detector: OddWordsDetector, document) -> list:
+    """Tokens detect_odd_words scores: not known vocabulary, not short, not a number"""
+    return [i for i, word in enumerate(document.words)
+            if not (detector.is_known_word(document.normalized_words[i]) or
+                    len(word) < 3 or word.isdigit())]
+
+def loop_scores(detector: OddWordsDetector, document, indices: list) -> np.ndarray:
+    """The per-token scoring loop the batch scorer replaced"""
+    words = document.words
+    return np.array([detector._calculate_oddness_score(words[i], i, words, "") for i in indices])
+
+def timed(function, repeat: int = 3) -> float:
+    """Best wall time of a few runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    logging.disable(logging.CRITICAL)
+    word_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    detector = OddWordsDetector(tempfile.mktemp(suffix='.db'))
+    document = build_transcript_document(long_transcript(word_count))
+    indices = candidate_indices(detector, document)
+
+    expected = loop_scores(detector, document, indices)
+    scores = detector.score_tokens(document, indices)
+    difference = np.abs(expected - scores).max() if len(indices) else 0.0
+    print(f"{len(document.words)} tokens, {len(indices)} scored, max score difference {difference:.2e}")
+
+    loop_time = timed(lambda: loop_scores(detector, document, indices))
+    batch_time = timed(lambda: detector.score_tokens(document, indices))
+
+    print(f"{'per-token loop':>15} {loop_time * 1000:>9.2f} ms")
+    print(f"{'batch scorer':>15} {batch_time * 1000:>9.2f} ms")
+    print(f"{'speedup':>15} {loop_time / batch_time:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark corpus
+Realistic Flemish cardiology dictations, including the speech recognition errors the
+agents are meant to correct (split drug names, brand names, clipped words)
+"""
+
+import os
+import sys
+import random
+
+# Make `core` importable the same way src/app.py does
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+CARDIOLOGY_TRANSCRIPTS = [
+    "Patiënt van 78 jaar met gekende hypertensie en hartfalen met verminderde ejectiefractie. "
+    "Neemt momenteel biso prolol 5 mg dagelijks en furosemide 40 mg in de ochtend. "
+    "Klachten van toenemende kortademigheid en oedeem aan beide benen sinds twee weken.",
+
+    "ECG toont voorkamerfibrillatie met een ventriculaire respons van 110 per minuut. "
+    "Start xarelto 20 mg bij de avondmaaltijd en metro prolol 50 mg tweemaal daags. "
+    "Controle van nierfunctie en kalium binnen één week.",
+
+    "Echocardiografie: linker ventrikel licht gedilateerd, ejectiefractie 35 procent. "
+    "Matige mitralisinsufficiëntie. Voorstel om sedocar te stoppen en entresto op te starten. "
+    "Spirono lactone 25 mg verder zetten.",
+
+    "Inspanningstest tot 150 watt, gestopt wegens vermoeidheid, geen angor. "
+    "Bloeddruk stijgt adequaat tot 180 over 90. Geen significante ST-segment depressie. "
+    "Verder zetten van ator vastatin 40 mg en asaflow 80 mg.",
+
+    "Holter registratie over 24 uur toont sinusritme met enkele supraventriculaire extrasystolen. "
+    "Geen pauzes langer dan twee seconden. Patiënt gebruikt amlo dipine 10 mg en lisinopril.",
+
+    "Opname wegens acuut coronair syndroom, coronarografie toont een significante stenose van de LAD. "
+    "Stent geplaatst. Duale plaatjesremming met clopi dogrel 75 mg en aspirine gedurende twaalf maanden. "
+    "Rosu vastatin 20 mg en biso 2,5 mg gestart.",
+
+    "Controle na pacemaker implantatie. Wonde rustig, geen tekenen van infectie. "
+    "Device interrogatie toont normale drempels en impedanties. Verder zetten van eliquis 5 mg tweemaal daags.",
+
+    "Patiënte van 65 jaar met diabetes type 2 en hypercholesterolemie. Neemt metformin 1000 mg "
+    "tweemaal daags en simva statin 20 mg. Bloeddruk 150 over 85, start perindopril 5 mg.",
+
+    "Ernstige aortaklepstenose met een gemiddelde gradiënt van 45 mmHg. Patiënt klaagt over "
+    "duizeligheid bij inspanning. Bespreking op het hartteam voor TAVI. Lasix 40 mg verder zetten.",
+
+    "Paroxismale voorkamerfibrillatie, CHA2DS2-VASc score van 4. Start pradaxa 150 mg tweemaal daags. "
+    "Sotalol gestopt wegens verlengd QT interval. Carve dilol 6,25 mg opgestart.",
+]
+
+def long_transcript(word_count: int, seed: int = 42) -> str:
+    """Concatenate shuffled corpus dictations until the transcript reaches word_count words"""
+    rng = random.Random(seed)
+    parts = []
+    words = 0
+    while words < word_count:
+        text = rng.choice(CARDIOLOGY_TRANSCRIPTS)
+        parts.append(text)
+        words += len(text.split())
+    return ' '.join(parts)
+
+STEMS = ['bis', 'aten', 'meto', 'carve', 'nebi', 'enal', 'lisin', 'rami', 'peri', 'losar', 'valsar',
+         'irbe', 'cande', 'amlo', 'nife', 'felo', 'furo', 'spiro', 'ator', 'simva', 'rosu', 'rivar',
+         'apix', 'dabi', 'glicl', 'para', 'diclo', 'amoxi', 'azithro', 'cipro', 'isosor', 'clopi']
+MIDDLES = ['', 'a', 'e', 'i', 'o', 'u', 'ro', 'li', 'ta', 'ne', 'vi', 'sa']
+SUFFIXES = ['olol', 'pril', 'sartan', 'dipine', 'semide', 'statin', 'xaban', 'gatran', 'mide',
+            'dogrel', 'mycin', 'floxacin', 'cillin', 'card', 'lactone', 'formin']
+
+def synthetic_formulary(size: int, seed: int = 7):
+    """Seed formulary drugs plus generated drug-like names until the formulary reaches size (at most ~6000)"""
+    from core.formulary_seed import SEED_DRUGS
+
+    rng = random.Random(seed)
+    names = set(SEED_DRUGS)
+    while len(names) < size:
+        names.add(rng.choice(STEMS) + rng.choice(MIDDLES) + rng.choice(SUFFIXES))
+    return sorted(names)
@@ -0,0 +1,94 @@
+"""
+Evaluation: recall of phonetic lookups on respelled Belgian pronunciation variants
+
+Every variant in BelgianDrugPronunciation.belgian_patterns is respelled the way Dutch
+or French speech recognition tends to write the same sounds (k for c, f for ph, ie for i,
+dropped mute e, ...). Each respelling is looked up by exact key, with the old
+regex-rewrite key and with the Flemish phonetic code, and counted as recalled when the
+right generic drug comes back.
+
+Usage: python benchmarks/eval_phonetic_recall.py
+"""
+
+import re
+import time
+import logging
+import tempfile
+from collections import defaultdict
+
+import corpus  # noqa: F401  (puts src on the path)
+
+from core.belgian_drug_pronunciation import BelgianDrugPronunciation
+from core.drug_fuzzy_index import belgian_phonetic_key, normalize_drug_name
+
+# Respellings that keep the pronunciation; each is applied once, to its first occurrence
+RESPELLINGS = [
+    (r'c(?=[aou])', 'k'),
+    (r'c(?=[ei])', 's'),
+    (r'ph', 'f'),
+    (r'th', 't'),
+    (r'x', 'ks'),
+    (r'qu', 'kw'),
+    (r'y', 'i'),
+    (r'z', 's'),
+    (r'v', 'f'),
+    (r'u', 'oe'),
+    (r'au', 'o'),
+    (r'i(?=[^aeiou])', 'ie'),
+    (r'ine$', 'ien'),
+    (r'ide$', 'ied'),
+    (r'e$', ''),
+    (r'in$', 'ine'),
+    (r'd$', 't'),
+    (r'([lmnprst])(?=[aeiou])', r'\1\1'),
+    (r'o(?=[^aeiou][aeiou])', 'oo'),
+]
+
+def respellings(variant: str):
+    spelled = normalize_drug_name(variant)
+    seen = {spelled}
+    for pattern, replacement in RESPELLINGS:
+        respelled = re.sub(pattern, replacement, spelled, count=1)
+        if respelled not in seen:
+            seen.add(respelled)
+            yield respelled
+
+def main():
+    logging.disable(logging.CRITICAL)
+    system = BelgianDrugPronunciation(tempfile.mktemp(suffix='.db'))
+
+    old_keys = defaultdict(set)
+    for generic_name, variants in system.belgian_patterns.items():
+        for variant in [generic_name] + variants:
+            old_keys[normalize_drug_name(belgian_phonetic_key(variant))].add(generic_name)
+
+    def old_key_lookup(spoken):
+        return old_keys.get(normalize_drug_name(belgian_phonetic_key(spoken)), set())
+
+    def code_lookup(spoken):
+        hits = {generic for generic, _ in system._variant_codes.get(system._create_phonetic_pattern(spoken), [])}
+        return hits | {entry.generic_name for entry in system.drug_index.lookup_phonetic_code(spoken)}
+
+    def full_lookup(spoken):
+        matches = system.find_drug_by_pronunciation(spoken)
+        return {matches[0]['generic_name']} if matches else set()
+
+    queries = [(generic_name, respelled)
+               for generic_name, variants in system.belgian_patterns.items()
+               for variant in variants
+               for respelled in respellings(variant)]
+
+    print(f"{len(queries)} respellings of {sum(len(v) for v in system.belgian_patterns.values())} variants")
+    print(f"{'lookup':>24} {'recall':>8} {'candidates':>11} {'us/query':>9}")
+    for label, lookup in [('regex-rewrite key', old_key_lookup),
+                          ('flemish phonetic code', code_lookup),
+                          ('find_drug (top 1)', full_lookup)]:
+        start = time.perf_counter()
+        results = [lookup(spoken) for _, spoken in queries]
+        elapsed = time.perf_counter() - start
+        recalled = sum(generic_name in hits for (generic_name, _), hits in zip(queries, results))
+        candidates = sum(len(hits) for hits in results) / len(queries)
+        print(f"{label:>24} {recalled / len(queries):>8.1%} {candidates:>11.2f} {elapsed / len(queries) * 1e6:>9.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -20,6 +20,10 @@ except ImportError:
 knowledge_api = Blueprint('knowledge_api', __name__, url_prefix='/api/knowledge')
 logger = logging.getLogger(__name__)
 
+# Drug search pages
+SEARCH_PAGE_SIZE = 50
+MAX_SEARCH_PAGE_SIZE = 200
+
 def login_required(f):
     """Decorator to require login for API endpoints"""
     @wraps(f)
@@ -44,19 +48,31 @@ def get_stats():
 @knowledge_api.route('/drugs/search', methods=['GET'])
 @login_required
 def search_drugs():
-    """Search for drugs"""
+    """Search for drugs, a page at a time"""
     try:
-        query = request.args.get('q', '')
+        query = request.args.get('q', '').strip()
         if not query:
             return jsonify({'success': False, 'error': 'Query parameter required'}), 400
         
+        limit = request.args.get('limit', SEARCH_PAGE_SIZE, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if limit < 1 or offset < 0:
+            return jsonify({'success': False, 'error': 'Invalid limit or offset'}), 400
+        limit = min(limit, MAX_SEARCH_PAGE_SIZE)
+        
+        # One extra row tells whether another page follows
         system = get_knowledge_system()
-        results = system.search_drugs(query)
+        results = system.search_drugs(query, limit=limit + 1, offset=offset)
+        has_more = len(results) > limit
+        results = results[:limit]
         
         return jsonify({
             'success': True,
             'results': results,
-            'count': len(results)
+            'count': len(results),
+            'offset': offset,
+            'limit': limit,
+            'has_more': has_more
         })
         
     except Exception as e:
@@ -1,5 +1,6 @@
 import io
 import os
+import json
 import datetime
 import openai
 import sqlite3
@@ -235,6 +236,20 @@ def init_db():
             # Column already exists
             pass
         
+        # Add agent_edits column (JSON audit of multi-agent corrections) for existing databases
+        try:
+            cursor.execute('ALTER TABLE jobs ADD COLUMN agent_edits TEXT')
+        except sqlite3.OperationalError:
+            # Column already exists
+            pass
+        
+        # Add agent_transcript column (the transcript agent_edits refer to) for existing databases
+        try:
+            cursor.execute('ALTER TABLE jobs ADD COLUMN agent_transcript TEXT')
+        except sqlite3.OperationalError:
+            # Column already exists
+            pass
+        
         conn.commit()
         conn.close()
         print("Database initialized successfully")
@@ -679,7 +694,7 @@ def review_job(job_id):
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT job_id, patient_id, patient_dob, transcript, report, status, confidence_score, created_at
+            SELECT job_id, patient_id, patient_dob, transcript, report, status, confidence_score, created_at, agent_edits
             FROM jobs 
             WHERE job_id = ? AND user_id = ?
         ''', (job_id, user['id']))
@@ -700,7 +715,8 @@ def review_job(job_id):
             'report': job_row[4],
             'status': job_row[5],
             'confidence_score': job_row[6],
-            'created_at': job_row[7]
+            'created_at': job_row[7],
+            'agent_edits': json.loads(job_row[8]) if job_row[8] else []
         }
         
         return render_template('review.html', job=job_data, user=user)
@@ -770,6 +786,7 @@ def process_audio():
             
             # Enhance with multi-agent system (optional)
             enhanced_transcript = transcript_text
+            agent_edits = []
             try:
                 from core.multi_agent_orchestrator import get_multi_agent_orchestrator
                 from core.contextual_drug_selector import DrugContext
@@ -796,6 +813,9 @@ def process_audio():
                     department="General"
                 )
                 
+                # Keep the audit of agent corrections for the review page
+                agent_edits = multi_agent_result.get('edit_diff', [])
+                
                 # Use enhanced transcript if improvements were made
                 if multi_agent_result.get('total_improvements', 0) > 0:
                     enhanced_transcript = multi_agent_result['final_transcript']
@@ -821,9 +841,10 @@ def process_audio():
             
             # Insert job data
             cursor.execute('''
-                INSERT INTO jobs (job_id, user_id, patient_id, patient_dob, transcript, report, status, confidence_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (job_id, user['id'], patient_id, patient_dob, transcript_text, report_text, 'completed', 0.85))
+                INSERT INTO jobs (job_id, user_id, patient_id, patient_dob, transcript, report, status, confidence_score, agent_edits, agent_transcript)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (job_id, user['id'], patient_id, patient_dob, transcript_text, report_text, 'completed', 0.85,
+                  json.dumps(agent_edits), enhanced_transcript))
             
             conn.commit()
             conn.close()
@@ -959,6 +980,23 @@ def validate_job(job_id):
         logger.error(f"Error validating job {job_id}: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def record_vocabulary_feedback(job_id, agent_edits, decisions, agent_transcript):
+    """Record which agent corrections of unknown words the doctor marked correct or wrong, and fold them into the shared corrections in the background"""
+    try:
+        from core.odd_words_detector import get_odd_words_detector
+        from core.vocabulary_feedback import extract_feedback_events, get_vocabulary_feedback_store, parse_edit_decisions
+        
+        decisions = parse_edit_decisions(decisions)
+        if not decisions:
+            return
+        detector = get_odd_words_detector(DATABASE_URL)
+        events = extract_feedback_events(agent_edits, decisions, agent_transcript, detector.is_known_word)
+        store = get_vocabulary_feedback_store(DATABASE_URL)
+        if store.record(job_id, events):
+            store.schedule_aggregation()
+    except Exception as e:
+        logger.warning(f"Vocabulary feedback not recorded for job {job_id}: {e}")
+
 @app.route('/api/job/<job_id>/save', methods=['POST'])
 @login_required
 def save_job(job_id):
@@ -970,6 +1008,8 @@ def save_job(job_id):
     try:
         data = request.get_json()
         updated_report = data.get('report', '')
+        # Agent corrections the doctor marked as correct or wrong, by position in agent_edits
+        decisions = data.get('agent_edit_decisions')
         
         if not updated_report:
             return jsonify({'success': False, 'error': 'No report content provided'}), 400
@@ -977,6 +1017,10 @@ def save_job(job_id):
         conn = sqlite3.connect(DATABASE_URL)
         cursor = conn.cursor()
         
+        # Agent corrections and the transcript they refer to, to learn from the doctor's decisions
+        cursor.execute('SELECT agent_edits, agent_transcript FROM jobs WHERE job_id = ? AND user_id = ?', (job_id, user['id']))
+        previous = cursor.fetchone()
+        
         cursor.execute('''
             UPDATE jobs 
             SET report = ?, status = 'edited'
@@ -990,6 +1034,10 @@ def save_job(job_id):
         conn.commit()
         conn.close()
         
+        # Jobs stored before agent transcripts were kept have nothing to check decisions against
+        if previous[1]:
+            record_vocabulary_feedback(job_id, json.loads(previous[0]) if previous[0] else [], decisions, previous[1])
+        
         return jsonify({
             'success': True,
             'message': 'Report saved successfully'
@@ -1027,6 +1075,17 @@ def health_check():
             'timestamp': datetime.datetime.utcnow().isoformat()
         }), 503
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Scrape endpoint for per-agent processing metrics"""
+    try:
+        from core.agent_metrics import get_metrics_registry
+        return get_metrics_registry().render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+    except Exception as e:
+        logger.error(f"Metrics export error: {str(e)}")
+        return f"# metrics unavailable: {str(e)}\n", 503, {'Content-Type': 'text/plain; charset=utf-8'}
+
 # SEO and Security Routes
 @app.route('/robots.txt')
 def robots_txt():
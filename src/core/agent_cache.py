@@ -0,0 +1,103 @@
+"""
+Agent Result Cache
+Memoizes agent results keyed on agent name, agent data version, transcript hash and
+call context, so unchanged inputs return the previous result without re-analysis
+"""
+
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+def data_fingerprint(*parts: Iterable) -> str:
+    """Content hash of agent data (vocabularies, pattern tables) used as its data version"""
+    digest = hashlib.sha1()
+    for part in parts:
+        items = part.items() if isinstance(part, dict) else part
+        for item in sorted(repr(item) for item in items):
+            digest.update(item.encode('utf-8'))
+            digest.update(b'\0')
+        digest.update(b'\1')
+    return digest.hexdigest()
+
+class AgentResultCache:
+    """Bounded LRU cache of agent results, safe to share between scheduler threads"""
+
+    def __init__(self, max_entries: int = 256, copy_result: Callable[[Any], Any] = copy.deepcopy):
+        self.max_entries = max_entries
+        self.copy_result = copy_result
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, agent_name: str, data_version: str, text: str, context: Any) -> Tuple:
+        """Cache key for one agent call.
+
+        The text is hashed as-is: results carry character offsets into it, so any
+        normalization that moves characters would make cached offsets wrong.
+        """
+        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        context_hash = hashlib.sha256(repr(context).encode('utf-8')).hexdigest()
+        return (agent_name, data_version, text_hash, context_hash)
+
+    def get_or_compute(self, agent_name: str, data_version: str, text: str, context: Any,
+                       compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, cache_hit); results are copied so callers cannot alter cached entries"""
+
+        return self.lookup(self.make_key(agent_name, data_version, text, context), compute)
+
+    def lookup(self, key: Tuple, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, cache_hit) for a caller-built key, which must include every input and data version"""
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self.copy_result(self._entries[key]), True
+            self.misses += 1
+
+        result = compute()
+
+        # Failed calls report an error instead of raising; those are not worth keeping
+        if isinstance(result, dict) and 'error' in result:
+            return result, False
+
+        with self._lock:
+            self._entries[key] = self.copy_result(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return result, False
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+# Global instance, shared by all orchestrators so resubmitted transcripts hit the cache
+_agent_cache = None
+
+def get_agent_cache() -> AgentResultCache:
+    """Get or create the global agent result cache"""
+    global _agent_cache
+    if _agent_cache is None:
+        _agent_cache = AgentResultCache()
+    return _agent_cache
@@ -0,0 +1,152 @@
+"""
+Agent Metrics Registry
+Collects per-agent timings and counters for every agent invocation and exports them
+as histograms in the Prometheus text exposition format
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Bucket upper bounds per metric kind
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+METRIC_PREFIX = 'medical_agent'
+
+def _escape_label(value: str) -> str:
+    """Escape a label value for the text exposition format"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per agent"""
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.series: Dict[str, Dict] = {}
+
+    def observe(self, agent: str, value: float):
+        series = self.series.setdefault(agent, {
+            'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0, 'max': 0.0
+        })
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                series['buckets'][position] += 1
+        series['sum'] += value
+        series['count'] += 1
+        series['max'] = max(series['max'], value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for agent, series in sorted(self.series.items()):
+            label = f'agent="{_escape_label(agent)}"'
+            for bound, count in zip(self.buckets, series['buckets']):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series["count"]}')
+            lines.append(f'{self.name}_sum{{{label}}} {_format_value(series["sum"])}')
+            lines.append(f'{self.name}_count{{{label}}} {series["count"]}')
+        return lines
+
+class Counter:
+    """Monotonic counter with one series per agent"""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.series: Dict[str, float] = {}
+
+    def inc(self, agent: str, amount: float = 1):
+        self.series[agent] = self.series.get(agent, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for agent, value in sorted(self.series.items()):
+            lines.append(f'{self.name}{{agent="{_escape_label(agent)}"}} {_format_value(value)}')
+        return lines
+
+class AgentMetricsRegistry:
+    """Process-wide registry of agent invocation metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._create_metrics()
+
+    def _create_metrics(self):
+        self.wall_time = Histogram(f"{METRIC_PREFIX}_wall_seconds", "Wall time per agent invocation", TIME_BUCKETS)
+        self.cpu_time = Histogram(f"{METRIC_PREFIX}_cpu_seconds", "CPU time per agent invocation", TIME_BUCKETS)
+        self.input_size = Histogram(f"{METRIC_PREFIX}_input_tokens", "Transcript tokens analyzed per invocation", SIZE_BUCKETS)
+        self.proposed = Histogram(f"{METRIC_PREFIX}_corrections_proposed", "Corrections proposed per invocation", COUNT_BUCKETS)
+        self.accepted = Histogram(f"{METRIC_PREFIX}_corrections_accepted", "Corrections applied per invocation", COUNT_BUCKETS)
+        self.invocations = Counter(f"{METRIC_PREFIX}_invocations_total", "Agent invocations")
+        self.cache_hits = Counter(f"{METRIC_PREFIX}_cache_hits_total", "Agent invocations answered from the result cache")
+        self.failures = Counter(f"{METRIC_PREFIX}_failures_total", "Agent invocations that reported an error")
+
+    def record(self, agent: str, wall_time: float, cpu_time: float, input_size: int,
+               corrections_proposed: int = 0, corrections_accepted: int = 0,
+               cache_hit: bool = False, success: bool = True):
+        """Record one agent invocation"""
+        with self._lock:
+            self.wall_time.observe(agent, wall_time)
+            self.cpu_time.observe(agent, cpu_time)
+            self.input_size.observe(agent, input_size)
+            self.proposed.observe(agent, corrections_proposed)
+            self.accepted.observe(agent, corrections_accepted)
+            self.invocations.inc(agent)
+            if cache_hit:
+                self.cache_hits.inc(agent)
+            if not success:
+                self.failures.inc(agent)
+
+    def render(self) -> str:
+        """Export all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = []
+            for metric in (self.wall_time, self.cpu_time, self.input_size, self.proposed, self.accepted,
+                           self.invocations, self.cache_hits, self.failures):
+                lines.extend(metric.render())
+            return '\n'.join(lines) + '\n'
+
+    def summary(self, agent: Optional[str] = None) -> Dict:
+        """Per-agent totals and averages since the process started"""
+        with self._lock:
+            agents = [agent] if agent else sorted(self.invocations.series)
+            summary = {}
+            for name in agents:
+                invocations = self.invocations.series.get(name, 0)
+                if not invocations:
+                    continue
+                wall = self.wall_time.series[name]
+                cpu = self.cpu_time.series[name]
+                summary[name] = {
+                    'invocations': invocations,
+                    'total_wall_time': wall['sum'],
+                    'mean_wall_time': wall['sum'] / invocations,
+                    'max_wall_time': wall['max'],
+                    'total_cpu_time': cpu['sum'],
+                    'mean_input_tokens': self.input_size.series[name]['sum'] / invocations,
+                    'corrections_proposed': int(self.proposed.series[name]['sum']),
+                    'corrections_accepted': int(self.accepted.series[name]['sum']),
+                    'cache_hits': int(self.cache_hits.series.get(name, 0)),
+                    'failures': int(self.failures.series.get(name, 0))
+                }
+            return summary
+
+    def reset(self):
+        """Drop all recorded metrics"""
+        with self._lock:
+            self._create_metrics()
+
+# Global instance
+_metrics_registry = None
+
+def get_metrics_registry() -> AgentMetricsRegistry:
+    """Get or create the global agent metrics registry"""
+    global _metrics_registry
+    if _metrics_registry is None:
+        _metrics_registry = AgentMetricsRegistry()
+    return _metrics_registry
@@ -0,0 +1,150 @@
+"""
+Agent Scheduler
+Runs multi-agent tasks as a small dependency graph: tasks declare the artifacts they
+read and write, independent tasks run concurrently on a long-lived thread pool, and
+per-task wall time plus the critical path are reported for every run
+"""
+
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AgentTask:
+    """A unit of work in one multi-agent iteration"""
+    name: str
+    run: Callable[[Dict[str, Any]], Dict[str, Any]]
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+    remote: bool = False  # Network-bound: started first so it overlaps local work
+
+@dataclass
+class TaskTiming:
+    """When a task ran, relative to the start of the schedule"""
+    name: str
+    started: float
+    finished: float
+    succeeded: bool
+
+    @property
+    def wall_time(self) -> float:
+        return self.finished - self.started
+
+@dataclass
+class ScheduleResult:
+    """Artifacts and timings of one scheduler run"""
+    artifacts: Dict[str, Any]
+    timings: Dict[str, TaskTiming] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    def collect(self, artifact: str) -> List[Any]:
+        """Values written to an artifact, in task declaration order"""
+        return self.artifacts.get(artifact, [])
+
+class AgentScheduler:
+    """Dependency-aware scheduler for agent tasks"""
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        # Kept across runs: worker threads hold their pooled SQLite connections
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='agent')
+
+    def run(self, tasks: List[AgentTask], initial_artifacts: Dict[str, Any]) -> ScheduleResult:
+        """Run all tasks, each one as soon as every producer of the artifacts it reads has finished.
+
+        Artifacts written by tasks are lists with one entry per producing task, ordered
+        as the tasks were declared, so merging them does not depend on thread timing.
+        A failed task contributes nothing; its dependents still run.
+        """
+
+        producers: Dict[str, List[str]] = {}
+        for task in tasks:
+            for artifact in task.writes:
+                producers.setdefault(artifact, []).append(task.name)
+
+        dependencies = {
+            task.name: {producer for artifact in task.reads for producer in producers.get(artifact, [])
+                        if producer != task.name}
+            for task in tasks
+        }
+        task_order = {task.name: position for position, task in enumerate(tasks)}
+        outputs: Dict[str, Dict[str, Any]] = {}
+        timings: Dict[str, TaskTiming] = {}
+        pending = list(tasks)
+        running = {}
+
+        schedule_start = time.perf_counter()
+
+        def execute(task: AgentTask, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], float, float]:
+            started = time.perf_counter() - schedule_start
+            try:
+                return task.run(inputs) or {}, started, time.perf_counter() - schedule_start
+            except Exception as e:
+                logger.error(f"Agent task {task.name} failed: {e}")
+                return None, started, time.perf_counter() - schedule_start
+
+        while pending or running:
+            ready = [task for task in pending if dependencies[task.name] <= timings.keys()]
+            # Remote tasks first, so their latency overlaps with local work
+            ready.sort(key=lambda task: (not task.remote, task_order[task.name]))
+
+            for task in ready:
+                pending.remove(task)
+                inputs = self._gather_inputs(task, initial_artifacts, producers, outputs, task_order)
+                running[self.executor.submit(execute, task, inputs)] = task
+
+            if not running:
+                # Unsatisfiable dependencies (a cycle); never expected with declared tasks
+                logger.error(f"Agent tasks with unresolved dependencies: {[task.name for task in pending]}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                result, started, finished = future.result()
+                timings[task.name] = TaskTiming(task.name, started, finished, result is not None)
+                if result is not None:
+                    outputs[task.name] = result
+
+        artifacts = dict(initial_artifacts)
+        for artifact, names in producers.items():
+            artifacts[artifact] = [outputs[name][artifact] for name in names
+                                   if name in outputs and artifact in outputs[name]]
+
+        return ScheduleResult(
+            artifacts=artifacts,
+            timings=timings,
+            critical_path=self._critical_path(timings, dependencies),
+            wall_time=time.perf_counter() - schedule_start
+        )
+
+    def _gather_inputs(self, task: AgentTask, initial_artifacts: Dict[str, Any], producers: Dict[str, List[str]],
+                       outputs: Dict[str, Dict[str, Any]], task_order: Dict[str, int]) -> Dict[str, Any]:
+        """Build the read-only view of artifacts a task declared"""
+        inputs = {}
+        for artifact in task.reads:
+            if artifact in producers:
+                inputs[artifact] = [outputs[name][artifact] for name in sorted(producers[artifact], key=task_order.get)
+                                    if name in outputs and artifact in outputs[name]]
+            else:
+                inputs[artifact] = initial_artifacts.get(artifact)
+        return inputs
+
+    def _critical_path(self, timings: Dict[str, TaskTiming], dependencies: Dict[str, set]) -> List[str]:
+        """Chain of tasks that determined the total wall time"""
+        if not timings:
+            return []
+
+        path = []
+        current: Optional[str] = max(timings.values(), key=lambda timing: timing.finished).name
+        while current:
+            path.append(current)
+            finished_dependencies = [name for name in dependencies.get(current, ()) if name in timings]
+            current = max(finished_dependencies, key=lambda name: timings[name].finished) if finished_dependencies else None
+
+        return list(reversed(path))
@@ -183,6 +183,16 @@ def cleanup_old_jobs():
         logger.error(f"Cleanup task error: {str(e)}")
         raise
 
+@celery_app.task
+def aggregate_vocabulary_feedback(db_path: str = 'medical_app.db'):
+    """Periodic task folding recorded doctor feedback into the shared vocabulary"""
+    from .vocabulary_feedback import get_vocabulary_feedback_store
+    
+    version = get_vocabulary_feedback_store(db_path).aggregate()
+    if version is None:
+        raise RuntimeError("Vocabulary feedback aggregation failed")
+    return {'version': version, 'timestamp': datetime.now().isoformat()}
+
 @celery_app.task
 def health_check():
     """Health check task for monitoring"""
@@ -228,6 +238,11 @@ celery_app.conf.beat_schedule = {
         'task': 'src.core.background_tasks.cleanup_old_jobs',
         'schedule': crontab(hour=2, minute=0),  # Run at 2 AM daily
     },
+    'aggregate-vocabulary-feedback': {
+        'task': 'src.core.background_tasks.aggregate_vocabulary_feedback',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+        'args': (os.environ.get('DATABASE_URL', 'medical_app.db'),),
+    },
     'health-check': {
         'task': 'src.core.background_tasks.health_check',
         'schedule': crontab(minute='*/30'),  # Every 30 minutes
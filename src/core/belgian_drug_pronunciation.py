@@ -5,10 +5,21 @@ Handles how Belgian doctors pronounce drug names in Dutch/French medical context
 
 import re
 import logging
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+import numpy as np
+from typing import Any, Dict, Iterable, List, Tuple, Optional
+from dataclasses import dataclass, astuple
 import sqlite3
 
+from .transcript_document import TranscriptDocument, build_transcript_document
+from .transcript_edits import EditProposal, apply_edits
+from .agent_cache import data_fingerprint
+from .variant_scanner import VariantScanner
+from .drug_fuzzy_index import (
+    get_drug_index, flemish_phonetic_code, MIN_PHONETIC_CODE_LENGTH, PHONETIC_CODE_REWRITES
+)
+from .formulary import get_formulary
+from .pronunciation_store import get_pronunciation_store
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -20,150 +31,65 @@ class PronunciationVariant:
     language: str  # 'nl', 'fr', 'mixed'
     confidence: float
 
+@dataclass(frozen=True, order=True)
+class VariantHit:
+    """A variant found by the scanner; orders by position in the pronunciation database"""
+    drug_order: int
+    variant_order: int
+    generic_name: str
+    variant: str
+    split_name: bool = False  # from multi_word_patterns rather than the drug's own variants
+
 class BelgianDrugPronunciation:
     """Handles Belgian-specific drug pronunciation patterns"""
     
+    # Tokens on either side that feed the local context boost
+    context_radius = 5
+    
+    # Base confidence of a phonetic code hit, before the context boost
+    phonetic_code_confidence = 0.9
+    
+    # Compiled matcher snapshot in the pronunciation store; bump the format when its layout changes
+    snapshot_name = 'belgian_drug_pronunciation'
+    snapshot_format = 1
+    
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.pronunciation_db = {}
         self.phonetic_patterns = {}
+        self._scanner = VariantScanner()
+        self._variant_codes = {}
+        self._data_version = None
+        self.drug_index = get_drug_index()
+        self.formulary = get_formulary()
+        self.store = get_pronunciation_store(db_path)
+        self._snapshot_fingerprint = None
+        self._custom_loaded_id = 0
+        self._store_version = None
         self._initialize_pronunciation_database()
+        self._build_context_features()
+    
+    @property
+    def data_version(self) -> str:
+        """Fingerprint of the pronunciation patterns, context maps and drug index; changes whenever they do"""
+        self._sync_formulary()
+        self._sync_custom_pronunciations()
+        if self._data_version is None:
+            self._data_version = data_fingerprint(self.belgian_patterns, self.multi_word_patterns,
+                                                  self.condition_drug_mapping, self.department_drug_mapping)
+        self.drug_index.refresh()
+        return f"{self._data_version}:{self.drug_index.version}"
     
     def _initialize_pronunciation_database(self):
         """Initialize the pronunciation database with Belgian patterns"""
         
-        # Common Belgian pronunciation patterns for drug names
-        self.belgian_patterns = {
-            # Beta-blockers
-            'bisoprolol': [
-                'biso prolol', 'biso prol ol', 'bisoprolol', 'biso', 'bisoprol',
-                'bisocard', 'bisobloc', 'bisoprolol eg', 'bisoprolol sandoz'
-            ],
-            'atenolol': [
-                'atenolol', 'aten olol', 'aten ol', 'tenormin', 'atenol'
-            ],
-            'metoprolol': [
-                'metoprolol', 'meto prolol', 'meto prol', 'lopressor', 'seloken',
-                'metoprolol tartrate', 'metoprolol succinate'
-            ],
-            'carvedilol': [
-                'carvedilol', 'carve dilol', 'kredex', 'dilatrend'
-            ],
-            'nebivolol': [
-                'nebivolol', 'nebi volol', 'nebi vol', 'nobiten'
-            ],
-            'propranolol': [
-                'propranolol', 'propran olol', 'inderal', 'propra'
-            ],
-            
-            # ACE Inhibitors
-            'enalapril': [
-                'enalapril', 'enal april', 'renitec', 'enalapril eg'
-            ],
-            'lisinopril': [
-                'lisinopril', 'lisin opril', 'zestril', 'prinivil'
-            ],
-            'ramipril': [
-                'ramipril', 'rami pril', 'tritace', 'ramipril eg'
-            ],
-            'perindopril': [
-                'perindopril', 'perin dopril', 'coversyl', 'perindopril eg'
-            ],
-            
-            # ARBs (Sartans)
-            'losartan': [
-                'losartan', 'losar tan', 'cozaar', 'losartan eg'
-            ],
-            'valsartan': [
-                'valsartan', 'valsar tan', 'diovan', 'valsartan eg'
-            ],
-            'irbesartan': [
-                'irbesartan', 'irbe sartan', 'aprovel', 'irbesartan eg'
-            ],
-            'candesartan': [
-                'candesartan', 'cande sartan', 'atacand', 'candesartan eg'
-            ],
-            
-            # Diuretics
-            'furosemide': [
-                'furosemide', 'furo semide', 'lasix', 'furosemide eg'
-            ],
-            'hydrochlorothiazide': [
-                'hydrochlorothiazide', 'hydrochloro thiazide', 'hctz', 'esidrex'
-            ],
-            'spironolactone': [
-                'spironolactone', 'spirono lactone', 'aldactone'
-            ],
-            
-            # Statins
-            'atorvastatin': [
-                'atorvastatin', 'ator vastatin', 'lipitor', 'atorvastatin eg'
-            ],
-            'simvastatin': [
-                'simvastatin', 'simva statin', 'zocor', 'simvastatin eg'
-            ],
-            'rosuvastatin': [
-                'rosuvastatin', 'rosu vastatin', 'crestor', 'rosuvastatin eg'
-            ],
-            
-            # Calcium Channel Blockers
-            'amlodipine': [
-                'amlodipine', 'amlo dipine', 'norvasc', 'amlodipine eg'
-            ],
-            'nifedipine': [
-                'nifedipine', 'nife dipine', 'adalat', 'nifedipine eg'
-            ],
-            
-            # Anticoagulants
-            'warfarin': [
-                'warfarin', 'warfa rin', 'marevan', 'coumadin'
-            ],
-            'rivaroxaban': [
-                'rivaroxaban', 'riva roxaban', 'xarelto'
-            ],
-            'apixaban': [
-                'apixaban', 'api xaban', 'eliquis'
-            ],
-            'dabigatran': [
-                'dabigatran', 'dabi gatran', 'pradaxa'
-            ],
-            
-            # Antiplatelets
-            'clopidogrel': [
-                'clopidogrel', 'clopi dogrel', 'plavix', 'clopidogrel eg'
-            ],
-            'acetylsalicylic acid': [
-                'acetylsalicylic acid', 'aspirin', 'aspirine', 'cardioaspirin',
-                'acetyl salicyl', 'asa', 'asaflow'
-            ],
-            
-            # Diabetes medications
-            'metformin': [
-                'metformin', 'metfor min', 'glucophage', 'metformin eg'
-            ],
-            'gliclazide': [
-                'gliclazide', 'glic lazide', 'diamicron', 'gliclazide eg'
-            ],
-            
-            # Antibiotics
-            'amoxicillin': [
-                'amoxicillin', 'amoxi cillin', 'clamoxyl', 'amoxicillin eg'
-            ],
-            'azithromycin': [
-                'azithromycin', 'azithro mycin', 'zithromax', 'azithromycin eg'
-            ],
-            
-            # Pain medications
-            'paracetamol': [
-                'paracetamol', 'para cetamol', 'dafalgan', 'panadol', 'acetaminophen'
-            ],
-            'ibuprofen': [
-                'ibuprofen', 'ibu profen', 'brufen', 'nurofen', 'ibuprofen eg'
-            ],
-            'diclofenac': [
-                'diclofenac', 'diclo fenac', 'voltaren', 'diclofenac eg'
-            ]
-        }
+        # Drug pronunciations, split names and context keywords come from the formulary
+        compiled = self.formulary.compiled()
+        self.belgian_patterns = {generic_name: list(variants) for generic_name, variants in compiled.pronunciations.items()}
+        self.multi_word_patterns = dict(compiled.split_names)
+        self.condition_drug_mapping = compiled.condition_drugs
+        self.department_drug_mapping = compiled.department_drugs
+        self._formulary_fingerprint = compiled.fingerprint
         
         # Belgian-specific pronunciation rules
         self.belgian_pronunciation_rules = {
@@ -186,65 +112,199 @@ class BelgianDrugPronunciation:
         self._build_pronunciation_database()
     
     def _build_pronunciation_database(self):
-        """Build the pronunciation database"""
-        for generic_name, variants in self.belgian_patterns.items():
-            self.pronunciation_db[generic_name] = PronunciationVariant(
-                original_name=generic_name,
-                pronunciation_variants=variants,
-                phonetic_pattern=self._create_phonetic_pattern(generic_name),
-                language='mixed',  # Most Belgian doctors use mixed Dutch/French
-                confidence=0.9
-            )
+        """Build the pronunciation database, from the stored snapshot when it matches the built-in table"""
+        self._snapshot_fingerprint = data_fingerprint(
+            [self.snapshot_format], self.belgian_patterns, self.multi_word_patterns, PHONETIC_CODE_REWRITES
+        )
+        snapshot = self.store.load_snapshot(self.snapshot_name, self._snapshot_fingerprint)
+        
+        if snapshot is not None and not self._restore_snapshot(*snapshot):
+            snapshot = None
+        
+        if snapshot is None:
+            for generic_name, variants in self.belgian_patterns.items():
+                self.pronunciation_db[generic_name] = PronunciationVariant(
+                    original_name=generic_name,
+                    pronunciation_variants=variants,
+                    phonetic_pattern=self._create_phonetic_pattern(generic_name),
+                    language='mixed',  # Most Belgian doctors use mixed Dutch/French
+                    confidence=0.9
+                )
+            
+            self._index_variants()
+            self._save_snapshot()
+        # Custom pronunciations newer than the snapshot are loaded on first use
+    
+    def _save_snapshot(self):
+        """Store the compiled matcher so new instances and other workers skip compiling it"""
+        drugs = [
+            (generic_name, data.pronunciation_variants, data.phonetic_pattern, data.confidence)
+            for generic_name, data in self.pronunciation_db.items()
+        ]
+        state = (drugs, self._scanner.to_state(astuple), self._variant_codes)
+        self.store.save_snapshot(self.snapshot_name, self._snapshot_fingerprint, self._custom_loaded_id, state)
+    
+    def _restore_snapshot(self, last_custom_id: int, state: Tuple[Any, ...]) -> bool:
+        """Restore the compiled matcher; False, with nothing changed, when the snapshot is malformed"""
+        try:
+            drugs, scanner_state, variant_codes = state
+            belgian_patterns = {}
+            pronunciation_db = {}
+            for generic_name, variants, phonetic_pattern, confidence in drugs:
+                belgian_patterns[generic_name] = variants
+                pronunciation_db[generic_name] = PronunciationVariant(
+                    original_name=generic_name,
+                    pronunciation_variants=variants,
+                    phonetic_pattern=phonetic_pattern,
+                    language='mixed',
+                    confidence=confidence
+                )
+            scanner = VariantScanner.from_state(scanner_state, lambda value: VariantHit(*value))
+        except Exception as e:
+            logger.warning(f"Rebuilding pronunciations, snapshot unusable: {e}")
+            return False
+        
+        self.belgian_patterns = belgian_patterns
+        self.pronunciation_db = pronunciation_db
+        self._scanner = scanner
+        self._variant_codes = variant_codes
+        self._custom_loaded_id = last_custom_id
+        return True
+    
+    def _sync_formulary(self):
+        """Rebuild from the formulary when drugs or spoken forms changed in it; custom pronunciations are reapplied"""
+        if self.formulary.compiled().fingerprint == self._formulary_fingerprint:
+            return
+        
+        self.pronunciation_db = {}
+        self._custom_loaded_id = 0
+        self._store_version = None
+        self._data_version = None
+        self._initialize_pronunciation_database()
+        self._build_context_features()
+        logger.info(f"Pronunciation database rebuilt from the formulary with {len(self.pronunciation_db)} drugs")
+    
+    def _sync_custom_pronunciations(self):
+        """Load custom pronunciations other instances or workers stored since the last sync"""
+        version = self.store.version()
+        if version is None or version == self._store_version:
+            return
+        
+        for custom_id, generic_name, variant in self.store.load(self._custom_loaded_id):
+            self._apply_custom_pronunciation(generic_name, [variant])
+            self._custom_loaded_id = custom_id
+        self._store_version = version
+    
+    def _index_variants(self):
+        """Compile every variant into the scanner and phonetic code index, in database order"""
+        self._scanner = VariantScanner()
+        self._variant_codes = {}
+        for drug_order, (generic_name, data) in enumerate(self.pronunciation_db.items()):
+            self._index_drug_variants(drug_order, generic_name, data.pronunciation_variants)
+        
+        for pattern_order, (pattern, correct_name) in enumerate(self.multi_word_patterns.items()):
+            self._scanner.add(pattern, VariantHit(-1, pattern_order, correct_name, pattern, split_name=True))
+    
+    def _index_drug_variants(self, drug_order: int, generic_name: str, variants: List[str], first_variant: int = 0):
+        """Add a drug's variants from first_variant on; the generic name itself is only phonetically coded"""
+        names = ([generic_name] if first_variant == 0 else []) + variants[first_variant:]
+        for name in names:
+            code = flemish_phonetic_code(name)
+            if len(code) >= MIN_PHONETIC_CODE_LENGTH:
+                self._variant_codes.setdefault(code, []).append((generic_name, name))
+        
+        for variant_order in range(first_variant, len(variants)):
+            variant = variants[variant_order]
+            self._scanner.add(variant.lower(), VariantHit(drug_order, variant_order, generic_name, variant))
     
     def _create_phonetic_pattern(self, drug_name: str) -> str:
         """Create phonetic pattern for drug name"""
-        # Simplify to phonetic representation
-        phonetic = drug_name.lower()
-        
-        # Apply Belgian pronunciation rules
-        phonetic = re.sub(r'ph', 'f', phonetic)
-        phonetic = re.sub(r'th', 't', phonetic)
-        phonetic = re.sub(r'ch', 'k', phonetic)
-        phonetic = re.sub(r'qu', 'k', phonetic)
-        phonetic = re.sub(r'x', 'ks', phonetic)
-        phonetic = re.sub(r'c([ei])', r'z\1', phonetic)  # c before e/i becomes z
-        
-        return phonetic
+        return flemish_phonetic_code(drug_name)
     
     def find_drug_by_pronunciation(self, spoken_text: str, context: str = "") -> List[Dict]:
         """Find drugs based on how they might be pronounced"""
         spoken_text = spoken_text.lower().strip()
-        matches = []
         
-        for generic_name, pronunciation_data in self.pronunciation_db.items():
-            # Check exact matches first
-            for variant in pronunciation_data.pronunciation_variants:
-                if variant.lower() in spoken_text:
-                    confidence = self._calculate_confidence(spoken_text, variant, context, generic_name)
-                    matches.append({
-                        'generic_name': generic_name,
-                        'matched_variant': variant,
-                        'confidence': confidence,
-                        'match_type': 'exact'
-                    })
-            
-            # Check phonetic similarity
-            phonetic_score = self._phonetic_similarity(spoken_text, pronunciation_data.phonetic_pattern)
-            if phonetic_score > 0.7:
-                confidence = phonetic_score * self._get_context_boost(generic_name, context)
-                matches.append({
-                    'generic_name': generic_name,
-                    'matched_variant': pronunciation_data.phonetic_pattern,
-                    'confidence': confidence,
-                    'match_type': 'phonetic'
-                })
+        # Check exact matches first: every variant occurring in the text, from one scan
+        variant_hits = {
+            hit for _, _, _, hits in self._scanner.scan(spoken_text) for hit in hits if not hit.split_name
+        }
+        return self._rank_pronunciation_matches(spoken_text, variant_hits, context)
+    
+    def _rank_pronunciation_matches(self, spoken_text: str, variant_hits: Iterable[VariantHit], context: str) -> List[Dict]:
+        """Score exact variant hits and phonetic matches for a spoken text, best first"""
+        candidates = self._pronunciation_candidates(spoken_text, variant_hits)
+        boosts = [self._get_context_boost(candidate['generic_name'], context) for candidate in candidates]
+        
+        matches = []
+        for candidate, boost in zip(candidates, boosts):
+            matches.append({
+                'generic_name': candidate['generic_name'],
+                'matched_variant': candidate['matched_variant'],
+                'confidence': self._boosted_confidence(candidate, boost),
+                'match_type': candidate['match_type']
+            })
         
         # Sort by confidence and return top matches
         matches.sort(key=lambda x: x['confidence'], reverse=True)
         return matches[:5]  # Return top 5 matches
     
-    def _calculate_confidence(self, spoken_text: str, variant: str, context: str, generic_name: str) -> float:
-        """Calculate confidence score for drug match"""
+    def _pronunciation_candidates(self, spoken_text: str, variant_hits: Iterable[VariantHit]) -> List[Dict]:
+        """Candidate drugs for a spoken text with their confidence before the context boost"""
+        candidates = []
+        
+        for hit in sorted(variant_hits):
+            base_confidence, length_factor = self._calculate_confidence(spoken_text, hit.variant)
+            candidates.append({
+                'generic_name': hit.generic_name,
+                'matched_variant': hit.variant,
+                'base_confidence': base_confidence,
+                'length_factor': length_factor,
+                'match_type': 'exact'
+            })
+        
+        # Sound-alike lookup by phonetic code: variants first, then every indexed drug and brand
+        phonetic_drugs = set()
+        code_hits = self._variant_codes.get(flemish_phonetic_code(spoken_text), []) + [
+            (entry.generic_name, entry.name) for entry in self.drug_index.lookup_phonetic_code(spoken_text)
+        ]
+        for generic_name, variant in code_hits:
+            if generic_name in phonetic_drugs:
+                continue
+            phonetic_drugs.add(generic_name)
+            
+            candidates.append({
+                'generic_name': generic_name,
+                'matched_variant': variant,
+                'base_confidence': self.phonetic_code_confidence,
+                'length_factor': 1.0,
+                'match_type': 'phonetic'
+            })
+        
+        # Fuzzy phonetic similarity only when no code matched (best match per drug)
+        fuzzy_hits = [] if phonetic_drugs else self.drug_index.search_phonetic(spoken_text, 0.7)
+        for entry, phonetic_pattern, phonetic_score in fuzzy_hits:
+            if entry.generic_name in phonetic_drugs:
+                continue
+            phonetic_drugs.add(entry.generic_name)
+            
+            candidates.append({
+                'generic_name': entry.generic_name,
+                'matched_variant': phonetic_pattern,
+                'base_confidence': phonetic_score,
+                'length_factor': 1.0,
+                'match_type': 'phonetic'
+            })
+        
+        return candidates
+    
+    def _boosted_confidence(self, candidate: Dict, context_boost: float) -> float:
+        """Final confidence of a candidate; exact variant matches are capped at 1.0"""
+        confidence = candidate['base_confidence'] * context_boost * candidate['length_factor']
+        return min(confidence, 1.0) if candidate['match_type'] == 'exact' else confidence
+    
+    def _calculate_confidence(self, spoken_text: str, variant: str) -> Tuple[float, float]:
+        """Calculate confidence score for drug match, as (base confidence, length factor) before the context boost"""
         base_confidence = 0.8
         
         # Exact match bonus
@@ -253,113 +313,113 @@ class BelgianDrugPronunciation:
         elif variant.lower() in spoken_text.lower():
             base_confidence = 0.85
         
-        # Context boost
-        context_boost = self._get_context_boost(generic_name, context)
-        
         # Length similarity
         length_similarity = 1 - abs(len(variant) - len(spoken_text)) / max(len(variant), len(spoken_text))
         
-        return min(base_confidence * context_boost * (0.7 + 0.3 * length_similarity), 1.0)
+        return base_confidence, 0.7 + 0.3 * length_similarity
+    
+    def _build_context_features(self):
+        """Precompute the context keywords and, per drug, the boost each keyword adds"""
+        keyword_weights = [(condition, drugs, 0.3) for condition, drugs in self.condition_drug_mapping.items()]
+        keyword_weights += [(dept, drugs, 0.2) for dept, drugs in self.department_drug_mapping.items()]
+        
+        self._context_keywords = [keyword for keyword, _, _ in keyword_weights]
+        self._boost_drugs = {}
+        for _, drugs, _ in keyword_weights:
+            for drug in drugs:
+                self._boost_drugs.setdefault(drug, len(self._boost_drugs))
+        
+        # Row per drug, column per keyword: the boost the keyword adds for that drug
+        self._boost_masks = np.zeros((len(self._boost_drugs), len(self._context_keywords)))
+        for column, (_, drugs, weight) in enumerate(keyword_weights):
+            for drug in drugs:
+                self._boost_masks[self._boost_drugs[drug], column] = weight
+    
+    def _context_features(self, text: str) -> np.ndarray:
+        """Which context keywords occur in a lowercase text"""
+        return np.array([keyword in text for keyword in self._context_keywords], dtype=float)
     
     def _get_context_boost(self, generic_name: str, context: str) -> float:
         """Get context-based confidence boost"""
-        if not context:
+        if not context or generic_name not in self._boost_drugs:
             return 1.0
         
-        context_lower = context.lower()
-        
-        # Medical condition context mapping
-        condition_drug_mapping = {
-            'hypertensie': ['bisoprolol', 'atenolol', 'metoprolol', 'amlodipine', 'enalapril', 'losartan'],
-            'hartfalen': ['bisoprolol', 'carvedilol', 'enalapril', 'furosemide', 'spironolactone'],
-            'diabetes': ['metformin', 'gliclazide', 'insulin'],
-            'cholesterol': ['atorvastatin', 'simvastatin', 'rosuvastatin'],
-            'angina': ['bisoprolol', 'metoprolol', 'amlodipine', 'isosorbide'],
-            'aritmie': ['metoprolol', 'propranolol', 'sotalol', 'amiodarone'],
-            'anticoagulatie': ['warfarin', 'rivaroxaban', 'apixaban', 'dabigatran'],
-            'pijn': ['paracetamol', 'ibuprofen', 'diclofenac', 'tramadol'],
-            'infectie': ['amoxicillin', 'azithromycin', 'ciprofloxacin']
-        }
-        
-        boost = 1.0
-        for condition, drugs in condition_drug_mapping.items():
-            if condition in context_lower and generic_name in drugs:
-                boost += 0.3
-        
-        # Department context
-        department_drug_mapping = {
-            'cardiologie': ['bisoprolol', 'metoprolol', 'atorvastatin', 'clopidogrel', 'warfarin'],
-            'interne': ['metformin', 'furosemide', 'enalapril', 'amlodipine'],
-            'pneumologie': ['salbutamol', 'budesonide', 'theophylline'],
-            'neurologie': ['levodopa', 'gabapentin', 'phenytoin']
-        }
-        
-        for dept, drugs in department_drug_mapping.items():
-            if dept in context_lower and generic_name in drugs:
-                boost += 0.2
-        
+        boost = 1.0 + float(self._boost_masks[self._boost_drugs[generic_name]] @ self._context_features(context.lower()))
         return min(boost, 2.0)  # Cap at 2x boost
     
-    def _phonetic_similarity(self, text1: str, text2: str) -> float:
-        """Calculate phonetic similarity between two texts"""
-        # Simple phonetic similarity based on character patterns
-        text1 = re.sub(r'[^a-z]', '', text1.lower())
-        text2 = re.sub(r'[^a-z]', '', text2.lower())
+    def _window_context_boosts(self, document: TranscriptDocument, medical_context: str) -> np.ndarray:
+        """Boost of every drug for every token, from the keywords within context_radius tokens or the medical context"""
+        word_features = {}
+        token_features = np.zeros((len(document), len(self._context_keywords)))
+        for index, word in enumerate(document.normalized_words):
+            if word not in word_features:
+                word_features[word] = self._context_features(word)
+            token_features[index] = word_features[word]
         
-        if not text1 or not text2:
-            return 0.0
+        # Keyword counts per sliding window, from prefix sums over the tokens
+        prefix = np.vstack([np.zeros((1, len(self._context_keywords))), np.cumsum(token_features, axis=0)])
+        positions = np.arange(len(document))
+        window_end = np.minimum(positions + self.context_radius + 1, len(document))
+        window_start = np.maximum(positions - self.context_radius, 0)
+        window_features = (prefix[window_end] - prefix[window_start]) > 0
+        window_features |= self._context_features(medical_context.lower()) > 0
         
-        # Calculate Levenshtein distance
-        distance = self._levenshtein_distance(text1, text2)
-        max_len = max(len(text1), len(text2))
-        
-        return 1 - (distance / max_len)
-    
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
-        """Calculate Levenshtein distance between two strings"""
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-        
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = list(range(len(s2) + 1))
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
+        return np.minimum(1.0 + window_features.astype(float) @ self._boost_masks.T, 2.0)
     
-    def enhance_drug_recognition(self, transcript: str, medical_context: str = "") -> Dict:
+    def enhance_drug_recognition(self, transcript: str, medical_context: str = "",
+                                 document: Optional[TranscriptDocument] = None,
+                                 regions: Optional[List[Tuple[int, int]]] = None) -> Dict:
         """Enhance drug recognition in transcript using Belgian pronunciation patterns"""
         try:
-            enhanced_transcript = transcript
+            if document is None:
+                document = build_transcript_document(transcript)
+            
+            self._sync_formulary()
+            self._sync_custom_pronunciations()
+            self.drug_index.refresh()
+            
+            edit_proposals = []
             drug_corrections = []
             
-            # Split transcript into words for analysis
-            words = re.findall(r'\b\w+\b', transcript.lower())
+            # One scan of the whole transcript finds every single- and multi-word variant
+            token_hits, multi_word_hits = self._scan_document(document)
+            
+            # Context boosts for every token at once; candidates depend only on the word
+            context_boosts = self._window_context_boosts(document, medical_context)
+            word_candidates = {}
             
             # Look for potential drug mentions
-            for i, word in enumerate(words):
-                # Get context around the word
-                context_start = max(0, i - 5)
-                context_end = min(len(words), i + 6)
-                local_context = ' '.join(words[context_start:context_end])
+            for index in document.token_indices(regions):
+                token = document.tokens[index]
+                word = token.normalized
                 
                 # Find potential drug matches
-                matches = self.find_drug_by_pronunciation(word, medical_context + " " + local_context)
+                if word not in word_candidates:
+                    candidates = self._pronunciation_candidates(word, token_hits.get(index, ()))
+                    rows = np.array([self._boost_drugs.get(candidate['generic_name'], -1) for candidate in candidates], dtype=int)
+                    word_candidates[word] = (candidates, rows)
+                candidates, rows = word_candidates[word]
+                if not candidates:
+                    continue
                 
-                if matches and matches[0]['confidence'] > 0.7:
-                    best_match = matches[0]
+                boosts = np.where(rows >= 0, context_boosts[index, rows], 1.0)
+                confidences = [self._boosted_confidence(candidate, float(boost))
+                               for candidate, boost in zip(candidates, boosts)]
+                best = int(np.argmax(confidences))
+                
+                if confidences[best] > 0.7:
+                    best_match = dict(candidates[best], confidence=confidences[best])
+                    local_context = document.context_words(token.index, self.context_radius, self.context_radius)
                     
-                    # Replace in transcript
-                    pattern = re.compile(re.escape(word), re.IGNORECASE)
-                    enhanced_transcript = pattern.sub(best_match['generic_name'], enhanced_transcript, count=1)
+                    edit_proposals.append(EditProposal(
+                        offset=token.start,
+                        length=token.end - token.start,
+                        replacement=best_match['generic_name'],
+                        confidence=min(best_match['confidence'], 1.0),
+                        agent='Belgian Pronunciation',
+                        original=token.text,
+                        reason=f"{best_match['match_type']} match on '{best_match['matched_variant']}'"
+                    ))
                     
                     drug_corrections.append({
                         'original': word,
@@ -370,12 +430,19 @@ class BelgianDrugPronunciation:
                     })
             
             # Look for multi-word drug names
-            enhanced_transcript, multi_word_corrections = self._find_multi_word_drugs(enhanced_transcript, medical_context)
+            multi_word_proposals, multi_word_corrections = self._find_multi_word_drugs(
+                document, multi_word_hits, medical_context, regions
+            )
+            edit_proposals.extend(multi_word_proposals)
             drug_corrections.extend(multi_word_corrections)
             
+            # Apply all replacements in a single pass at their offsets
+            enhanced_transcript = apply_edits(transcript, edit_proposals).text
+            
             return {
                 'enhanced_transcript': enhanced_transcript,
                 'drug_corrections': drug_corrections,
+                'edit_proposals': [proposal.to_dict() for proposal in edit_proposals],
                 'enhancement_applied': len(drug_corrections) > 0
             }
             
@@ -384,47 +451,81 @@ class BelgianDrugPronunciation:
             return {
                 'enhanced_transcript': transcript,
                 'drug_corrections': [],
+                'edit_proposals': [],
                 'enhancement_applied': False,
                 'error': str(e)
             }
     
-    def _find_multi_word_drugs(self, transcript: str, context: str) -> Tuple[str, List[Dict]]:
+    def _scan_document(self, document: TranscriptDocument) -> Tuple[Dict[int, set], List[Tuple[int, int, VariantHit]]]:
+        """Scan the transcript once; split hits into variants inside one token and variants spanning whole tokens"""
+        token_hits: Dict[int, set] = {}
+        multi_word_hits = []
+        
+        for start, end, _, hits in self._scanner.scan(document.normalized_text):
+            first = document.token_at(start)
+            if first is None:
+                continue
+            
+            if end <= first.end:
+                token_hits.setdefault(first.index, set()).update(hit for hit in hits if not hit.split_name)
+                continue
+            
+            last = document.token_at(end - 1)
+            if first.start == start and last is not None and last.end == end:
+                multi_word_hits.extend((start, end, hit) for hit in hits)
+        
+        return token_hits, multi_word_hits
+    
+    def _find_multi_word_drugs(self, document: TranscriptDocument, multi_word_hits: List[Tuple[int, int, VariantHit]],
+                               context: str, regions: Optional[List[Tuple[int, int]]] = None) -> Tuple[List[EditProposal], List[Dict]]:
         """Find multi-word drug names that might be split in speech"""
+        proposals = []
         corrections = []
-        enhanced = transcript
-        
-        # Common multi-word patterns in Belgian medical speech
-        multi_word_patterns = {
-            'acetyl salicyl': 'acetylsalicylic acid',
-            'hydrochloro thiazide': 'hydrochlorothiazide',
-            'spirono lactone': 'spironolactone',
-            'metro prolol': 'metoprolol',
-            'biso prolol': 'bisoprolol',
-            'carve dilol': 'carvedilol',
-            'ator vastatin': 'atorvastatin',
-            'simva statin': 'simvastatin',
-            'rosu vastatin': 'rosuvastatin'
-        }
         
-        for pattern, correct_name in multi_word_patterns.items():
-            if pattern in transcript.lower():
-                # Calculate confidence based on context
-                confidence = 0.8 * self._get_context_boost(correct_name, context)
-                
-                if confidence > 0.6:
-                    enhanced = re.sub(pattern, correct_name, enhanced, flags=re.IGNORECASE)
-                    corrections.append({
-                        'original': pattern,
-                        'corrected': correct_name,
-                        'confidence': confidence,
-                        'match_type': 'multi_word',
-                        'context': context
-                    })
+        # Spans per split name, in transcript order; a variant that starts with its own
+        # generic name ('bisoprolol eg', 'metoprolol succinate') is not a split name
+        spans_by_pattern: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        for start, end, hit in multi_word_hits:
+            if not hit.split_name and hit.variant.lower().split()[0] == hit.generic_name.split()[0]:
+                continue
+            if not document.span_in_regions(start, end, regions):
+                continue
+            spans = spans_by_pattern.setdefault((hit.variant.lower(), hit.generic_name), [])
+            if (start, end) not in spans:
+                spans.append((start, end))
         
-        return enhanced, corrections
+        proposed = set()
+        for (pattern, correct_name), spans in spans_by_pattern.items():
+            # Calculate confidence based on context
+            confidence = 0.8 * self._get_context_boost(correct_name, context)
+            spans = [span for span in spans if (span, correct_name) not in proposed]
+            
+            if spans and confidence > 0.6:
+                for start, end in spans:
+                    proposed.add(((start, end), correct_name))
+                    proposals.append(EditProposal(
+                        offset=start,
+                        length=end - start,
+                        replacement=correct_name,
+                        confidence=min(confidence, 1.0),
+                        agent='Belgian Pronunciation',
+                        original=document.text[start:end],
+                        reason=f"Split drug name '{pattern}'"
+                    ))
+                corrections.append({
+                    'original': pattern,
+                    'corrected': correct_name,
+                    'confidence': confidence,
+                    'match_type': 'multi_word',
+                    'context': context
+                })
+        
+        return proposals, corrections
     
     def get_drug_context_suggestions(self, partial_drug: str, medical_context: str) -> List[Dict]:
         """Get drug suggestions based on partial input and medical context"""
+        self._sync_formulary()
+        self._sync_custom_pronunciations()
         suggestions = []
         
         # Find matches
@@ -442,13 +543,31 @@ class BelgianDrugPronunciation:
         return suggestions
     
     def add_custom_pronunciation(self, generic_name: str, pronunciation_variants: List[str]):
-        """Add custom pronunciation variants for a drug"""
+        """Add custom pronunciation variants for a drug, shared with every instance using the same database"""
+        if self.store.add(generic_name, pronunciation_variants) is None:
+            # Database unavailable: keep the variants for this instance only
+            self._apply_custom_pronunciation(generic_name, pronunciation_variants)
+            return
+        
+        # Picks up the new variants along with any stored concurrently by other workers
+        self._sync_custom_pronunciations()
+        self._save_snapshot()
+    
+    def _apply_custom_pronunciation(self, generic_name: str, pronunciation_variants: List[str]):
+        """Add variants to the in-memory database and matcher, skipping ones the drug already has"""
         if generic_name not in self.belgian_patterns:
             self.belgian_patterns[generic_name] = []
         
-        self.belgian_patterns[generic_name].extend(pronunciation_variants)
+        known = set(self.belgian_patterns[generic_name])
+        new_variants = [variant for variant in dict.fromkeys(pronunciation_variants) if variant not in known]
+        if not new_variants and generic_name in self.pronunciation_db:
+            return
+        
+        first_variant = len(self.belgian_patterns[generic_name])
+        self.belgian_patterns[generic_name].extend(new_variants)
         
         # Update pronunciation database
+        is_new_drug = generic_name not in self.pronunciation_db
         self.pronunciation_db[generic_name] = PronunciationVariant(
             original_name=generic_name,
             pronunciation_variants=self.belgian_patterns[generic_name],
@@ -456,6 +575,13 @@ class BelgianDrugPronunciation:
             language='mixed',
             confidence=0.8
         )
+        
+        # Only the new variants go into the scanner; it relinks itself before the next scan
+        drug_order = list(self.pronunciation_db).index(generic_name)
+        self._index_drug_variants(drug_order, generic_name, self.belgian_patterns[generic_name],
+                                  first_variant=0 if is_new_drug else first_variant)
+        self.drug_index.add_names([generic_name], source='pronunciation')
+        self._data_version = None
     
     def get_pronunciation_stats(self) -> Dict:
         """Get statistics about the pronunciation database"""
@@ -105,7 +105,8 @@ Please respond with a JSON object containing:
     "suggestions": [
         {{
             "issue": "description of what needs to be fixed",
-            "correction": "specific correction to apply",
+            "original": "the exact words in the report content this correction replaces, copied verbatim; empty if it replaces no specific words",
+            "correction": "specific correction to apply; when original is given, the text that replaces it",
             "rationale": "medical reasoning for this correction"
         }}
     ],
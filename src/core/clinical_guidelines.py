@@ -0,0 +1,130 @@
+"""
+Clinical Guidelines
+Belgian prescribing guidelines, interactions, contraindications, dosages and monitoring
+kept in a versioned data file and compiled into a binary snapshot: the snapshot is
+written once (at build time, or by the first worker) and each process loads it once,
+so a new drug selector costs nothing to set up
+"""
+
+import os
+import json
+import marshal
+import hashlib
+import logging
+import tempfile
+import threading
+import importlib.util
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Data file shipped with the application; bump its revision when the guidelines change
+GUIDELINES_FILE = os.path.join(os.path.dirname(__file__), 'data', 'clinical_guidelines.json')
+GUIDELINES_CACHE_ENV = 'CLINICAL_GUIDELINES_CACHE'
+
+# File layout: magic, then a marshal of plain containers with drug lists as frozensets
+GUIDELINES_MAGIC = b'CLGUID01'
+
+# marshal is only stable within one interpreter version, so the snapshot name covers it
+SNAPSHOT_FORMAT = f"marshal{marshal.version}-{importlib.util.MAGIC_NUMBER.hex()}".encode()
+
+def _index(data: Dict[str, Any]) -> Dict[str, Any]:
+    """The compiled state: lists only tested for membership become frozensets"""
+    return {
+        'revision': int(data.get('revision', 0)),
+        'guidelines': data.get('guidelines', {}),
+        'interactions': data.get('interactions', {}),
+        'contraindications': data.get('contraindications', {}),
+        'dosages': data.get('dosages', {}),
+        'monitoring': data.get('monitoring', {}),
+        'elderly_preferred': frozenset(data.get('elderly_preferred', [])),
+        'elderly_safe': frozenset(data.get('elderly_safe', [])),
+        'department_drugs': {dept: frozenset(drugs) for dept, drugs in data.get('department_drugs', {}).items()},
+        'department_standard': {dept: frozenset(drugs) for dept, drugs in data.get('department_standard', {}).items()},
+        'alternatives': data.get('alternatives', {})
+    }
+
+def compile_guidelines(source: str, path: str) -> int:
+    """Write the compiled snapshot of a guideline data file; returns its revision.
+
+    The file is written next to its destination and renamed into place, so workers
+    compiling the same guidelines at once never see a partial file.
+    """
+    with open(source, encoding='utf-8') as data_file:
+        state = _index(json.load(data_file))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            output.write(GUIDELINES_MAGIC)
+            output.write(marshal.dumps(state))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return state['revision']
+
+class ClinicalGuidelines:
+    """Read-only clinical tables of one guideline revision, shared by every selector"""
+
+    def __init__(self, state: Dict[str, Any], fingerprint: str = ''):
+        self.fingerprint = fingerprint
+        self.revision: int = state['revision']
+        self.guidelines: Dict[str, Dict] = state['guidelines']
+        self.interactions: Dict[str, Dict] = state['interactions']
+        self.contraindications: Dict[str, List[str]] = state['contraindications']
+        self.dosages: Dict[str, Dict[str, str]] = state['dosages']
+        self.monitoring: Dict[str, List[str]] = state['monitoring']
+        self.elderly_preferred: frozenset = state['elderly_preferred']    # raise confidence in the elderly
+        self.elderly_safe: frozenset = state['elderly_safe']              # worth saying so in the reasoning
+        self.department_drugs: Dict[str, frozenset] = state['department_drugs']
+        self.department_standard: Dict[str, frozenset] = state['department_standard']
+        self.alternatives: Dict[str, List[Dict[str, str]]] = state['alternatives']
+
+def _read_snapshot(path: str, fingerprint: str) -> ClinicalGuidelines:
+    with open(path, 'rb') as snapshot:
+        data = snapshot.read()
+    if not data.startswith(GUIDELINES_MAGIC):
+        raise ValueError(f"Not a clinical guidelines file: {path}")
+    return ClinicalGuidelines(marshal.loads(data[len(GUIDELINES_MAGIC):]), fingerprint)
+
+def load_clinical_guidelines(source: str = GUIDELINES_FILE, cache_dir: Optional[str] = None) -> ClinicalGuidelines:
+    """Load the snapshot of a guideline data file, compiling it first if no worker has yet.
+
+    The snapshot is named after a hash of the data file and the interpreter's marshal
+    format, so editing the file or upgrading Python produces a new snapshot instead of
+    reading a stale one. A snapshot that cannot be read is compiled again; if that fails
+    too, the data file itself is loaded.
+    """
+    with open(source, 'rb') as data_file:
+        fingerprint = hashlib.sha1(GUIDELINES_MAGIC + SNAPSHOT_FORMAT + data_file.read()).hexdigest()
+
+    cache_dir = cache_dir or os.environ.get(GUIDELINES_CACHE_ENV) or tempfile.gettempdir()
+    path = os.path.join(cache_dir, f"clinical_guidelines_{fingerprint[:16]}.bin")
+    if os.path.exists(path):
+        try:
+            return _read_snapshot(path, fingerprint)
+        except Exception as e:
+            logger.warning(f"Recompiling unreadable clinical guidelines snapshot {path}: {e}")
+
+    try:
+        revision = compile_guidelines(source, path)
+        logger.info(f"Compiled clinical guidelines revision {revision} to {path}")
+        return _read_snapshot(path, fingerprint)
+    except Exception as e:
+        logger.error(f"Clinical guidelines snapshot unavailable, loading {source}: {e}")
+        with open(source, encoding='utf-8') as data_file:
+            return ClinicalGuidelines(_index(json.load(data_file)), fingerprint)
+
+# Global instance, shared by every selector in the process
+_clinical_guidelines: Optional[ClinicalGuidelines] = None
+_clinical_guidelines_lock = threading.Lock()
+
+def get_clinical_guidelines() -> ClinicalGuidelines:
+    """Get or load the shared clinical guidelines"""
+    global _clinical_guidelines
+    with _clinical_guidelines_lock:
+        if _clinical_guidelines is None:
+            _clinical_guidelines = load_clinical_guidelines()
+        return _clinical_guidelines
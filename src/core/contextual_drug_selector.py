@@ -5,13 +5,69 @@ Intelligently selects the correct drug based on medical context, patient history
 
 import re
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from dataclasses import dataclass
 import sqlite3
 from datetime import datetime
 
+from .agent_cache import AgentResultCache
+from .clinical_guidelines import get_clinical_guidelines
+from .formulary import get_formulary
+from .interaction_graph import InteractionGraph, RegimenCheck, SEVERITY_MAJOR
+
 logger = logging.getLogger(__name__)
 
+# Prescription context keywords, matched as whole words in the lowercase transcript
+CONDITION_KEYWORDS = {
+    'hypertensie': ['hypertensie', 'hoge bloeddruk', 'hypertension'],
+    'hartfalen': ['hartfalen', 'heart failure', 'decompensatie'],
+    'diabetes': ['diabetes', 'suikerziekte', 'dm type'],
+    'angina': ['angina', 'pijn op de borst', 'chest pain'],
+    'aritmie': ['aritmie', 'fibrillatie', 'tachycardie', 'bradycardie'],
+    'infectie': ['infectie', 'koorts', 'antibiotica'],
+    'pijn': ['pijn', 'pain', 'analgesie']
+}
+
+# Age groups and severities in order of precedence; unmatched transcripts get the default
+AGE_GROUP_KEYWORDS = {
+    'elderly': ['ouder', 'elderly', 'geriatrisch', '80', '90'],
+    'pediatric': ['kind', 'pediatr', 'jong']
+}
+DEFAULT_AGE_GROUP = 'adult'
+
+SEVERITY_KEYWORDS = {
+    'severe': ['ernstig', 'severe', 'acuut', 'emergency'],
+    'mild': ['mild', 'licht', 'stabiel']
+}
+DEFAULT_SEVERITY = 'moderate'
+
+URGENCY_KEYWORDS = {
+    'urgent': ['urgent', 'spoed', 'emergency', 'acuut']
+}
+DEFAULT_URGENCY = 'routine'
+
+CONTRAINDICATION_KEYWORDS = {
+    'asthma': ['astma', 'asthma', 'bronchospasme'],
+    'copd': ['copd', 'emphyseem', 'chronische bronchitis'],
+    'kidney_disease': ['nierinsufficiëntie', 'kidney', 'creatinine'],
+    'liver_disease': ['leverinsufficiëntie', 'liver', 'hepatisch'],
+    'pregnancy': ['zwanger', 'pregnancy', 'gravida']
+}
+
+# Phrases followed by a current medication, matched anywhere; no keyword may start with one
+MEDICATION_TRIGGERS = ['neemt al', 'gebruikt', 'op', 'krijgt']
+
+CONTEXT_KEYWORD_GROUPS = {
+    'condition': CONDITION_KEYWORDS,
+    'age_group': AGE_GROUP_KEYWORDS,
+    'severity': SEVERITY_KEYWORDS,
+    'urgency': URGENCY_KEYWORDS,
+    'contraindication': CONTRAINDICATION_KEYWORDS
+}
+
+# Recommendations kept for repeated selections, e.g. each feedback loop round
+SELECTION_CACHE_SIZE = 512
+
 @dataclass
 class DrugContext:
     """Context information for drug selection"""
@@ -24,6 +80,40 @@ class DrugContext:
     severity: str  # mild, moderate, severe
     urgency: str   # routine, urgent, emergency
 
+    def canonical(self) -> 'DrugContext':
+        """Equivalent context in canonical form.
+
+        Condition and department are only compared lowercase; the lists are sets of
+        lowercase names. Age group, severity and urgency are compared as-is.
+        """
+        def names(values: List[str]) -> List[str]:
+            return sorted({value.strip().lower() for value in values if value.strip()})
+
+        return DrugContext(
+            medical_condition=self.medical_condition.strip().lower(),
+            department=self.department.strip().lower(),
+            patient_age_group=self.patient_age_group,
+            contraindications=names(self.contraindications),
+            current_medications=names(self.current_medications),
+            allergies=names(self.allergies),
+            severity=self.severity,
+            urgency=self.urgency
+        )
+
+    def canonical_key(self) -> Tuple:
+        """Hashable key, equal for contexts that select the same drugs"""
+        return self.canonical()._fields()
+
+    def _fields(self) -> Tuple:
+        return (
+            self.medical_condition, self.department, self.patient_age_group,
+            tuple(self.contraindications), tuple(self.current_medications), tuple(self.allergies),
+            self.severity, self.urgency
+        )
+
+    def __hash__(self) -> int:
+        return hash(self.canonical_key())
+
 @dataclass
 class DrugRecommendation:
     """Drug recommendation with reasoning"""
@@ -36,161 +126,191 @@ class DrugRecommendation:
     dosage_suggestion: str
     monitoring_requirements: List[str]
 
+class PrescriptionContextScanner:
+    """Every context keyword and medication phrase in one regex, found in a single pass.
+
+    The regex is a lookahead tried at every position, so keywords inside or
+    overlapping other keywords are all found, as separate searches would find them.
+    """
+
+    def __init__(self):
+        keyword_features: Dict[str, Set[Tuple[str, str]]] = {}
+        for kind, groups in CONTEXT_KEYWORD_GROUPS.items():
+            for value, keywords in groups.items():
+                for keyword in keywords:
+                    keyword_features.setdefault(keyword, set()).add((kind, value))
+
+        # At a given position the longest keyword wins; it also stands for the shorter
+        # keywords it starts with ('pijn op de borst' is angina and pijn)
+        self._features = {
+            keyword: set().union(*(
+                features for other, features in keyword_features.items()
+                if re.match(rf'{re.escape(other)}\b', keyword)
+            ))
+            for keyword in keyword_features
+        }
+
+        keywords = '|'.join(re.escape(keyword) for keyword in sorted(self._features, key=len, reverse=True))
+        triggers = '|'.join(re.escape(trigger) for trigger in sorted(MEDICATION_TRIGGERS, key=len, reverse=True))
+        self._pattern = re.compile(
+            rf'(?=\b(?P<keyword>{keywords})\b|(?P<trigger>{triggers}) (?P<medication>\w+))'
+        )
+
+    def scan(self, text: str) -> Tuple[Set[Tuple[str, str]], List[str]]:
+        """Context features as (kind, value) pairs and current medications, from a lowercase text"""
+        features = set()
+        medications: Dict[str, List[str]] = {trigger: [] for trigger in MEDICATION_TRIGGERS}
+        trigger_end = dict.fromkeys(MEDICATION_TRIGGERS, 0)
+
+        for match in self._pattern.finditer(text):
+            keyword = match.group('keyword')
+            if keyword is not None:
+                features |= self._features[keyword]
+                continue
+
+            # Matches of the same trigger do not overlap, like re.findall
+            trigger = match.group('trigger')
+            if match.start() >= trigger_end[trigger]:
+                medications[trigger].append(match.group('medication'))
+                trigger_end[trigger] = match.end('medication')
+
+        return features, [medication for trigger in MEDICATION_TRIGGERS for medication in medications[trigger]]
+
+    def analyze(self, text: str) -> DrugContext:
+        """Prescription context of a transcript"""
+        features, current_meds = self.scan(text.lower())
+
+        def matched(kind: str, groups: Dict[str, List[str]]) -> List[str]:
+            return [value for value in groups if (kind, value) in features]
+
+        conditions = matched('condition', CONDITION_KEYWORDS)
+        age_group = next(iter(matched('age_group', AGE_GROUP_KEYWORDS)), DEFAULT_AGE_GROUP)
+        severity = next(iter(matched('severity', SEVERITY_KEYWORDS)), DEFAULT_SEVERITY)
+        urgency = next(iter(matched('urgency', URGENCY_KEYWORDS)), DEFAULT_URGENCY)
+
+        return DrugContext(
+            medical_condition=', '.join(conditions) if conditions else 'onbekend',
+            department='General',  # Would need to be passed from session
+            patient_age_group=age_group,
+            contraindications=matched('contraindication', CONTRAINDICATION_KEYWORDS),
+            current_medications=current_meds,
+            allergies=[],  # Would need to extract from transcript
+            severity=severity,
+            urgency=urgency
+        )
+
+# Compiled once, shared by every selector
+_context_scanner = PrescriptionContextScanner()
+
+def _copy_recommendations(recommendations: List[DrugRecommendation]) -> List[DrugRecommendation]:
+    """Copies of the recommendations and their lists, cheaper than a deepcopy"""
+    return [
+        DrugRecommendation(
+            rec.generic_name, list(rec.brand_names), rec.confidence, rec.reasoning,
+            list(rec.contraindication_warnings), list(rec.interaction_warnings),
+            rec.dosage_suggestion, list(rec.monitoring_requirements)
+        )
+        for rec in recommendations
+    ]
+
+# Shared by every selector, since the factory creates one per request; keys carry the formulary fingerprint
+_selection_cache = AgentResultCache(max_entries=SELECTION_CACHE_SIZE, copy_result=_copy_recommendations)
+
 class ContextualDrugSelector:
     """Intelligent drug selection based on medical context"""
     
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self.formulary = get_formulary()
+        self._formulary_fingerprint = None
+        self.formulary_drugs = {}
         self.clinical_guidelines = {}
-        self.drug_interactions = {}
-        self.contraindication_rules = {}
+        self.guideline_tiers = {}
+        self.interaction_graph = InteractionGraph()
         self._initialize_clinical_knowledge()
     
     def _initialize_clinical_knowledge(self):
         """Initialize clinical decision-making knowledge"""
         
-        # Belgian clinical guidelines for drug selection
-        self.clinical_guidelines = {
-            'hypertensie': {
-                'first_line': {
-                    'adult': ['amlodipine', 'enalapril', 'losartan', 'hydrochlorothiazide'],
-                    'elderly': ['amlodipine', 'enalapril', 'losartan'],  # Avoid thiazides in elderly
-                    'diabetes': ['enalapril', 'losartan', 'amlodipine'],  # ACE/ARB preferred
-                    'heart_failure': ['enalapril', 'bisoprolol', 'furosemide'],
-                    'kidney_disease': ['amlodipine', 'losartan']  # Avoid ACE if severe
-                },
-                'second_line': ['bisoprolol', 'metoprolol', 'spironolactone'],
-                'avoid_combinations': [
-                    ['enalapril', 'losartan'],  # Don't combine ACE + ARB
-                    ['spironolactone', 'enalapril']  # Monitor potassium
-                ]
-            },
-            
-            'hartfalen': {
-                'first_line': {
-                    'acute': ['furosemide', 'enalapril'],
-                    'chronic': ['bisoprolol', 'enalapril', 'spironolactone'],
-                    'severe': ['carvedilol', 'furosemide', 'spironolactone']
-                },
-                'contraindications': ['nifedipine', 'verapamil'],  # Negative inotropes
-                'monitoring': ['potassium', 'creatinine', 'blood_pressure']
-            },
-            
-            'diabetes': {
-                'first_line': {
-                    'type2_initial': ['metformin'],
-                    'type2_add_on': ['gliclazide', 'insulin'],
-                    'type1': ['insulin']
-                },
-                'cardiovascular_protection': ['enalapril', 'atorvastatin', 'acetylsalicylic acid'],
-                'avoid': ['thiazides_high_dose', 'beta_blockers_non_selective']
-            },
-            
-            'angina_pectoris': {
-                'first_line': ['bisoprolol', 'metoprolol', 'amlodipine'],
-                'second_line': ['isosorbide', 'nitroglycerin'],
-                'long_term': ['acetylsalicylic acid', 'atorvastatin']
-            },
-            
-            'aritmie': {
-                'atrial_fibrillation': {
-                    'rate_control': ['metoprolol', 'bisoprolol'],
-                    'rhythm_control': ['amiodarone', 'flecainide'],
-                    'anticoagulation': ['warfarin', 'rivaroxaban', 'apixaban']
-                },
-                'ventricular': ['amiodarone', 'lidocaine'],
-                'avoid': ['sotalol']  # Pro-arrhythmic
-            },
-            
-            'infectie': {
-                'respiratory': ['amoxicillin', 'azithromycin'],
-                'urinary': ['nitrofurantoin', 'ciprofloxacin'],
-                'skin': ['flucloxacillin', 'clindamycin'],
-                'severe': ['amoxicillin_clavulanate', 'ceftriaxone']
-            },
-            
-            'pijn': {
-                'mild': ['paracetamol'],
-                'moderate': ['ibuprofen', 'diclofenac'],
-                'severe': ['tramadol', 'morphine'],
-                'chronic': ['gabapentin', 'pregabalin'],
-                'neuropathic': ['gabapentin', 'amitriptyline']
-            }
-        }
+        # Dosages, monitoring and age/department preferences: the compiled guideline snapshot, loaded once per process
+        self.guidelines = get_clinical_guidelines()
         
-        # Drug interaction database
-        self.drug_interactions = {
-            'warfarin': {
-                'major': ['aspirin', 'clopidogrel', 'amiodarone'],
-                'moderate': ['atorvastatin', 'omeprazole'],
-                'monitoring': 'INR'
-            },
-            'enalapril': {
-                'major': ['spironolactone', 'potassium'],
-                'moderate': ['ibuprofen', 'diclofenac'],
-                'monitoring': 'potassium, creatinine'
-            },
-            'metformin': {
-                'major': ['contrast_agents'],
-                'moderate': ['furosemide'],
-                'monitoring': 'creatinine, lactate'
-            },
-            'digoxin': {
-                'major': ['amiodarone', 'verapamil', 'furosemide'],
-                'monitoring': 'digoxin_levels, potassium'
-            }
-        }
-        
-        # Contraindication rules
-        self.contraindication_rules = {
-            'asthma': ['propranolol', 'atenolol', 'metoprolol'],  # Non-selective beta-blockers
-            'copd': ['propranolol'],  # Non-selective beta-blockers
-            'heart_block': ['bisoprolol', 'metoprolol', 'verapamil'],
-            'kidney_disease': ['enalapril', 'lisinopril', 'metformin'],
-            'liver_disease': ['paracetamol', 'atorvastatin'],
-            'pregnancy': ['enalapril', 'losartan', 'warfarin', 'atorvastatin'],
-            'elderly': ['long_acting_benzodiazepines', 'tricyclic_antidepressants']
-        }
+        # Belgian clinical guidelines, brand names, interactions and contraindications come from the formulary
+        self._sync_formulary()
+    
+    def _sync_formulary(self):
+        """Take the clinical guidelines, brand names and interaction graph of the current formulary version"""
+        compiled = self.formulary.compiled()
+        if compiled.fingerprint == self._formulary_fingerprint:
+            return
+        self.clinical_guidelines = compiled.clinical_guidelines
+        self.guideline_tiers = compiled.guideline_tiers
+        self.formulary_drugs = compiled.drugs
+        self.interaction_graph = compiled.interactions
+        self._formulary_fingerprint = compiled.fingerprint
     
     def select_optimal_drug(self, 
                            condition: str, 
                            patient_context: DrugContext,
                            spoken_drug_candidates: List[str]) -> List[DrugRecommendation]:
-        """Select optimal drug based on condition and patient context"""
+        """Select optimal drug based on condition and patient context.
+
+        Recommendations are memoized on the condition, the canonical context, the
+        candidates and the formulary and guideline versions, so repeated calls with
+        the same inputs return copies of the earlier result.
+        """
         
         try:
-            recommendations = []
+            self._sync_formulary()
             condition_lower = condition.lower()
+            context = patient_context.canonical()
+            candidates = tuple(spoken_drug_candidates or ())
+            key = (condition_lower, context._fields(), candidates,
+                   self._formulary_fingerprint, self.guidelines.fingerprint)
             
-            # Get guideline-based recommendations
-            guideline_drugs = self._get_guideline_drugs(condition_lower, patient_context)
-            
-            # If specific drugs were mentioned, validate them
-            if spoken_drug_candidates:
-                for candidate in spoken_drug_candidates:
-                    recommendation = self._evaluate_drug_candidate(
-                        candidate, condition_lower, patient_context
-                    )
-                    if recommendation:
-                        recommendations.append(recommendation)
-            
-            # Add guideline-based recommendations
-            for drug in guideline_drugs:
-                if not any(rec.generic_name == drug for rec in recommendations):
-                    recommendation = self._create_guideline_recommendation(
-                        drug, condition_lower, patient_context
-                    )
-                    recommendations.append(recommendation)
-            
-            # Sort by confidence and clinical appropriateness
-            recommendations.sort(key=lambda x: x.confidence, reverse=True)
-            
-            return recommendations[:5]  # Return top 5 recommendations
+            recommendations, _ = _selection_cache.lookup(
+                key, lambda: self._select_optimal_drug(condition_lower, context, candidates)
+            )
+            return recommendations
             
         except Exception as e:
             logger.error(f"Drug selection error: {e}")
             return []
     
+    def _select_optimal_drug(self, condition: str, context: DrugContext,
+                             spoken_drug_candidates: Tuple[str, ...]) -> List[DrugRecommendation]:
+        """Uncached selection for a lowercase condition and canonical context"""
+        recommendations = []
+        
+        # Get guideline-based recommendations
+        guideline_drugs = self._get_guideline_drugs(condition, context)
+        
+        # If specific drugs were mentioned, validate them
+        for candidate in spoken_drug_candidates:
+            recommendation = self._evaluate_drug_candidate(candidate, condition, context)
+            if recommendation:
+                recommendations.append(recommendation)
+        
+        # Add guideline-based recommendations
+        for drug in guideline_drugs:
+            if not any(rec.generic_name == drug for rec in recommendations):
+                recommendation = self._create_guideline_recommendation(drug, condition, context)
+                recommendations.append(recommendation)
+        
+        # Sort by confidence and clinical appropriateness
+        recommendations.sort(key=lambda x: x.confidence, reverse=True)
+        
+        return recommendations[:5]  # Return top 5 recommendations
+    
+    def get_stats(self) -> Dict:
+        """Recommendation cache statistics, shared by all selectors"""
+        return _selection_cache.get_stats()
+    
+    def check_regimen(self, medications: List[str], contraindications: List[str] = ()) -> RegimenCheck:
+        """Every interacting pair in a medication list and every drug contraindicated in the patient, in one call"""
+        self._sync_formulary()
+        return self.interaction_graph.check_regimen(medications, contraindications)
+    
     def _get_guideline_drugs(self, condition: str, context: DrugContext) -> List[str]:
         """Get drugs recommended by clinical guidelines"""
         drugs = []
@@ -227,23 +347,18 @@ class ContextualDrugSelector:
         """Evaluate if a mentioned drug is appropriate for the condition"""
         
         # Check contraindications
-        contraindication_warnings = []
-        for contraindication in context.contraindications:
-            if contraindication.lower() in self.contraindication_rules:
-                if drug_name in self.contraindication_rules[contraindication.lower()]:
-                    contraindication_warnings.append(
-                        f"Contraindicated in {contraindication}"
-                    )
+        contraindication_warnings = [
+            f"Contraindicated in {contraindication}"
+            for contraindication in self.interaction_graph.contraindications_for(drug_name, context.contraindications)
+        ]
         
         # Check drug interactions
-        interaction_warnings = []
-        if drug_name in self.drug_interactions:
-            interactions = self.drug_interactions[drug_name]
-            for current_med in context.current_medications:
-                if current_med.lower() in [med.lower() for med in interactions.get('major', [])]:
-                    interaction_warnings.append(
-                        f"Major interaction with {current_med}"
-                    )
+        interaction_warnings = [
+            f"Major interaction with {current_med}"
+            for current_med in self.interaction_graph.interactions_with(
+                drug_name, context.current_medications, SEVERITY_MAJOR
+            )
+        ]
         
         # Calculate confidence
         confidence = self._calculate_clinical_confidence(drug_name, condition, context)
@@ -279,37 +394,22 @@ class ContextualDrugSelector:
         base_confidence = 0.5
         
         # Check if drug is in guidelines for this condition
-        if condition in self.clinical_guidelines:
-            guidelines = self.clinical_guidelines[condition]
-            
-            # First-line drug
-            first_line_drugs = []
-            if 'first_line' in guidelines:
-                for key, drugs in guidelines['first_line'].items():
-                    if isinstance(drugs, list):
-                        first_line_drugs.extend(drugs)
+        if condition in self.guideline_tiers:
+            first_line_drugs, second_line_drugs = self.guideline_tiers[condition]
             
             if drug_name in first_line_drugs:
                 base_confidence = 0.9
-            elif 'second_line' in guidelines and drug_name in guidelines['second_line']:
+            elif drug_name in second_line_drugs:
                 base_confidence = 0.7
         
         # Age appropriateness
         if context.patient_age_group == 'elderly':
-            elderly_appropriate = ['amlodipine', 'enalapril', 'losartan', 'bisoprolol']
-            if drug_name in elderly_appropriate:
+            if drug_name in self.guidelines.elderly_preferred:
                 base_confidence += 0.1
         
         # Department appropriateness
-        dept_drugs = {
-            'cardiologie': ['bisoprolol', 'metoprolol', 'atorvastatin', 'clopidogrel'],
-            'interne': ['metformin', 'enalapril', 'furosemide'],
-            'pneumologie': ['salbutamol', 'budesonide']
-        }
-        
-        if context.department.lower() in dept_drugs:
-            if drug_name in dept_drugs[context.department.lower()]:
-                base_confidence += 0.1
+        if drug_name in self.guidelines.department_drugs.get(context.department.lower(), ()):
+            base_confidence += 0.1
         
         return min(base_confidence, 1.0)
     
@@ -323,11 +423,9 @@ class ContextualDrugSelector:
         contraindications = []
         interactions = []
         
-        for contraindication in context.contraindications:
-            if contraindication.lower() in self.contraindication_rules:
-                if drug_name in self.contraindication_rules[contraindication.lower()]:
-                    contraindications.append(f"Contraindicated in {contraindication}")
-                    confidence *= 0.3
+        for contraindication in self.interaction_graph.contraindications_for(drug_name, context.contraindications):
+            contraindications.append(f"Contraindicated in {contraindication}")
+            confidence *= 0.3
         
         dosage = self._get_dosage_suggestion(drug_name, context)
         monitoring = self._get_monitoring_requirements(drug_name, context)
@@ -347,35 +445,9 @@ class ContextualDrugSelector:
         """Get dosage suggestion based on drug and patient context"""
         
         # Standard Belgian dosages
-        standard_dosages = {
-            'bisoprolol': {
-                'hypertensie': '5-10 mg 1x/dag',
-                'hartfalen': '1.25 mg 1x/dag, optitreren tot 10 mg',
-                'elderly': '2.5-5 mg 1x/dag'
-            },
-            'enalapril': {
-                'hypertensie': '5-10 mg 2x/dag',
-                'hartfalen': '2.5 mg 2x/dag, optitreren tot 20 mg 2x/dag',
-                'elderly': '2.5 mg 1x/dag'
-            },
-            'metformin': {
-                'diabetes': '500 mg 2x/dag bij maaltijd, optitreren tot 1000 mg 2x/dag',
-                'elderly': '500 mg 1x/dag'
-            },
-            'furosemide': {
-                'hartfalen': '20-40 mg 1x/dag ochtend',
-                'acute': '40-80 mg IV',
-                'elderly': '20 mg 1x/dag'
-            },
-            'atorvastatin': {
-                'cholesterol': '20 mg 1x/dag avond',
-                'high_risk': '40-80 mg 1x/dag avond'
-            }
-        }
+        dosage_info = self.guidelines.dosages.get(drug_name)
         
-        if drug_name in standard_dosages:
-            dosage_info = standard_dosages[drug_name]
-            
+        if dosage_info:
             # Age-based adjustment
             if context.patient_age_group == 'elderly' and 'elderly' in dosage_info:
                 return dosage_info['elderly']
@@ -386,43 +458,20 @@ class ContextualDrugSelector:
                     return dosage_info[condition_key]
             
             # Return first available dosage
-            return list(dosage_info.values())[0]
+            return next(iter(dosage_info.values()))
         
         return "Zie BCFI voor dosering"
     
     def _get_monitoring_requirements(self, drug_name: str, context: DrugContext) -> List[str]:
         """Get monitoring requirements for the drug"""
         
-        monitoring_requirements = {
-            'enalapril': ['Kalium', 'Creatinine', 'Bloeddruk'],
-            'losartan': ['Kalium', 'Creatinine', 'Bloeddruk'],
-            'furosemide': ['Kalium', 'Natrium', 'Creatinine'],
-            'spironolactone': ['Kalium', 'Creatinine'],
-            'warfarin': ['INR', 'Bloedingsrisico'],
-            'metformin': ['Creatinine', 'Lactaat', 'HbA1c'],
-            'atorvastatin': ['Leverenzymen', 'CK', 'Cholesterol'],
-            'digoxin': ['Digoxine spiegel', 'Kalium', 'Creatinine'],
-            'amiodarone': ['Schildklierfunctie', 'Leverenzymen', 'Longfunctie']
-        }
-        
-        return monitoring_requirements.get(drug_name, ['Klinische respons'])
+        return list(self.guidelines.monitoring.get(drug_name, ['Klinische respons']))
     
     def _get_brand_names(self, drug_name: str) -> List[str]:
         """Get common Belgian brand names for the drug"""
         
-        belgian_brands = {
-            'bisoprolol': ['Bisoprolol EG', 'Bisoprolol Sandoz', 'Bisoprolol Teva', 'Bisocard'],
-            'enalapril': ['Enalapril EG', 'Renitec', 'Enalapril Sandoz'],
-            'metformin': ['Metformin EG', 'Glucophage', 'Metformin Sandoz'],
-            'furosemide': ['Furosemide EG', 'Lasix', 'Furosemide Sandoz'],
-            'atorvastatin': ['Atorvastatin EG', 'Lipitor', 'Atorvastatin Sandoz'],
-            'amlodipine': ['Amlodipine EG', 'Norvasc', 'Amlodipine Sandoz'],
-            'losartan': ['Losartan EG', 'Cozaar', 'Losartan Sandoz'],
-            'paracetamol': ['Paracetamol EG', 'Dafalgan', 'Panadol'],
-            'ibuprofen': ['Ibuprofen EG', 'Brufen', 'Nurofen']
-        }
-        
-        return belgian_brands.get(drug_name, [f"{drug_name} EG", f"{drug_name} Sandoz"])
+        drug = self.formulary_drugs.get(drug_name)
+        return list(drug.brand_names if drug and drug.brand_names else [f"{drug_name} EG", f"{drug_name} Sandoz"])
     
     def _create_reasoning(self, drug_name: str, condition: str, context: DrugContext, confidence: float) -> str:
         """Create clinical reasoning for drug selection"""
@@ -430,31 +479,23 @@ class ContextualDrugSelector:
         reasons = []
         
         # Guideline-based reasoning
-        if condition in self.clinical_guidelines:
-            guidelines = self.clinical_guidelines[condition]
-            
-            first_line_drugs = []
-            if 'first_line' in guidelines:
-                for drugs in guidelines['first_line'].values():
-                    if isinstance(drugs, list):
-                        first_line_drugs.extend(drugs)
+        if condition in self.guideline_tiers:
+            first_line_drugs, second_line_drugs = self.guideline_tiers[condition]
             
             if drug_name in first_line_drugs:
                 reasons.append("Eerste keuze volgens Belgische richtlijnen")
-            elif 'second_line' in guidelines and drug_name in guidelines['second_line']:
+            elif drug_name in second_line_drugs:
                 reasons.append("Tweede keuze medicatie")
         
         # Patient-specific reasoning
         if context.patient_age_group == 'elderly':
-            elderly_safe = ['amlodipine', 'enalapril', 'losartan']
-            if drug_name in elderly_safe:
+            if drug_name in self.guidelines.elderly_safe:
                 reasons.append("Geschikt voor ouderen")
         
         # Department-specific reasoning
-        if context.department.lower() == 'cardiologie':
-            cardio_drugs = ['bisoprolol', 'atorvastatin', 'clopidogrel']
-            if drug_name in cardio_drugs:
-                reasons.append("Standaard in cardiologie")
+        department = context.department.lower()
+        if drug_name in self.guidelines.department_standard.get(department, ()):
+            reasons.append(f"Standaard in {department}")
         
         # Severity-based reasoning
         if context.severity == 'severe':
@@ -467,106 +508,16 @@ class ContextualDrugSelector:
     
     def analyze_prescription_context(self, transcript: str) -> DrugContext:
         """Analyze transcript to extract prescription context"""
-        
-        transcript_lower = transcript.lower()
-        
-        # Extract medical conditions
-        conditions = []
-        condition_patterns = {
-            'hypertensie': r'\b(hypertensie|hoge bloeddruk|hypertension)\b',
-            'hartfalen': r'\b(hartfalen|heart failure|decompensatie)\b',
-            'diabetes': r'\b(diabetes|suikerziekte|dm type)\b',
-            'angina': r'\b(angina|pijn op de borst|chest pain)\b',
-            'aritmie': r'\b(aritmie|fibrillatie|tachycardie|bradycardie)\b',
-            'infectie': r'\b(infectie|koorts|antibiotica)\b',
-            'pijn': r'\b(pijn|pain|analgesie)\b'
-        }
-        
-        for condition, pattern in condition_patterns.items():
-            if re.search(pattern, transcript_lower):
-                conditions.append(condition)
-        
-        # Extract age indicators
-        age_group = 'adult'  # default
-        if re.search(r'\b(ouder|elderly|geriatrisch|80|90)\b', transcript_lower):
-            age_group = 'elderly'
-        elif re.search(r'\b(kind|pediatr|jong)\b', transcript_lower):
-            age_group = 'pediatric'
-        
-        # Extract severity
-        severity = 'moderate'  # default
-        if re.search(r'\b(ernstig|severe|acuut|emergency)\b', transcript_lower):
-            severity = 'severe'
-        elif re.search(r'\b(mild|licht|stabiel)\b', transcript_lower):
-            severity = 'mild'
-        
-        # Extract urgency
-        urgency = 'routine'  # default
-        if re.search(r'\b(urgent|spoed|emergency|acuut)\b', transcript_lower):
-            urgency = 'urgent'
-        
-        # Extract contraindications
-        contraindications = []
-        contraindication_patterns = {
-            'asthma': r'\b(astma|asthma|bronchospasme)\b',
-            'copd': r'\b(copd|emphyseem|chronische bronchitis)\b',
-            'kidney_disease': r'\b(nierinsufficiëntie|kidney|creatinine)\b',
-            'liver_disease': r'\b(leverinsufficiëntie|liver|hepatisch)\b',
-            'pregnancy': r'\b(zwanger|pregnancy|gravida)\b'
-        }
-        
-        for contraindication, pattern in contraindication_patterns.items():
-            if re.search(pattern, transcript_lower):
-                contraindications.append(contraindication)
-        
-        # Extract current medications
-        current_meds = []
-        # This would need more sophisticated NLP to extract current medications
-        # For now, look for common patterns
-        med_patterns = [
-            r'neemt al (\w+)',
-            r'gebruikt (\w+)',
-            r'op (\w+)',
-            r'krijgt (\w+)'
-        ]
-        
-        for pattern in med_patterns:
-            matches = re.findall(pattern, transcript_lower)
-            current_meds.extend(matches)
-        
-        return DrugContext(
-            medical_condition=', '.join(conditions) if conditions else 'onbekend',
-            department='General',  # Would need to be passed from session
-            patient_age_group=age_group,
-            contraindications=contraindications,
-            current_medications=current_meds,
-            allergies=[],  # Would need to extract from transcript
-            severity=severity,
-            urgency=urgency
-        )
+        return _context_scanner.analyze(transcript)
+    
+    def analyze_many(self, transcripts: Iterable[str]) -> List[DrugContext]:
+        """Prescription context of each transcript in a backlog, in order"""
+        return [_context_scanner.analyze(transcript) for transcript in transcripts]
     
     def get_drug_alternatives(self, drug_name: str, reason: str = "") -> List[Dict]:
         """Get alternative drugs for a given drug"""
         
-        alternatives = {
-            'bisoprolol': [
-                {'name': 'metoprolol', 'reason': 'Andere cardioselectieve bètablokker'},
-                {'name': 'atenolol', 'reason': 'Alternatieve bètablokker'},
-                {'name': 'amlodipine', 'reason': 'Calciumantagonist als alternatief'}
-            ],
-            'enalapril': [
-                {'name': 'lisinopril', 'reason': 'Andere ACE-remmer'},
-                {'name': 'losartan', 'reason': 'ARB als alternatief'},
-                {'name': 'amlodipine', 'reason': 'Calciumantagonist'}
-            ],
-            'metformin': [
-                {'name': 'gliclazide', 'reason': 'Sulfonylureum als alternatief'},
-                {'name': 'sitagliptin', 'reason': 'DPP-4 remmer'},
-                {'name': 'insulin', 'reason': 'Bij onvoldoende controle'}
-            ]
-        }
-        
-        return alternatives.get(drug_name, [])
+        return [dict(alternative) for alternative in self.guidelines.alternatives.get(drug_name, [])]
 
 def get_contextual_drug_selector(db_path: str) -> ContextualDrugSelector:
     """Get or create the contextual drug selector"""
@@ -0,0 +1,259 @@
+"""
+Drug Fuzzy Index
+Character n-gram index over drug and brand names from the formulary, giving
+sub-linear top-k similarity lookups shared by the odd words detector and the Belgian
+pronunciation system
+"""
+
+import re
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+
+from .edit_distance import BitParallelPattern, similarity_bound
+from .formulary import KNOWLEDGE_DB_PATH, CompiledFormulary, get_formulary
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZE = 3
+NGRAM_PADDING = '$'
+
+def normalize_drug_name(name: str) -> str:
+    """Lowercase letters only, the form both agents compare on"""
+    return re.sub(r'[^a-z]', '', name.lower())
+
+def belgian_phonetic_key(name: str) -> str:
+    """Phonetic form of a drug name under Belgian pronunciation rules"""
+    phonetic = name.lower()
+    phonetic = re.sub(r'ph', 'f', phonetic)
+    phonetic = re.sub(r'th', 't', phonetic)
+    phonetic = re.sub(r'ch', 'k', phonetic)
+    phonetic = re.sub(r'qu', 'k', phonetic)
+    phonetic = re.sub(r'x', 'ks', phonetic)
+    phonetic = re.sub(r'c([ei])', r'z\1', phonetic)  # c before e/i becomes z
+    return phonetic
+
+# Spelling-to-sound rewrites for drug names as Flemish and French speakers say them,
+# applied in order; letters that sound alike end up as the same code letter
+PHONETIC_CODE_REWRITES = [
+    (r'sch', 'sk'),
+    (r'ph', 'f'),
+    (r'th', 't'),
+    (r'ch', 'k'),
+    (r'ck', 'k'),
+    (r'qu?', 'k'),
+    (r'kw', 'k'),
+    (r'x', 'ks'),
+    (r'c(?=[eiy])', 's'),
+    (r'c', 'k'),
+    (r'z', 's'),
+    (r'ow$', 'o'),             # English brand endings: asaflow
+    (r'[vw]', 'f'),            # Flemish devoicing: vastatin ~ fastatin
+    (r'eau|au', 'o'),
+    (r'oe|ou', 'u'),
+    (r'ij|ei|ey|ai|ay', 'e'),
+    (r'ie', 'i'),
+    (r'y', 'i'),
+    (r'h', ''),                # silent in French, barely voiced in Flemish
+    (r'e$', ''),               # French mute final e: amlodipine ~ amlodipin
+    (r'd$', 't'),              # final devoicing
+    (r'(.)\1+', r'\1'),
+]
+_PHONETIC_CODE_REWRITES = [(re.compile(pattern), replacement) for pattern, replacement in PHONETIC_CODE_REWRITES]
+
+# Shorter codes collide with ordinary words
+MIN_PHONETIC_CODE_LENGTH = 4
+
+def flemish_phonetic_code(name: str) -> str:
+    """Sound-alike code of a drug name; names pronounced the same by Flemish or French speakers share it"""
+    code = normalize_drug_name(name)
+    for pattern, replacement in _PHONETIC_CODE_REWRITES:
+        code = pattern.sub(replacement, code)
+    return code
+
+def _ngrams(text: str, n: int = NGRAM_SIZE) -> Counter:
+    """Padded character n-grams of a text, as a multiset"""
+    padded = NGRAM_PADDING * (n - 1) + text + NGRAM_PADDING * (n - 1)
+    return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+class FuzzyIndex:
+    """Inverted index from padded character n-grams to keys.
+
+    Levenshtein searches are exact: the q-gram count filter only discards keys
+    that cannot reach the threshold. With another similarity function only keys
+    sharing at least one n-gram with the query are scored.
+    """
+
+    def __init__(self, n: int = NGRAM_SIZE):
+        self.n = n
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.keys: Dict[str, int] = {}  # key -> n-gram count
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str):
+        if not key or key in self.keys:
+            return
+        grams = _ngrams(key, self.n)
+        self.keys[key] = sum(grams.values())
+        for gram, count in grams.items():
+            self.postings.setdefault(gram, {})[key] = count
+
+    def candidates(self, query: str) -> Dict[str, int]:
+        """Keys sharing n-grams with the query, with the size of the multiset intersection"""
+        shared: Dict[str, int] = {}
+        for gram, count in _ngrams(query, self.n).items():
+            for key, key_count in self.postings.get(gram, {}).items():
+                shared[key] = shared.get(key, 0) + min(count, key_count)
+        return shared
+
+    def search(self, query: str, threshold: float, limit: Optional[int] = None,
+               similarity: Optional[Callable[[str, str], float]] = None) -> List[Tuple[str, float]]:
+        """Keys with similarity strictly above the threshold, best first"""
+
+        if not query:
+            return []
+
+        results = []
+        pattern = BitParallelPattern(query) if similarity is None else None
+        for key, shared in self.candidates(query).items():
+            if similarity is None:
+                # q-gram lemma: edit distance k leaves at least max(grams) - k * n shared grams
+                longest = max(len(query), len(key))
+                max_distance = similarity_bound(len(query), len(key), threshold)
+                if abs(len(query) - len(key)) > max_distance:
+                    continue
+                if shared < longest + self.n - 1 - max_distance * self.n:
+                    continue
+                distance = pattern.distance(key, max_distance)
+                if distance > max_distance:
+                    continue
+                score = 1 - distance / longest
+            else:
+                score = similarity(query, key)
+
+            if score > threshold:
+                results.append((key, score))
+
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results[:limit] if limit else results
+
+@dataclass
+class DrugEntry:
+    """A drug or brand name in the index"""
+    name: str
+    generic_name: str
+    source: str
+
+class DrugFuzzyIndex:
+    """Fuzzy lookup over every known drug and brand name, by spelling or by Belgian pronunciation"""
+
+    def __init__(self, knowledge_db_path: str = KNOWLEDGE_DB_PATH):
+        self.knowledge_db_path = knowledge_db_path
+        self.formulary = get_formulary(knowledge_db_path)
+        self.version = 0
+        self._registered: List[DrugEntry] = []
+        self._formulary_entries: List[DrugEntry] = []
+        self._formulary_fingerprint = None
+        self._lock = threading.Lock()
+        self.refresh()
+    
+    def _build(self):
+        """Rebuild both n-gram indexes; lookups keep using the old ones until the swap"""
+        entries: Dict[str, List[DrugEntry]] = {}
+        phonetic_entries: Dict[str, List[DrugEntry]] = {}
+        phonetic_codes: Dict[str, List[DrugEntry]] = {}
+        spelling = FuzzyIndex()
+        phonetic = FuzzyIndex()
+        
+        for entry in self._formulary_entries + self._registered:
+            key = normalize_drug_name(entry.name)
+            phonetic_key = normalize_drug_name(belgian_phonetic_key(entry.name))
+            if not key:
+                continue
+            if all(existing.name != entry.name for existing in entries.get(key, [])):
+                entries.setdefault(key, []).append(entry)
+                phonetic_entries.setdefault(phonetic_key, []).append(entry)
+                phonetic_codes.setdefault(flemish_phonetic_code(entry.name), []).append(entry)
+            spelling.add(key)
+            phonetic.add(phonetic_key)
+        
+        self._entries, self._phonetic_entries = entries, phonetic_entries
+        self._spelling_index, self._phonetic_index = spelling, phonetic
+        self._phonetic_codes = phonetic_codes
+        self.version += 1
+    
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+    
+    def add_names(self, names: Iterable[str], generic_name: Optional[str] = None, source: str = 'agent'):
+        """Register extra names (an agent's own vocabulary); each name is its own generic unless given"""
+        with self._lock:
+            known = {entry.name for entry in self._registered}
+            new_entries = [
+                DrugEntry(name.lower(), (generic_name or name).lower(), source)
+                for name in names if name.lower() not in known
+            ]
+            if not new_entries:
+                return
+            self._registered.extend(new_entries)
+            self._build()
+    
+    def refresh(self):
+        """Reload formulary names when the formulary changed since the last build"""
+        compiled = self.formulary.compiled()
+        if compiled.fingerprint == self._formulary_fingerprint:
+            return
+        
+        with self._lock:
+            if compiled.fingerprint != self._formulary_fingerprint:
+                self._formulary_entries = self._entries_from(compiled)
+                self._build()
+                self._formulary_fingerprint = compiled.fingerprint
+                logger.info(f"Drug fuzzy index rebuilt with {len(self)} names")
+    
+    @staticmethod
+    def _entries_from(compiled: CompiledFormulary) -> List[DrugEntry]:
+        """Generic and brand names of the formulary"""
+        return [DrugEntry(name, generic_name, 'formulary') for name, generic_name in compiled.drug_names()]
+    
+    def search(self, query: str, threshold: float, limit: Optional[int] = None,
+               similarity: Optional[Callable[[str, str], float]] = None) -> List[Tuple[DrugEntry, float]]:
+        """Names spelled like the query, best first; Levenshtein similarity unless given"""
+        return self._resolve(self._entries, self._spelling_index.search(
+            normalize_drug_name(query), threshold, limit, similarity
+        ), limit)
+
+    def search_phonetic(self, query: str, threshold: float, limit: Optional[int] = None) -> List[Tuple[DrugEntry, str, float]]:
+        """Names whose Belgian pronunciation resembles the query, as (entry, phonetic key, similarity)"""
+        entries = self._phonetic_entries
+        results = []
+        for key, score in self._phonetic_index.search(normalize_drug_name(query), threshold, limit):
+            results.extend((entry, key, score) for entry in entries.get(key, []))
+        return results[:limit] if limit else results
+
+    def lookup_phonetic_code(self, query: str) -> List[DrugEntry]:
+        """Names that sound exactly like the query, by phonetic code; no fuzzy scoring"""
+        code = flemish_phonetic_code(query)
+        if len(code) < MIN_PHONETIC_CODE_LENGTH:
+            return []
+        return list(self._phonetic_codes.get(code, []))
+
+    def _resolve(self, entries: Dict[str, List[DrugEntry]], matches: List[Tuple[str, float]],
+                 limit: Optional[int]) -> List[Tuple[DrugEntry, float]]:
+        results = [(entry, score) for key, score in matches for entry in entries.get(key, [])]
+        return results[:limit] if limit else results
+
+# Global instances, one per knowledge database
+_drug_indexes: Dict[str, DrugFuzzyIndex] = {}
+_drug_indexes_lock = threading.Lock()
+
+def get_drug_index(knowledge_db_path: str = KNOWLEDGE_DB_PATH) -> DrugFuzzyIndex:
+    """Get or create the shared drug fuzzy index"""
+    with _drug_indexes_lock:
+        if knowledge_db_path not in _drug_indexes:
+            _drug_indexes[knowledge_db_path] = DrugFuzzyIndex(knowledge_db_path)
+        return _drug_indexes[knowledge_db_path]
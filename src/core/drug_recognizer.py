@@ -0,0 +1,76 @@
+"""
+Drug Recognizer
+The knowledge base's recognition patterns compiled once: exact patterns into an
+Aho-Corasick automaton run over the transcript, prefix patterns into a trie walked along
+each word. Every match is found with its offsets in one pass, however many drugs the
+formulary holds
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+from .transcript_document import TranscriptDocument
+from .variant_scanner import VariantScanner
+
+EXACT_CONFIDENCE = 0.9
+PREFIX_CONFIDENCE = 0.7
+
+# Key under which a prefix trie node lists the patterns ending there; never a character
+_ENDS = ''
+
+class DrugRecognizer:
+    """Exact and prefix drug patterns, reported per pattern row in row order"""
+
+    def __init__(self, rows: Iterable[Tuple[str, str, str, List[str], str]] = ()):
+        """Compile (pattern, pattern type, generic name, brand names, ATC code) rows"""
+        self._rows: List[Tuple[str, str, str, List[str], str]] = []
+        self._exact = VariantScanner()
+        self._prefixes: Dict = {}
+
+        for row in rows:
+            pattern, pattern_type = row[0], row[1]
+            row_id = len(self._rows)
+            self._rows.append(row)
+            if pattern_type == 'exact':
+                self._exact.add(pattern, row_id)
+            elif pattern_type == 'prefix' and pattern:
+                node = self._prefixes
+                for character in pattern:
+                    node = node.setdefault(character, {})
+                node.setdefault(_ENDS, []).append(row_id)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def recognize(self, document: TranscriptDocument) -> List[Dict]:
+        """Every pattern found in the document, with the (start, end) spans it matched.
+
+        Exact patterns match anywhere in the lowercase text, prefix patterns at the
+        start of a word; both as recognize_drugs_in_text always matched them.
+        """
+        spans: Dict[int, List[Tuple[int, int]]] = {}
+
+        for start, end, _, row_ids in self._exact.scan(document.normalized_text):
+            for row_id in row_ids:
+                spans.setdefault(row_id, []).append((start, end))
+
+        for token in document.tokens:
+            node = self._prefixes
+            for length, character in enumerate(token.normalized, 1):
+                node = node.get(character)
+                if node is None:
+                    break
+                for row_id in node.get(_ENDS, ()):
+                    spans.setdefault(row_id, []).append((token.start, token.start + length))
+
+        recognized = []
+        for row_id in sorted(spans):
+            pattern, pattern_type, generic, brands, atc = self._rows[row_id]
+            recognized.append({
+                'found_text': pattern,
+                'generic_name': generic,
+                'brand_names': list(brands),
+                'atc_code': atc,
+                'confidence': EXACT_CONFIDENCE if pattern_type == 'exact' else PREFIX_CONFIDENCE,
+                'spans': spans[row_id]
+            })
+        return recognized
@@ -0,0 +1,114 @@
+"""
+Drug Search
+A full-text index over the drugs table: generic names, brand names and ATC codes cut into
+trigrams in an FTS5 table, kept in sync by triggers, so a substring search looks up the
+index instead of scanning every drug. Where SQLite lacks FTS5 or its trigram tokenizer,
+searches fall back to scanning with LIKE
+"""
+
+import sqlite3
+import logging
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DRUG_SEARCH_TABLE = 'drugs_search'
+
+# External content: the index holds trigrams only, the text stays in drugs
+DRUG_SEARCH_INDEX = f'''
+    CREATE VIRTUAL TABLE {DRUG_SEARCH_TABLE} USING fts5(
+        generic_name, brand_names, atc_code,
+        content='drugs', content_rowid='id', tokenize='trigram'
+    )
+'''
+
+# An INSERT OR REPLACE deletes the replaced row without firing the delete trigger unless
+# the connection sets recursive_triggers, as pooled connections do
+DRUG_SEARCH_TRIGGERS = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {DRUG_SEARCH_TABLE}_insert AFTER INSERT ON drugs BEGIN
+        INSERT INTO {DRUG_SEARCH_TABLE} (rowid, generic_name, brand_names, atc_code)
+        VALUES (new.id, new.generic_name, new.brand_names, new.atc_code);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {DRUG_SEARCH_TABLE}_delete AFTER DELETE ON drugs BEGIN
+        INSERT INTO {DRUG_SEARCH_TABLE} ({DRUG_SEARCH_TABLE}, rowid, generic_name, brand_names, atc_code)
+        VALUES ('delete', old.id, old.generic_name, old.brand_names, old.atc_code);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {DRUG_SEARCH_TABLE}_update AFTER UPDATE ON drugs BEGIN
+        INSERT INTO {DRUG_SEARCH_TABLE} ({DRUG_SEARCH_TABLE}, rowid, generic_name, brand_names, atc_code)
+        VALUES ('delete', old.id, old.generic_name, old.brand_names, old.atc_code);
+        INSERT INTO {DRUG_SEARCH_TABLE} (rowid, generic_name, brand_names, atc_code)
+        VALUES (new.id, new.generic_name, new.brand_names, new.atc_code);
+    END
+    ''',
+]
+
+# Trigrams need three characters; shorter queries scan
+MIN_INDEXED_QUERY = 3
+
+SEARCH_COLUMNS = 'd.generic_name, d.brand_names, d.atc_code, d.indications, d.source'
+
+# Exact name, then name prefix, then brand name prefix, then any other substring; bm25
+# adds little over this on trigrams and doubles the cost of queries matching many drugs
+MATCH_TIER = '''
+    CASE
+        WHEN d.generic_name LIKE :query ESCAPE '\\' THEN 0
+        WHEN d.generic_name LIKE :query || '%' ESCAPE '\\' THEN 1
+        WHEN d.brand_names LIKE '%"' || :query || '%' ESCAPE '\\' THEN 2
+        ELSE 3
+    END
+'''
+
+def create_drug_search_index(cursor: sqlite3.Cursor) -> bool:
+    """Create the search index and its triggers in the caller's transaction.
+
+    A new index is filled from the drugs already in the database. Returns False
+    when this SQLite build has no FTS5 trigram tokenizer.
+    """
+    exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (DRUG_SEARCH_TABLE,)).fetchone()
+    try:
+        if not exists:
+            cursor.execute(DRUG_SEARCH_INDEX)
+            cursor.execute(f"INSERT INTO {DRUG_SEARCH_TABLE} ({DRUG_SEARCH_TABLE}) VALUES ('rebuild')")
+        for trigger in DRUG_SEARCH_TRIGGERS:
+            cursor.execute(trigger)
+        return True
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Drug search index unavailable, searching without it: {e}")
+        return False
+
+def _like_escape(query: str) -> str:
+    return query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def search_drug_rows(conn: sqlite3.Connection, query: str, limit: Optional[int] = None, offset: int = 0,
+                     indexed: bool = True) -> List[Tuple]:
+    """Drugs whose generic name, brand names or ATC code contain the query, best matches first"""
+    params = {'query': _like_escape(query), 'limit': -1 if limit is None else limit, 'offset': offset}
+
+    if indexed and len(query) >= MIN_INDEXED_QUERY:
+        params['match'] = '"' + query.replace('"', '""') + '"'
+        try:
+            return conn.execute(f'''
+                SELECT {SEARCH_COLUMNS}
+                FROM {DRUG_SEARCH_TABLE} s
+                JOIN drugs d ON d.id = s.rowid
+                WHERE {DRUG_SEARCH_TABLE} MATCH :match
+                ORDER BY {MATCH_TIER}, d.generic_name
+                LIMIT :limit OFFSET :offset
+            ''', params).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.error(f"Indexed drug search failed, scanning instead: {e}")
+
+    return conn.execute(f'''
+        SELECT {SEARCH_COLUMNS}
+        FROM drugs d
+        WHERE d.generic_name LIKE '%' || :query || '%' ESCAPE '\\'
+           OR d.brand_names LIKE '%' || :query || '%' ESCAPE '\\'
+           OR d.atc_code LIKE '%' || :query || '%' ESCAPE '\\'
+        ORDER BY {MATCH_TIER}, d.generic_name
+        LIMIT :limit OFFSET :offset
+    ''', params).fetchall()
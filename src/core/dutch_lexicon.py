@@ -0,0 +1,167 @@
+"""
+Dutch Lexicon
+General Dutch and Flemish vocabulary compiled into a memory-mapped hash table: every
+worker maps the same read-only file, so the lexicon is loaded once per machine and a
+membership test is one hash plus, on average, a single probe
+"""
+
+import os
+import mmap
+import zlib
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from array import array
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Word list shipped with the application; extra lists (e.g. the OpenTaal word list) are
+# added through DUTCH_LEXICON_WORDLISTS, separated like PATH
+BUILTIN_WORDLIST = os.path.join(os.path.dirname(__file__), 'data', 'dutch_flemish_lexicon.txt')
+WORDLISTS_ENV = 'DUTCH_LEXICON_WORDLISTS'
+LEXICON_CACHE_ENV = 'DUTCH_LEXICON_CACHE'
+
+# File layout: header, slot table of uint32 word offsets (+1, 0 = empty), then the words
+# as a length byte followed by UTF-8
+LEXICON_MAGIC = b'NLLEX001'
+_HEADER = struct.Struct('<8sIII')  # magic, slot count, word count, word data size
+MAX_LOAD_FACTOR = 0.5
+MAX_WORD_BYTES = 255
+
+def _slot_count(word_count: int) -> int:
+    """Smallest power of two keeping the table at most MAX_LOAD_FACTOR full"""
+    slots = 8
+    while slots * MAX_LOAD_FACTOR < word_count:
+        slots *= 2
+    return slots
+
+def compile_lexicon(words: Iterable[str], path: str) -> int:
+    """Write the lexicon file for a set of words; returns the number of words stored.
+
+    The file is written next to its destination and renamed into place, so workers
+    compiling the same lexicon at once never see a partial file.
+    """
+    encoded = sorted({word.strip().lower().encode('utf-8') for word in words if word.strip()})
+    encoded = [word for word in encoded if len(word) <= MAX_WORD_BYTES]
+
+    slot_count = _slot_count(len(encoded))
+    slots = array('I', [0]) * slot_count
+    data = bytearray()
+    for word in encoded:
+        slot = zlib.crc32(word) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = len(data) + 1
+        data.append(len(word))
+        data.extend(word)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            output.write(_HEADER.pack(LEXICON_MAGIC, slot_count, len(encoded), len(data)))
+            output.write(slots.tobytes())
+            output.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return len(encoded)
+
+class CompactLexicon:
+    """Read-only, memory-mapped word set produced by compile_lexicon"""
+
+    def __init__(self, path: str, fingerprint: str = ''):
+        self.path = path
+        self.fingerprint = fingerprint
+        with open(path, 'rb') as lexicon_file:
+            self._map = mmap.mmap(lexicon_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, self._slot_count, self._word_count, data_size = _HEADER.unpack_from(self._map)
+            slots_start = _HEADER.size
+            self._data_start = slots_start + 4 * self._slot_count
+            if (magic != LEXICON_MAGIC or self._slot_count & (self._slot_count - 1) or
+                    len(self._map) != self._data_start + data_size):
+                raise ValueError(f"Not a lexicon file: {path}")
+            self._slots = memoryview(self._map)[slots_start:self._data_start].cast('I')
+        except BaseException:
+            self._map.close()
+            raise
+
+    def __len__(self) -> int:
+        return self._word_count
+
+    def __contains__(self, word: str) -> bool:
+        encoded = word.lower().encode('utf-8')
+        mask = self._slot_count - 1
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            offset = self._slots[slot]
+            if not offset:
+                return False
+            start = self._data_start + offset - 1
+            length = self._map[start]
+            if length == len(encoded) and self._map[start + 1:start + 1 + length] == encoded:
+                return True
+            slot = (slot + 1) & mask
+
+def lexicon_wordlists() -> List[str]:
+    """Word list files the lexicon is compiled from"""
+    extra = os.environ.get(WORDLISTS_ENV, '')
+    return [BUILTIN_WORDLIST] + [path for path in extra.split(os.pathsep) if path]
+
+def _read_wordlist(path: str) -> Iterable[str]:
+    with open(path, encoding='utf-8') as wordlist:
+        for line in wordlist:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+def load_dutch_lexicon(wordlists: Optional[List[str]] = None, cache_dir: Optional[str] = None) -> CompactLexicon:
+    """Map the lexicon for these word lists, compiling it first if no worker has yet.
+
+    The compiled file is named after a hash of the word lists, so editing a list
+    produces a new file instead of serving a stale one. A file that cannot be mapped
+    is compiled again.
+    """
+    wordlists = wordlists if wordlists is not None else lexicon_wordlists()
+    digest = hashlib.sha1(LEXICON_MAGIC)
+    readable = []
+    for path in wordlists:
+        try:
+            with open(path, 'rb') as wordlist:
+                digest.update(wordlist.read())
+            digest.update(b'\0')
+            readable.append(path)
+        except OSError as e:
+            logger.error(f"Cannot read lexicon word list {path}: {e}")
+    fingerprint = digest.hexdigest()
+
+    cache_dir = cache_dir or os.environ.get(LEXICON_CACHE_ENV) or tempfile.gettempdir()
+    path = os.path.join(cache_dir, f"dutch_lexicon_{fingerprint[:16]}.bin")
+    if os.path.exists(path):
+        try:
+            return CompactLexicon(path, fingerprint)
+        except Exception as e:
+            logger.warning(f"Recompiling unreadable Dutch lexicon {path}: {e}")
+
+    words = (word for wordlist in readable for word in _read_wordlist(wordlist))
+    count = compile_lexicon(words, path)
+    logger.info(f"Compiled Dutch lexicon with {count} words to {path}")
+    return CompactLexicon(path, fingerprint)
+
+# Global instance, shared by every detector in the process
+_dutch_lexicon: Optional[CompactLexicon] = None
+_dutch_lexicon_lock = threading.Lock()
+
+def get_dutch_lexicon() -> CompactLexicon:
+    """Get or map the shared Dutch lexicon"""
+    global _dutch_lexicon
+    with _dutch_lexicon_lock:
+        if _dutch_lexicon is None:
+            _dutch_lexicon = load_dutch_lexicon()
+        return _dutch_lexicon
@@ -0,0 +1,177 @@
+"""
+Edit Distance Kernels
+Levenshtein distance for drug-name matching: the classic dynamic program, a banded
+variant that stops as soon as a distance bound is exceeded, a bit-parallel (Myers)
+kernel for short strings, and a batched API scoring one query against many candidates
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Queries up to this length use the bit-parallel kernel; Python integers have no word
+# size, but beyond this the bit vectors stop being cheaper than the band
+BIT_PARALLEL_MAX_LENGTH = 64
+
+def levenshtein_distance(s1: str, s2: str) -> int:
+    """Calculate Levenshtein distance between two strings"""
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+
+    if len(s2) == 0:
+        return len(s1)
+
+    previous_row = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+
+    return previous_row[-1]
+
+def bounded_levenshtein_distance(s1: str, s2: str, max_distance: int) -> int:
+    """Levenshtein distance if it is at most max_distance, otherwise max_distance + 1.
+
+    Only cells within max_distance of the diagonal are computed, and the scan stops
+    as soon as every cell of a row exceeds the bound.
+    """
+    max_distance = max(max_distance, 0)
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if len(s1) - len(s2) > max_distance:
+        return max_distance + 1
+    if len(s2) == 0:
+        return len(s1)
+
+    over = max_distance + 1
+    columns = len(s2)
+    previous_row = [j if j <= max_distance else over for j in range(columns + 1)]
+
+    for i in range(1, len(s1) + 1):
+        c1 = s1[i - 1]
+        first = max(1, i - max_distance)
+        last = min(columns, i + max_distance)
+
+        current_row = [over] * (columns + 1)
+        current_row[0] = i if i <= max_distance else over
+        row_minimum = current_row[0] if first == 1 else over
+
+        for j in range(first, last + 1):
+            cost = previous_row[j - 1] + (c1 != s2[j - 1])
+            if previous_row[j] + 1 < cost:
+                cost = previous_row[j] + 1
+            if current_row[j - 1] + 1 < cost:
+                cost = current_row[j - 1] + 1
+            if cost > over:
+                cost = over
+            current_row[j] = cost
+            if cost < row_minimum:
+                row_minimum = cost
+
+        if row_minimum > max_distance:
+            return over
+        previous_row = current_row
+
+    return min(previous_row[columns], over)
+
+class BitParallelPattern:
+    """Myers/Hyyrö bit-vector edit distance, with the pattern's bit masks built once"""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.length = len(pattern)
+        self.mask = (1 << self.length) - 1
+        self.high_bit = 1 << (self.length - 1) if self.length else 0
+        self.peq: Dict[str, int] = {}
+        for position, character in enumerate(pattern):
+            self.peq[character] = self.peq.get(character, 0) | (1 << position)
+
+    def distance(self, text: str, max_distance: Optional[int] = None) -> int:
+        """Edit distance to text; with a bound, returns max_distance + 1 once it cannot be met"""
+
+        if max_distance is not None:
+            max_distance = max(max_distance, 0)
+        if max_distance is not None and abs(self.length - len(text)) > max_distance:
+            return max_distance + 1
+        if not self.length:
+            return len(text) if max_distance is None else min(len(text), max_distance + 1)
+
+        mask = self.mask
+        high_bit = self.high_bit
+        peq = self.peq
+        positive = mask
+        negative = 0
+        score = self.length
+        remaining = len(text)
+
+        for character in text:
+            eq = peq.get(character, 0)
+            xv = eq | negative
+            xh = (((eq & positive) + positive) ^ positive) | eq
+            horizontal_positive = negative | (~(xh | positive) & mask)
+            horizontal_negative = positive & xh
+
+            if horizontal_positive & high_bit:
+                score += 1
+            elif horizontal_negative & high_bit:
+                score -= 1
+
+            # The first row grows by one per text character (global alignment)
+            horizontal_positive = ((horizontal_positive << 1) | 1) & mask
+            horizontal_negative = (horizontal_negative << 1) & mask
+            positive = horizontal_negative | (~(xv | horizontal_positive) & mask)
+            negative = horizontal_positive & xv
+
+            # Each remaining character can lower the score by at most one
+            remaining -= 1
+            if max_distance is not None and score - remaining > max_distance:
+                return max_distance + 1
+
+        return score
+
+def bounded_distance(s1: str, s2: str, max_distance: Optional[int] = None) -> int:
+    """Edit distance with the fastest kernel for the inputs; capped at max_distance + 1 when bounded"""
+    if len(s1) <= BIT_PARALLEL_MAX_LENGTH:
+        return BitParallelPattern(s1).distance(s2, max_distance)
+    if max_distance is None:
+        return levenshtein_distance(s1, s2)
+    return bounded_levenshtein_distance(s1, s2, max_distance)
+
+def similarity_bound(length1: int, length2: int, threshold: float) -> int:
+    """Largest edit distance that keeps 1 - distance / longest strictly above threshold"""
+    return int((1 - threshold) * max(length1, length2) - 1e-9)
+
+def levenshtein_similarity(text1: str, text2: str) -> float:
+    """1 - edit distance / length of the longer text"""
+    if not text1 or not text2:
+        return 0.0
+    return 1 - bounded_distance(text1, text2) / max(len(text1), len(text2))
+
+def batch_similarity(query: str, candidates: Iterable[str], threshold: float) -> List[Tuple[str, float]]:
+    """Score one query against many candidates, keeping those with similarity strictly above threshold.
+
+    The query's bit masks are built once; every candidate gets the distance bound
+    implied by the threshold, so hopeless candidates are abandoned early.
+    """
+    if not query:
+        return []
+
+    pattern = BitParallelPattern(query) if len(query) <= BIT_PARALLEL_MAX_LENGTH else None
+    results = []
+
+    for candidate in candidates:
+        if not candidate:
+            continue
+        max_distance = similarity_bound(len(query), len(candidate), threshold)
+        if max_distance < 0:
+            continue
+        if pattern is not None:
+            distance = pattern.distance(candidate, max_distance)
+        else:
+            distance = bounded_levenshtein_distance(query, candidate, max_distance)
+        if distance <= max_distance:
+            results.append((candidate, 1 - distance / max(len(query), len(candidate))))
+
+    return results
@@ -0,0 +1,449 @@
+"""
+Formulary
+The single source of drug data for every agent: drugs and brand names from the knowledge
+database together with the spoken forms, context keywords, clinical guidelines,
+interactions and contraindications that refer to them. Triggers bump a version on every
+change, and each process compiles the tables once per version into a CompiledFormulary
+the agents build their indexes from
+"""
+
+import json
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .agent_cache import data_fingerprint
+from .clinical_guidelines import get_clinical_guidelines
+from .interaction_graph import InteractionGraph, SEVERITIES
+from .sqlite_pool import get_connection_pool
+from .formulary_seed import (
+    SEED_REVISION, SEED_DRUGS, SEED_PRONUNCIATIONS, SEED_SPLIT_NAMES, SEED_MISRECOGNITIONS,
+    SEED_NAME_FRAGMENTS, SEED_CONDITION_DRUGS, SEED_DEPARTMENT_DRUGS
+)
+
+logger = logging.getLogger(__name__)
+
+# Default location of the knowledge database
+KNOWLEDGE_DB_PATH = "medical_knowledge.db"
+
+DRUGS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS drugs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        generic_name TEXT UNIQUE NOT NULL,
+        brand_names TEXT,  -- JSON array
+        atc_code TEXT,
+        indications TEXT,
+        dosage_forms TEXT,  -- JSON array
+        contraindications TEXT,
+        interactions TEXT,
+        source TEXT DEFAULT 'manual',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+DRUG_PATTERNS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS drug_patterns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pattern TEXT NOT NULL,
+        drug_id INTEGER,
+        pattern_type TEXT,  -- 'exact', 'prefix', 'suffix', 'contains'
+        FOREIGN KEY (drug_id) REFERENCES drugs (id)
+    )
+'''
+
+# Kinds of spoken forms
+SPOKEN_VARIANT = 'variant'                # how doctors say the drug
+SPOKEN_SPLIT = 'split'                    # the name split in two
+SPOKEN_MISRECOGNITION = 'misrecognition'  # what speech recognition makes of it
+SPOKEN_FRAGMENT = 'fragment'              # a truncated or misspelled name
+
+# Kinds of context keywords
+CONTEXT_CONDITION = 'condition'
+CONTEXT_DEPARTMENT = 'department'
+
+# Tables whose changes every agent must pick up
+VERSIONED_TABLES = ['drugs', 'drug_spoken_forms', 'drug_contexts', 'clinical_guidelines',
+                    'drug_interactions', 'drug_contraindications']
+
+def drug_recognition_patterns(generic_name: str, brand_names: Iterable[str]) -> List[Tuple[str, str]]:
+    """Exact and prefix recognition patterns of a drug's generic and brand names"""
+    patterns = []
+    for name in [generic_name] + list(brand_names):
+        patterns.append((name.lower(), 'exact'))
+        if len(name) > 4:
+            patterns.append((name.lower()[:4], 'prefix'))
+    return patterns
+
+@dataclass
+class FormularyDrug:
+    """A drug as the agents see it"""
+    generic_name: str  # lowercase
+    brand_names: List[str]
+    atc_code: str = ""
+    indications: str = ""
+    dosage_forms: List[str] = field(default_factory=list)
+
+@dataclass
+class CompiledFormulary:
+    """Every agent-facing structure of one formulary version"""
+    version: int
+    fingerprint: str
+    drugs: Dict[str, FormularyDrug]
+    pronunciations: Dict[str, List[str]]  # generic name -> spoken variants, in database order
+    split_names: Dict[str, str]
+    misrecognitions: Dict[str, str]
+    name_fragments: Dict[str, str]
+    condition_drugs: Dict[str, List[str]]
+    department_drugs: Dict[str, List[str]]
+    clinical_guidelines: Dict[str, Dict]
+    guideline_tiers: Dict[str, Tuple[frozenset, frozenset]]  # condition -> (first-line, second-line drugs)
+    interactions: InteractionGraph
+
+    @property
+    def corrections(self) -> Dict[str, str]:
+        """Misrecognitions first, then name fragments: every spoken form that suggests a drug"""
+        return {**self.misrecognitions, **self.name_fragments}
+
+    def brand_names(self, generic_name: str) -> List[str]:
+        drug = self.drugs.get(generic_name.lower())
+        return list(drug.brand_names) if drug else []
+
+    def drug_names(self) -> List[Tuple[str, str]]:
+        """Every generic and brand name with its generic name, both lowercase"""
+        names = []
+        for generic_name, drug in self.drugs.items():
+            names.append((generic_name, generic_name))
+            names.extend((brand.lower(), generic_name) for brand in drug.brand_names)
+        return names
+
+def _guideline_tiers(guidelines: Dict[str, Dict]) -> Dict[str, Tuple[frozenset, frozenset]]:
+    """First-line drugs of every patient group and second-line drugs, per condition"""
+    tiers = {}
+    for condition, guideline in guidelines.items():
+        first_line = guideline.get('first_line', {})
+        groups = first_line.values() if isinstance(first_line, dict) else [first_line]
+        tiers[condition] = (
+            frozenset(drug for drugs in groups if isinstance(drugs, list) for drug in drugs),
+            frozenset(guideline.get('second_line', []))
+        )
+    return tiers
+
+def _compile(version: int, drugs: Dict[str, FormularyDrug], spoken_forms: Iterable[Tuple[str, str, str]],
+             contexts: Iterable[Tuple[str, str, str]], guidelines: Dict[str, Dict],
+             interactions: List[Tuple[str, str, str, str]], contraindications: List[Tuple[str, str]]) -> CompiledFormulary:
+    """Compile (generic, spoken, kind), (keyword, kind, generic), (drug, other drug, severity,
+    monitoring) and (condition, drug) rows, in order"""
+    by_kind = {SPOKEN_VARIANT: {}, SPOKEN_SPLIT: {}, SPOKEN_MISRECOGNITION: {}, SPOKEN_FRAGMENT: {}}
+    for generic_name, spoken, kind in spoken_forms:
+        if kind == SPOKEN_VARIANT:
+            by_kind[kind].setdefault(generic_name, []).append(spoken)
+        elif kind in by_kind:
+            by_kind[kind][spoken] = generic_name
+
+    context_maps = {CONTEXT_CONDITION: {}, CONTEXT_DEPARTMENT: {}}
+    for keyword, kind, generic_name in contexts:
+        if kind in context_maps:
+            context_maps[kind].setdefault(keyword, []).append(generic_name)
+
+    fingerprint = data_fingerprint(
+        {name: (drug.brand_names, drug.atc_code) for name, drug in drugs.items()},
+        *by_kind.values(), *context_maps.values(),
+        {condition: json.dumps(guideline, sort_keys=True) for condition, guideline in guidelines.items()},
+        interactions, contraindications
+    )
+    return CompiledFormulary(
+        version=version,
+        fingerprint=fingerprint,
+        drugs=drugs,
+        pronunciations=by_kind[SPOKEN_VARIANT],
+        split_names=by_kind[SPOKEN_SPLIT],
+        misrecognitions=by_kind[SPOKEN_MISRECOGNITION],
+        name_fragments=by_kind[SPOKEN_FRAGMENT],
+        condition_drugs=context_maps[CONTEXT_CONDITION],
+        department_drugs=context_maps[CONTEXT_DEPARTMENT],
+        clinical_guidelines=guidelines,
+        guideline_tiers=_guideline_tiers(guidelines),
+        interactions=InteractionGraph(interactions, contraindications, drugs)
+    )
+
+def _seed_spoken_forms() -> List[Tuple[str, str, str]]:
+    rows = [(generic, spoken, SPOKEN_VARIANT) for generic, variants in SEED_PRONUNCIATIONS.items() for spoken in variants]
+    for kind, forms in [(SPOKEN_SPLIT, SEED_SPLIT_NAMES), (SPOKEN_MISRECOGNITION, SEED_MISRECOGNITIONS),
+                        (SPOKEN_FRAGMENT, SEED_NAME_FRAGMENTS)]:
+        rows.extend((generic, spoken, kind) for spoken, generic in forms.items())
+    return rows
+
+def _seed_contexts() -> List[Tuple[str, str, str]]:
+    rows = []
+    for kind, mapping in [(CONTEXT_CONDITION, SEED_CONDITION_DRUGS), (CONTEXT_DEPARTMENT, SEED_DEPARTMENT_DRUGS)]:
+        rows.extend((keyword, kind, generic) for keyword, drugs in mapping.items() for generic in drugs)
+    return rows
+
+def _seed_interactions() -> List[Tuple[str, str, str, str]]:
+    return [
+        (drug, other_drug, severity, data.get('monitoring', ''))
+        for drug, data in get_clinical_guidelines().interactions.items()
+        for severity in SEVERITIES
+        for other_drug in data.get(severity, [])
+    ]
+
+def _seed_contraindications() -> List[Tuple[str, str]]:
+    return [(condition, drug) for condition, drugs in get_clinical_guidelines().contraindications.items() for drug in drugs]
+
+def compile_seed() -> CompiledFormulary:
+    """The built-in formulary, for when the knowledge database cannot be read"""
+    drugs = {
+        name: FormularyDrug(name, list(data.get('brand_names', [])), data.get('atc_code', ''),
+                            data.get('indications', ''), list(data.get('dosage_forms', [])))
+        for name, data in SEED_DRUGS.items()
+    }
+    return _compile(0, drugs, _seed_spoken_forms(), _seed_contexts(), get_clinical_guidelines().guidelines,
+                    _seed_interactions(), _seed_contraindications())
+
+class Formulary:
+    """Versioned formulary tables in the knowledge database"""
+
+    def __init__(self, db_path: str = KNOWLEDGE_DB_PATH):
+        self.db_path = db_path
+        self._compiled: Optional[CompiledFormulary] = None
+        self._lock = threading.Lock()
+        # Version checks run on every agent call, on each thread's pooled connection
+        self.db = get_connection_pool(db_path)
+        self._init_db()
+
+    def _init_db(self):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            cursor = conn.cursor()
+
+            cursor.execute(DRUGS_TABLE)
+            cursor.execute(DRUG_PATTERNS_TABLE)
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS drug_spoken_forms (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    generic_name TEXT NOT NULL,
+                    spoken TEXT NOT NULL,
+                    kind TEXT NOT NULL,  -- 'variant', 'split', 'misrecognition', 'fragment'
+                    UNIQUE (generic_name, spoken, kind)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS drug_contexts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    keyword TEXT NOT NULL,
+                    kind TEXT NOT NULL,  -- 'condition', 'department'
+                    generic_name TEXT NOT NULL,
+                    UNIQUE (keyword, kind, generic_name)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS clinical_guidelines (
+                    condition TEXT PRIMARY KEY,
+                    guidelines TEXT NOT NULL  -- JSON
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS drug_interactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    drug TEXT NOT NULL,
+                    other_drug TEXT NOT NULL,
+                    severity TEXT NOT NULL,  -- 'major', 'moderate'
+                    monitoring TEXT,
+                    UNIQUE (drug, other_drug, severity)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS drug_contraindications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    condition TEXT NOT NULL,
+                    generic_name TEXT NOT NULL,
+                    UNIQUE (condition, generic_name)
+                )
+            ''')
+
+            # Bumped by triggers in the same transaction as every change to the formulary
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS formulary_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL,
+                    seed_revision INTEGER NOT NULL,
+                    guideline_revision INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO formulary_state (id, version, seed_revision) VALUES (1, 0, 0)')
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(formulary_state)')}
+            if 'guideline_revision' not in columns:
+                cursor.execute('ALTER TABLE formulary_state ADD COLUMN guideline_revision INTEGER NOT NULL DEFAULT 0')
+
+            for table in VERSIONED_TABLES:
+                for event in ['INSERT', 'UPDATE', 'DELETE']:
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS formulary_{table}_{event.lower()}
+                        AFTER {event} ON {table}
+                        BEGIN
+                            UPDATE formulary_state SET version = version + 1 WHERE id = 1;
+                        END
+                    ''')
+
+            conn.commit()
+            self._seed(conn)
+            conn.close()
+        except Exception as e:
+            logger.error(f"Formulary initialization failed: {e}")
+
+    def _seed(self, conn: sqlite3.Connection):
+        """Write the built-in formulary once per seed and guideline revision; drugs and spoken forms the database already has are kept"""
+        guidelines = get_clinical_guidelines()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')  # one worker seeds, the others wait and find it done
+        revision, guideline_revision = cursor.execute(
+            'SELECT seed_revision, guideline_revision FROM formulary_state WHERE id = 1'
+        ).fetchone()
+        if revision >= SEED_REVISION and guideline_revision >= guidelines.revision:
+            conn.rollback()
+            return
+
+        for name, data in SEED_DRUGS.items():
+            if cursor.execute('SELECT 1 FROM drugs WHERE lower(generic_name) = ?', (name,)).fetchone():
+                continue
+            brand_names = data.get('brand_names', [])
+            cursor.execute('''
+                INSERT INTO drugs (generic_name, brand_names, atc_code, indications, dosage_forms, source)
+                VALUES (?, ?, ?, ?, ?, 'formulary')
+            ''', (name.capitalize(), json.dumps(brand_names), data.get('atc_code', ''),
+                  data.get('indications', ''), json.dumps(data.get('dosage_forms', []))))
+            drug_id = cursor.lastrowid
+            cursor.executemany(
+                'INSERT INTO drug_patterns (pattern, drug_id, pattern_type) VALUES (?, ?, ?)',
+                [(pattern, drug_id, pattern_type) for pattern, pattern_type in drug_recognition_patterns(name, brand_names)]
+            )
+
+        cursor.executemany('INSERT OR IGNORE INTO drug_spoken_forms (generic_name, spoken, kind) VALUES (?, ?, ?)',
+                           _seed_spoken_forms())
+        cursor.executemany('INSERT OR IGNORE INTO drug_contexts (keyword, kind, generic_name) VALUES (?, ?, ?)',
+                           _seed_contexts())
+
+        # The guideline tables mirror the data file: a newer revision replaces them outright,
+        # so changed and removed rows do not survive next to the snapshot selectors read
+        if guideline_revision < guidelines.revision:
+            for table in ('clinical_guidelines', 'drug_interactions', 'drug_contraindications'):
+                cursor.execute(f'DELETE FROM {table}')
+            cursor.executemany('INSERT INTO clinical_guidelines (condition, guidelines) VALUES (?, ?)',
+                               [(condition, json.dumps(guideline)) for condition, guideline in guidelines.guidelines.items()])
+            cursor.executemany('INSERT OR IGNORE INTO drug_interactions (drug, other_drug, severity, monitoring) VALUES (?, ?, ?, ?)',
+                               _seed_interactions())
+            cursor.executemany('INSERT OR IGNORE INTO drug_contraindications (condition, generic_name) VALUES (?, ?)',
+                               _seed_contraindications())
+            guideline_revision = guidelines.revision
+
+        cursor.execute('UPDATE formulary_state SET seed_revision = ?, guideline_revision = ? WHERE id = 1',
+                       (max(revision, SEED_REVISION), guideline_revision))
+        conn.commit()
+        logger.info(f"Formulary seeded to revision {SEED_REVISION}, guidelines revision {guidelines.revision}")
+
+    def version(self) -> Optional[int]:
+        """Current formulary version; None when the database cannot be read"""
+        try:
+            row = self.db.connection().execute('SELECT version FROM formulary_state WHERE id = 1').fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            logger.error(f"Error reading formulary version: {e}")
+            return None
+
+    def compiled(self) -> CompiledFormulary:
+        """The compiled formulary, recompiled when the database version moved"""
+        version = self.version()
+        compiled = self._compiled
+        if compiled is not None and (version is None or version == compiled.version):
+            return compiled
+
+        with self._lock:
+            if self._compiled is None or (version is not None and version != self._compiled.version):
+                self._compiled = self._load(version) if version is not None else None
+                if self._compiled is None:
+                    self._compiled = compile_seed()
+                else:
+                    logger.info(f"Formulary version {version} compiled with {len(self._compiled.drugs)} drugs")
+            return self._compiled
+
+    def _load(self, version: int) -> Optional[CompiledFormulary]:
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            drugs = {}
+            cursor.execute('SELECT generic_name, brand_names, atc_code, indications, dosage_forms FROM drugs ORDER BY id')
+            for generic_name, brand_names, atc_code, indications, dosage_forms in cursor.fetchall():
+                name = generic_name.lower()
+                drugs[name] = FormularyDrug(
+                    name,
+                    json.loads(brand_names) if brand_names else [],
+                    atc_code or "",
+                    indications or "",
+                    json.loads(dosage_forms) if dosage_forms else []
+                )
+
+            spoken_forms = cursor.execute('SELECT generic_name, spoken, kind FROM drug_spoken_forms ORDER BY id').fetchall()
+            contexts = cursor.execute('SELECT keyword, kind, generic_name FROM drug_contexts ORDER BY id').fetchall()
+            guidelines = {
+                condition: json.loads(data)
+                for condition, data in cursor.execute('SELECT condition, guidelines FROM clinical_guidelines ORDER BY rowid')
+            }
+            interactions = cursor.execute(
+                'SELECT drug, other_drug, severity, monitoring FROM drug_interactions ORDER BY id'
+            ).fetchall()
+            contraindications = cursor.execute(
+                'SELECT condition, generic_name FROM drug_contraindications ORDER BY id'
+            ).fetchall()
+            conn.close()
+            return _compile(version, drugs, spoken_forms, contexts, guidelines, interactions, contraindications)
+        except Exception as e:
+            logger.error(f"Error compiling formulary: {e}")
+            return None
+
+    def add_spoken_forms(self, generic_name: str, spoken_forms: List[str], kind: str = SPOKEN_VARIANT) -> Optional[int]:
+        """Add spoken forms of a drug for every agent; returns the new version, None on failure"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.executemany('INSERT OR IGNORE INTO drug_spoken_forms (generic_name, spoken, kind) VALUES (?, ?, ?)',
+                             [(generic_name.lower(), spoken.lower(), kind) for spoken in spoken_forms])
+            conn.commit()
+            version = conn.execute('SELECT version FROM formulary_state WHERE id = 1').fetchone()[0]
+            conn.close()
+            return version
+        except Exception as e:
+            logger.error(f"Error adding spoken forms: {e}")
+            return None
+
+    def add_context(self, keyword: str, generic_names: List[str], kind: str = CONTEXT_CONDITION) -> Optional[int]:
+        """Link a condition or department keyword to drugs; returns the new version, None on failure"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.executemany('INSERT OR IGNORE INTO drug_contexts (keyword, kind, generic_name) VALUES (?, ?, ?)',
+                             [(keyword.lower(), kind, generic_name.lower()) for generic_name in generic_names])
+            conn.commit()
+            version = conn.execute('SELECT version FROM formulary_state WHERE id = 1').fetchone()[0]
+            conn.close()
+            return version
+        except Exception as e:
+            logger.error(f"Error adding drug context: {e}")
+            return None
+
+# Global instances, one per knowledge database
+_formularies: Dict[str, Formulary] = {}
+_formularies_lock = threading.Lock()
+
+def get_formulary(db_path: str = KNOWLEDGE_DB_PATH) -> Formulary:
+    """Get or create the shared formulary for a knowledge database"""
+    with _formularies_lock:
+        if db_path not in _formularies:
+            _formularies[db_path] = Formulary(db_path)
+        return _formularies[db_path]
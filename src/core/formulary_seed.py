@@ -0,0 +1,322 @@
+"""
+Formulary Seed
+The drug data the agents shipped with. It is written into the knowledge
+database the first time the formulary opens it; from then on the database is the
+source, and drugs, spoken forms and context added there reach every agent. Clinical
+guidelines, interactions and contraindications are seeded from data/clinical_guidelines.json.
+"""
+
+# Bump when the seed below changes so existing databases receive the additions
+SEED_REVISION = 2
+
+# Drugs with their Belgian brand names and, where known, product details
+SEED_DRUGS = {
+    # Beta-blockers
+    'bisoprolol': {
+        'brand_names': ['Bisoprolol EG', 'Bisoblock', 'Bisoprolol Mylan', 'Bisoprolol Sandoz',
+                        'Bisoprolol Teva', 'Bisocard'],
+        'atc_code': 'C07AB07',
+        'indications': 'Hypertensie, angina pectoris, hartfalen',
+        'dosage_forms': ['tablet 2.5mg', 'tablet 5mg', 'tablet 10mg'],
+    },
+    'atenolol': {},
+    'metoprolol': {
+        'brand_names': ['Seloken', 'Metoprolol EG'],
+        'atc_code': 'C07AB02',
+        'indications': 'Hypertensie, angina pectoris, hartfalen, post-MI',
+        'dosage_forms': ['tablet 25mg', 'tablet 50mg', 'tablet 100mg'],
+    },
+    'carvedilol': {},
+    'nebivolol': {},
+    'propranolol': {},
+    'sotalol': {},
+
+    # ACE inhibitors
+    'enalapril': {'brand_names': ['Enalapril EG', 'Renitec', 'Enalapril Sandoz']},
+    'lisinopril': {},
+    'ramipril': {},
+    'perindopril': {},
+
+    # ARBs (sartans)
+    'losartan': {'brand_names': ['Losartan EG', 'Cozaar', 'Losartan Sandoz']},
+    'valsartan': {},
+    'irbesartan': {},
+    'candesartan': {},
+
+    # Calcium channel blockers
+    'amlodipine': {
+        'brand_names': ['Norvasc', 'Amlodipine EG', 'Amlodipine Sandoz'],
+        'atc_code': 'C08CA01',
+        'indications': 'Hypertensie, angina pectoris',
+        'dosage_forms': ['tablet 5mg', 'tablet 10mg'],
+    },
+    'nifedipine': {},
+    'felodipine': {},
+    'verapamil': {},
+
+    # Diuretics
+    'furosemide': {'brand_names': ['Furosemide EG', 'Lasix', 'Furosemide Sandoz']},
+    'hydrochlorothiazide': {},
+    'spironolactone': {},
+
+    # Statins
+    'atorvastatin': {
+        'brand_names': ['Lipitor', 'Atorvastatine EG', 'Atorvastatine Mylan', 'Atorvastatin EG',
+                        'Atorvastatin Sandoz'],
+        'atc_code': 'C10AA05',
+        'indications': 'Hypercholesterolemie, cardiovasculaire preventie',
+        'dosage_forms': ['tablet 10mg', 'tablet 20mg', 'tablet 40mg', 'tablet 80mg'],
+    },
+    'simvastatin': {},
+    'rosuvastatin': {},
+
+    # Anticoagulants and antiplatelets
+    'warfarin': {},
+    'rivaroxaban': {
+        'brand_names': ['Xarelto'],
+        'atc_code': 'B01AF01',
+        'indications': 'Anticoagulatie, VTE preventie',
+        'dosage_forms': ['tablet 10mg', 'tablet 15mg', 'tablet 20mg'],
+    },
+    'apixaban': {},
+    'dabigatran': {},
+    'clopidogrel': {},
+    'acetylsalicylic acid': {},
+
+    # Antiarrhythmics and nitrates
+    'amiodarone': {},
+    'flecainide': {},
+    'lidocaine': {},
+    'cedocard': {},
+    'isosorbide': {},
+    'nitroglycerin': {},
+
+    # Diabetes
+    'metformin': {'brand_names': ['Metformin EG', 'Glucophage', 'Metformin Sandoz']},
+    'gliclazide': {},
+    'insulin': {},
+
+    # Pain
+    'paracetamol': {'brand_names': ['Paracetamol EG', 'Dafalgan', 'Panadol']},
+    'ibuprofen': {'brand_names': ['Ibuprofen EG', 'Brufen', 'Nurofen']},
+    'diclofenac': {},
+    'tramadol': {},
+    'morphine': {},
+    'gabapentin': {},
+    'pregabalin': {},
+    'amitriptyline': {},
+
+    # Antibiotics
+    'amoxicillin': {},
+    'azithromycin': {},
+    'ciprofloxacin': {},
+    'nitrofurantoin': {},
+    'flucloxacillin': {},
+    'clindamycin': {},
+    'ceftriaxone': {},
+
+    # Respiratory and neurology
+    'salbutamol': {},
+    'budesonide': {},
+    'theophylline': {},
+    'levodopa': {},
+    'phenytoin': {},
+}
+
+# How Belgian doctors pronounce each drug, in Dutch, French or mixed
+SEED_PRONUNCIATIONS = {
+    # Beta-blockers
+    'bisoprolol': [
+        'biso prolol', 'biso prol ol', 'bisoprolol', 'biso', 'bisoprol',
+        'bisocard', 'bisobloc', 'bisoprolol eg', 'bisoprolol sandoz'
+    ],
+    'atenolol': [
+        'atenolol', 'aten olol', 'aten ol', 'tenormin', 'atenol'
+    ],
+    'metoprolol': [
+        'metoprolol', 'meto prolol', 'meto prol', 'lopressor', 'seloken',
+        'metoprolol tartrate', 'metoprolol succinate'
+    ],
+    'carvedilol': [
+        'carvedilol', 'carve dilol', 'kredex', 'dilatrend'
+    ],
+    'nebivolol': [
+        'nebivolol', 'nebi volol', 'nebi vol', 'nobiten'
+    ],
+    'propranolol': [
+        'propranolol', 'propran olol', 'inderal', 'propra'
+    ],
+
+    # ACE Inhibitors
+    'enalapril': [
+        'enalapril', 'enal april', 'renitec', 'enalapril eg'
+    ],
+    'lisinopril': [
+        'lisinopril', 'lisin opril', 'zestril', 'prinivil'
+    ],
+    'ramipril': [
+        'ramipril', 'rami pril', 'tritace', 'ramipril eg'
+    ],
+    'perindopril': [
+        'perindopril', 'perin dopril', 'coversyl', 'perindopril eg'
+    ],
+
+    # ARBs (Sartans)
+    'losartan': [
+        'losartan', 'losar tan', 'cozaar', 'losartan eg'
+    ],
+    'valsartan': [
+        'valsartan', 'valsar tan', 'diovan', 'valsartan eg'
+    ],
+    'irbesartan': [
+        'irbesartan', 'irbe sartan', 'aprovel', 'irbesartan eg'
+    ],
+    'candesartan': [
+        'candesartan', 'cande sartan', 'atacand', 'candesartan eg'
+    ],
+
+    # Diuretics
+    'furosemide': [
+        'furosemide', 'furo semide', 'lasix', 'furosemide eg'
+    ],
+    'hydrochlorothiazide': [
+        'hydrochlorothiazide', 'hydrochloro thiazide', 'hctz', 'esidrex'
+    ],
+    'spironolactone': [
+        'spironolactone', 'spirono lactone', 'aldactone'
+    ],
+
+    # Statins
+    'atorvastatin': [
+        'atorvastatin', 'ator vastatin', 'lipitor', 'atorvastatin eg'
+    ],
+    'simvastatin': [
+        'simvastatin', 'simva statin', 'zocor', 'simvastatin eg'
+    ],
+    'rosuvastatin': [
+        'rosuvastatin', 'rosu vastatin', 'crestor', 'rosuvastatin eg'
+    ],
+
+    # Calcium Channel Blockers
+    'amlodipine': [
+        'amlodipine', 'amlo dipine', 'norvasc', 'amlodipine eg'
+    ],
+    'nifedipine': [
+        'nifedipine', 'nife dipine', 'adalat', 'nifedipine eg'
+    ],
+
+    # Anticoagulants
+    'warfarin': [
+        'warfarin', 'warfa rin', 'marevan', 'coumadin'
+    ],
+    'rivaroxaban': [
+        'rivaroxaban', 'riva roxaban', 'xarelto'
+    ],
+    'apixaban': [
+        'apixaban', 'api xaban', 'eliquis'
+    ],
+    'dabigatran': [
+        'dabigatran', 'dabi gatran', 'pradaxa'
+    ],
+
+    # Antiplatelets
+    'clopidogrel': [
+        'clopidogrel', 'clopi dogrel', 'plavix', 'clopidogrel eg'
+    ],
+    'acetylsalicylic acid': [
+        'acetylsalicylic acid', 'aspirin', 'aspirine', 'cardioaspirin',
+        'acetyl salicyl', 'asa', 'asaflow'
+    ],
+
+    # Diabetes medications
+    'metformin': [
+        'metformin', 'metfor min', 'glucophage', 'metformin eg'
+    ],
+    'gliclazide': [
+        'gliclazide', 'glic lazide', 'diamicron', 'gliclazide eg'
+    ],
+
+    # Antibiotics
+    'amoxicillin': [
+        'amoxicillin', 'amoxi cillin', 'clamoxyl', 'amoxicillin eg'
+    ],
+    'azithromycin': [
+        'azithromycin', 'azithro mycin', 'zithromax', 'azithromycin eg'
+    ],
+
+    # Pain medications
+    'paracetamol': [
+        'paracetamol', 'para cetamol', 'dafalgan', 'panadol', 'acetaminophen'
+    ],
+    'ibuprofen': [
+        'ibuprofen', 'ibu profen', 'brufen', 'nurofen', 'ibuprofen eg'
+    ],
+    'diclofenac': [
+        'diclofenac', 'diclo fenac', 'voltaren', 'diclofenac eg'
+    ]
+}
+
+# Drug names commonly split in two in Belgian medical speech; not variants of their drug
+SEED_SPLIT_NAMES = {
+    'acetyl salicyl': 'acetylsalicylic acid',
+    'hydrochloro thiazide': 'hydrochlorothiazide',
+    'spirono lactone': 'spironolactone',
+    'metro prolol': 'metoprolol',
+    'biso prolol': 'bisoprolol',
+    'carve dilol': 'carvedilol',
+    'ator vastatin': 'atorvastatin',
+    'simva statin': 'simvastatin',
+    'rosu vastatin': 'rosuvastatin'
+}
+
+# Speech recognition errors that stand for a drug, even when they are real words
+SEED_MISRECOGNITIONS = {
+    'sedocar': 'cedocard',
+    'sedocard': 'cedocard',
+    'cedo card': 'cedocard',
+    'sedo card': 'cedocard',
+    'biso': 'bisoprolol',
+    'aten': 'atenolol',
+    'metro': 'metoprolol',
+    'carve': 'carvedilol'
+}
+
+# Truncated or misspelled drug names that suggest the full name
+SEED_NAME_FRAGMENTS = {
+    'enal': 'enalapril',
+    'lisin': 'lisinopril',
+    'losar': 'losartan',
+    'valsar': 'valsartan',
+    'amlo': 'amlodipine',
+    'furo': 'furosemide',
+    'ator': 'atorvastatin',
+    'simva': 'simvastatin',
+    'para': 'paracetamol',
+    'ibu': 'ibuprofen',
+    'amoxi': 'amoxicillin',
+    'azithro': 'azithromycin',
+    'isosorbid': 'isosorbide',
+    'nitroglycerine': 'nitroglycerin',
+    'acetylsalicyl': 'acetylsalicylic acid'
+}
+
+# Medical conditions that make a drug more likely
+SEED_CONDITION_DRUGS = {
+    'hypertensie': ['bisoprolol', 'atenolol', 'metoprolol', 'amlodipine', 'enalapril', 'losartan'],
+    'hartfalen': ['bisoprolol', 'carvedilol', 'enalapril', 'furosemide', 'spironolactone'],
+    'diabetes': ['metformin', 'gliclazide', 'insulin'],
+    'cholesterol': ['atorvastatin', 'simvastatin', 'rosuvastatin'],
+    'angina': ['bisoprolol', 'metoprolol', 'amlodipine', 'isosorbide'],
+    'aritmie': ['metoprolol', 'propranolol', 'sotalol', 'amiodarone'],
+    'anticoagulatie': ['warfarin', 'rivaroxaban', 'apixaban', 'dabigatran'],
+    'pijn': ['paracetamol', 'ibuprofen', 'diclofenac', 'tramadol'],
+    'infectie': ['amoxicillin', 'azithromycin', 'ciprofloxacin']
+}
+
+# Departments that make a drug more likely
+SEED_DEPARTMENT_DRUGS = {
+    'cardiologie': ['bisoprolol', 'metoprolol', 'atorvastatin', 'clopidogrel', 'warfarin'],
+    'interne': ['metformin', 'furosemide', 'enalapril', 'amlodipine'],
+    'pneumologie': ['salbutamol', 'budesonide', 'theophylline'],
+    'neurologie': ['levodopa', 'gabapentin', 'phenytoin']
+}
@@ -0,0 +1,146 @@
+"""
+Interaction Graph
+Drug interactions and contraindications over integer drug ids. Each drug's interacting
+drugs, per severity, and each condition's contraindicated drugs are bitsets, so a whole
+medication list is checked with a few integer operations per drug instead of list scans
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+SEVERITY_MAJOR = 'major'
+SEVERITY_MODERATE = 'moderate'
+SEVERITIES = (SEVERITY_MAJOR, SEVERITY_MODERATE)
+
+@dataclass(frozen=True)
+class Interaction:
+    """An interacting pair of drugs, in the order they were checked"""
+    drug: str
+    other_drug: str
+    severity: str
+    monitoring: str = ""
+
+@dataclass
+class RegimenCheck:
+    """Every interacting pair and contraindicated drug in a medication list"""
+    interactions: List[Interaction]
+    contraindications: List[Tuple[str, str]]  # (drug, condition)
+
+    @property
+    def safe(self) -> bool:
+        return not self.interactions and not self.contraindications
+
+def _bits(mask: int) -> Iterable[int]:
+    """Positions of the set bits of a bitset, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class InteractionGraph:
+    """Undirected interaction graph and contraindication table; names are matched lowercase"""
+
+    def __init__(self, interactions: Iterable[Tuple[str, str, str, str]] = (),
+                 contraindications: Iterable[Tuple[str, str]] = (), drug_names: Iterable[str] = ()):
+        """Build from (drug, other drug, severity, monitoring) and (condition, drug) rows.
+
+        Drugs get ids in the order given, formulary names first, so ids are stable for
+        a given formulary version.
+        """
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        for name in drug_names:
+            self._id(name)
+
+        self._adjacency: Dict[str, List[int]] = {severity: [] for severity in SEVERITIES}
+        self._monitoring: Dict[Tuple[int, int], str] = {}
+        self.pair_count = 0
+        for drug, other_drug, severity, monitoring in interactions:
+            if severity not in self._adjacency:
+                continue
+            a, b = self._id(drug), self._id(other_drug)
+            adjacency = self._grow(self._adjacency[severity])
+            if not adjacency[a] >> b & 1:
+                self.pair_count += 1
+            adjacency[a] |= 1 << b
+            adjacency[b] |= 1 << a
+            if monitoring:
+                self._monitoring[(min(a, b), max(a, b))] = monitoring
+
+        self._contraindicated: Dict[str, int] = {}
+        for condition, drug in contraindications:
+            condition = condition.lower()
+            self._contraindicated[condition] = self._contraindicated.get(condition, 0) | 1 << self._id(drug)
+
+    def _id(self, name: str) -> int:
+        name = name.lower()
+        if name not in self._ids:
+            self._ids[name] = len(self._names)
+            self._names.append(name)
+        return self._ids[name]
+
+    def _grow(self, adjacency: List[int]) -> List[int]:
+        adjacency.extend([0] * (len(self._names) - len(adjacency)))
+        return adjacency
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def drug_id(self, name: str) -> Optional[int]:
+        return self._ids.get(name.lower())
+
+    def _neighbours(self, drug_id: int, severity: str) -> int:
+        adjacency = self._adjacency[severity]
+        return adjacency[drug_id] if drug_id < len(adjacency) else 0
+
+    def interacts(self, drug: str, other_drug: str, severity: str = SEVERITY_MAJOR) -> bool:
+        a, b = self.drug_id(drug), self.drug_id(other_drug)
+        return a is not None and b is not None and bool(self._neighbours(a, severity) >> b & 1)
+
+    def interactions_with(self, drug: str, medications: Sequence[str], severity: str = SEVERITY_MAJOR) -> List[str]:
+        """The medications, as given and in order, that interact with a drug"""
+        drug_id = self.drug_id(drug)
+        if drug_id is None:
+            return []
+        neighbours = self._neighbours(drug_id, severity)
+        interacting = []
+        for medication in medications:
+            other_id = self._ids.get(medication.lower())
+            if other_id is not None and neighbours >> other_id & 1:
+                interacting.append(medication)
+        return interacting
+
+    def contraindications_for(self, drug: str, conditions: Sequence[str]) -> List[str]:
+        """The conditions, as given and in order, in which a drug is contraindicated"""
+        drug_id = self.drug_id(drug)
+        if drug_id is None:
+            return []
+        return [condition for condition in conditions
+                if self._contraindicated.get(condition.lower(), 0) >> drug_id & 1]
+
+    def check_regimen(self, medications: Sequence[str], conditions: Sequence[str] = (),
+                      severities: Sequence[str] = SEVERITIES) -> RegimenCheck:
+        """Every interacting pair in a medication list and every drug contraindicated by the conditions"""
+        ids = {}
+        for medication in medications:
+            drug_id = self.drug_id(medication)
+            if drug_id is not None:
+                ids.setdefault(drug_id, medication)
+        regimen = sum(1 << drug_id for drug_id in ids)
+
+        interactions = []
+        for severity in severities:
+            for drug_id, medication in ids.items():
+                # Each pair once, from its lower id
+                for other_id in _bits(self._neighbours(drug_id, severity) & regimen & ~((2 << drug_id) - 1)):
+                    interactions.append(Interaction(
+                        medication, ids[other_id], severity,
+                        self._monitoring.get((drug_id, other_id), "")
+                    ))
+
+        contraindications = []
+        for condition in conditions:
+            for drug_id in _bits(self._contraindicated.get(condition.lower(), 0) & regimen):
+                contraindications.append((ids[drug_id], condition))
+
+        return RegimenCheck(interactions, contraindications)
@@ -4,13 +4,25 @@ Medical Knowledge System with BCFI Integration, Belgian Drug Pronunciation, and
 
 import os
 import re
+import json
 import sqlite3
 import logging
 import requests
+import threading
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
+from .transcript_document import TranscriptDocument, build_transcript_document
+from .transcript_edits import EditProposal, apply_edits
+from .agent_cache import data_fingerprint
+from .drug_recognizer import DrugRecognizer
+from .drug_search import create_drug_search_index, search_drug_rows
+from .sqlite_pool import get_connection_pool
+from .formulary import (
+    KNOWLEDGE_DB_PATH, DRUGS_TABLE, DRUG_PATTERNS_TABLE, drug_recognition_patterns, get_formulary
+)
+
 # Import pronunciation and contextual systems
 try:
     from .belgian_drug_pronunciation import get_belgian_pronunciation_system
@@ -41,6 +53,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Tables the compiled drug recognizer is built from
+DRUG_CATALOG_TABLES = ['drugs', 'drug_patterns']
+
 @dataclass
 class Drug:
     """Drug information structure"""
@@ -66,8 +81,12 @@ class DocumentChunk:
 class MedicalKnowledgeSystem:
     """Main medical knowledge system"""
     
-    def __init__(self, db_path: str = "medical_knowledge.db"):
+    # Tokens on either side of a change that can complete a multi-word brand name
+    context_radius = 3
+    
+    def __init__(self, db_path: str = KNOWLEDGE_DB_PATH):
         self.db_path = db_path
+        self.db = get_connection_pool(db_path)
         self.chroma_client = None
         self.drug_collection = None
         self.document_collection = None
@@ -77,58 +96,56 @@ class MedicalKnowledgeSystem:
         if CHROMADB_AVAILABLE:
             self._init_chroma_db()
         
-        # Drug recognition patterns
+        # Drug recognition patterns, compiled for recognize_drugs_in_text
         self.drug_patterns = {}
-        self._load_drug_patterns()
+        self._recognizer = None
+        self._recognizer_version = None
+        self._recognizer_lock = threading.Lock()
+        self._drug_recognizer()
     
     def _init_sqlite_db(self):
         """Initialize SQLite database for structured data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Drugs table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS drugs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                generic_name TEXT UNIQUE NOT NULL,
-                brand_names TEXT,  -- JSON array
-                atc_code TEXT,
-                indications TEXT,
-                dosage_forms TEXT,  -- JSON array
-                contraindications TEXT,
-                interactions TEXT,
-                source TEXT DEFAULT 'manual',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Documents table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learned_documents (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                document_type TEXT NOT NULL,
-                patient_id TEXT,
-                department TEXT,
-                content_hash TEXT UNIQUE,
-                metadata TEXT,  -- JSON
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Drug recognition patterns
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS drug_patterns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pattern TEXT NOT NULL,
-                drug_id INTEGER,
-                pattern_type TEXT,  -- 'exact', 'prefix', 'suffix', 'contains'
-                FOREIGN KEY (drug_id) REFERENCES drugs (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as cursor:
+            # Drugs table, shared with the formulary
+            cursor.execute(DRUGS_TABLE)
+            
+            # Documents table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learned_documents (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    document_type TEXT NOT NULL,
+                    patient_id TEXT,
+                    department TEXT,
+                    content_hash TEXT UNIQUE,
+                    metadata TEXT,  -- JSON
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Drug recognition patterns
+            cursor.execute(DRUG_PATTERNS_TABLE)
+            
+            # Bumped by triggers in the same transaction as every change to drugs or patterns,
+            # by any connection, so the compiled recognizer knows when to recompile
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS drug_catalog_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO drug_catalog_state (id, version) VALUES (1, 0)')
+            for table in DRUG_CATALOG_TABLES:
+                for event in ['INSERT', 'UPDATE', 'DELETE']:
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS drug_catalog_{table}_{event.lower()}
+                        AFTER {event} ON {table}
+                        BEGIN
+                            UPDATE drug_catalog_state SET version = version + 1 WHERE id = 1;
+                        END
+                    ''')
+            
+            # Full-text index for search_drugs
+            self.drug_search_indexed = create_drug_search_index(cursor)
     
     def _init_chroma_db(self):
         """Initialize ChromaDB for vector storage"""
@@ -154,29 +171,49 @@ class MedicalKnowledgeSystem:
             logger.error(f"ChromaDB initialization failed: {e}")
             self.chroma_client = None
     
+    @property
+    def data_version(self) -> Optional[str]:
+        """Fingerprint of the drug, pattern and document tables.
+
+        Read from the database on every call, so drugs added by another instance or an
+        import also invalidate cached results. Both reads are index lookups: the catalog
+        version is bumped by triggers and documents are only ever appended.
+        """
+        try:
+            row = self.db.connection().execute(
+                'SELECT (SELECT version FROM drug_catalog_state WHERE id = 1), (SELECT MAX(id) FROM learned_documents)'
+            ).fetchone()
+            
+            return data_fingerprint([row])
+            
+        except Exception as e:
+            logger.error(f"Error reading knowledge data version: {e}")
+            return None
+    
     def add_drug(self, drug: Drug) -> bool:
         """Add a drug to the knowledge base"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO drugs 
-                (generic_name, brand_names, atc_code, indications, dosage_forms, contraindications, interactions, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                drug.generic_name,
-                json.dumps(drug.brand_names),
-                drug.atc_code,
-                drug.indications,
-                json.dumps(drug.dosage_forms),
-                drug.contraindications,
-                drug.interactions,
-                drug.source
-            ))
-            
-            drug_id = cursor.lastrowid
-            conn.commit()
+            # The drug and its recognition patterns are written together
+            with self.db.transaction() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO drugs 
+                    (generic_name, brand_names, atc_code, indications, dosage_forms, contraindications, interactions, source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    drug.generic_name,
+                    json.dumps(drug.brand_names),
+                    drug.atc_code,
+                    drug.indications,
+                    json.dumps(drug.dosage_forms),
+                    drug.contraindications,
+                    drug.interactions,
+                    drug.source
+                ))
+                
+                drug_id = cursor.lastrowid
+                
+                # Add recognition patterns; the catalog triggers have the recognizer recompiled
+                self._add_drug_patterns(cursor, drug_id, drug.generic_name, drug.brand_names)
             
             # Add to vector database
             if self.drug_collection:
@@ -191,56 +228,25 @@ class MedicalKnowledgeSystem:
                     ids=[f"drug_{drug_id}"]
                 )
             
-            # Add recognition patterns
-            self._add_drug_patterns(drug_id, drug.generic_name, drug.brand_names)
-            
-            conn.close()
             return True
             
         except Exception as e:
             logger.error(f"Error adding drug: {e}")
             return False
     
-    def _add_drug_patterns(self, drug_id: int, generic_name: str, brand_names: List[str]):
-        """Add recognition patterns for a drug"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        patterns = [
-            (generic_name.lower(), 'exact'),
-            (generic_name.lower()[:4], 'prefix') if len(generic_name) > 4 else None
-        ]
-        
-        for brand in brand_names:
-            patterns.extend([
-                (brand.lower(), 'exact'),
-                (brand.lower()[:4], 'prefix') if len(brand) > 4 else None
-            ])
-        
-        for pattern, pattern_type in patterns:
-            if pattern:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO drug_patterns (pattern, drug_id, pattern_type)
-                    VALUES (?, ?, ?)
-                ''', (pattern, drug_id, pattern_type))
-        
-        conn.commit()
-        conn.close()
+    def _add_drug_patterns(self, cursor: sqlite3.Cursor, drug_id: int, generic_name: str, brand_names: List[str]):
+        """Add recognition patterns for a drug, in the caller's transaction"""
+        cursor.executemany('''
+            INSERT OR IGNORE INTO drug_patterns (pattern, drug_id, pattern_type)
+            VALUES (?, ?, ?)
+        ''', [(pattern, drug_id, pattern_type) for pattern, pattern_type in drug_recognition_patterns(generic_name, brand_names)])
     
-    def search_drugs(self, query: str) -> List[Dict]:
-        """Search for drugs by name"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT generic_name, brand_names, atc_code, indications, source
-            FROM drugs 
-            WHERE generic_name LIKE ? OR brand_names LIKE ?
-            ORDER BY generic_name
-        ''', (f'%{query}%', f'%{query}%'))
+    def search_drugs(self, query: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Search for drugs by generic name, brand name or ATC code, best matches first"""
+        rows = search_drug_rows(self.db.connection(), query, limit, offset, self.drug_search_indexed)
         
         results = []
-        for row in cursor.fetchall():
+        for row in rows:
             results.append({
                 'generic_name': row[0],
                 'brand_names': json.loads(row[1]) if row[1] else [],
@@ -249,44 +255,41 @@ class MedicalKnowledgeSystem:
                 'source': row[4]
             })
         
-        conn.close()
         return results
     
-    def recognize_drugs_in_text(self, text: str) -> List[Dict]:
-        """Recognize drugs mentioned in text"""
-        recognized = []
-        text_lower = text.lower()
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get all drug patterns
-        cursor.execute('''
-            SELECT p.pattern, p.pattern_type, d.generic_name, d.brand_names, d.atc_code
-            FROM drug_patterns p
-            JOIN drugs d ON p.drug_id = d.id
-        ''')
+    def recognize_drugs_in_text(self, text: str, document: Optional[TranscriptDocument] = None) -> List[Dict]:
+        """Recognize drugs mentioned in text, with the spans each pattern matched"""
+        if document is None:
+            document = build_transcript_document(text)
         
-        for pattern, pattern_type, generic, brands, atc in cursor.fetchall():
-            if pattern_type == 'exact' and pattern in text_lower:
-                recognized.append({
-                    'found_text': pattern,
-                    'generic_name': generic,
-                    'brand_names': json.loads(brands) if brands else [],
-                    'atc_code': atc,
-                    'confidence': 0.9
-                })
-            elif pattern_type == 'prefix' and any(word.startswith(pattern) for word in text_lower.split()):
-                recognized.append({
-                    'found_text': pattern,
-                    'generic_name': generic,
-                    'brand_names': json.loads(brands) if brands else [],
-                    'atc_code': atc,
-                    'confidence': 0.7
-                })
+        return self._drug_recognizer().recognize(document)
+    
+    def _drug_recognizer(self) -> DrugRecognizer:
+        """The compiled patterns, recompiled once drugs or patterns changed.
+
+        The catalog version is shared by every connection, so add_drug and imports by
+        other workers show up, while an unchanged catalog costs one indexed read on
+        this thread's pooled connection.
+        """
+        version = self._catalog_version()
+        recognizer = self._recognizer
+        if recognizer is not None and (version is None or version == self._recognizer_version):
+            return recognizer
         
-        conn.close()
-        return recognized
+        with self._recognizer_lock:
+            if self._recognizer is None or (version is not None and version != self._recognizer_version):
+                self._load_drug_patterns()
+                self._recognizer_version = version
+            return self._recognizer or DrugRecognizer()
+    
+    def _catalog_version(self) -> Optional[int]:
+        """Version of the drugs and drug patterns; None when the database cannot be read"""
+        try:
+            row = self.db.connection().execute('SELECT version FROM drug_catalog_state WHERE id = 1').fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            logger.error(f"Error reading drug catalog version: {e}")
+            return None
     
     def learn_from_document(self, content: str, doc_type: str, patient_id: str = None, department: str = "General") -> Dict:
         """Learn from a medical document"""
@@ -296,9 +299,6 @@ class MedicalKnowledgeSystem:
             content_hash = hashlib.md5(content.encode()).hexdigest()
             
             # Store in SQLite
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             metadata = {
                 'document_type': doc_type,
                 'patient_id': patient_id,
@@ -307,15 +307,14 @@ class MedicalKnowledgeSystem:
                 'created_at': datetime.now().isoformat()
             }
             
-            cursor.execute('''
-                INSERT OR IGNORE INTO learned_documents 
-                (document_type, patient_id, department, content_hash, metadata)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (doc_type, patient_id, department, content_hash, json.dumps(metadata)))
-            
-            doc_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as cursor:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO learned_documents 
+                    (document_type, patient_id, department, content_hash, metadata)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (doc_type, patient_id, department, content_hash, json.dumps(metadata)))
+                
+                doc_id = cursor.lastrowid
             
             # Store in vector database
             if self.document_collection:
@@ -385,44 +384,74 @@ class MedicalKnowledgeSystem:
             logger.error(f"Knowledge base search error: {e}")
             return []
     
-    def enhance_transcription(self, transcript: str, patient_id: str = None) -> Dict:
+    def enhance_transcription(self, transcript: str, patient_id: str = None,
+                              document: Optional[TranscriptDocument] = None,
+                              regions: Optional[List[Tuple[int, int]]] = None) -> Dict:
         """Enhance transcription with drug recognition and knowledge base"""
         try:
+            if document is None:
+                document = build_transcript_document(transcript)
+            
             # Recognize drugs
-            drugs_found = self.recognize_drugs_in_text(transcript)
+            drugs_found = self.recognize_drugs_in_text(transcript, document)
             
             # Search for relevant context
             context_results = self.search_knowledge_base(transcript, limit=3)
             
-            # Enhance the transcript
-            enhanced_transcript = transcript
+            edit_proposals = []
             drug_corrections = []
             
-            # Apply drug corrections
+            # Build the proper drug name for every confident match
+            confident_drugs = []
             for drug in drugs_found:
                 if drug['confidence'] > 0.8:
-                    # Replace with proper drug name
-                    generic = drug['generic_name']
+                    correction = drug['generic_name']
                     brands = ', '.join(drug['brand_names'][:2])  # Show top 2 brands
-                    
-                    correction = f"{generic}"
                     if brands:
                         correction += f" ({brands})"
+                    confident_drugs.append((drug, correction))
+            
+            # Names already expanded in an earlier pass must not be expanded again
+            protected_spans = []
+            for _, correction in confident_drugs:
+                start = transcript.find(correction)
+                while start != -1:
+                    protected_spans.append((start, start + len(correction)))
+                    start = transcript.find(correction, start + 1)
+            
+            # Propose drug corrections at every occurrence
+            for drug, correction in confident_drugs:
+                for start, end in drug['spans']:
+                    if not document.is_token_span(start, end):
+                        continue
+                    if not document.span_in_regions(start, end, regions):
+                        continue
+                    if any(start < p_end and end > p_start for p_start, p_end in protected_spans):
+                        continue
                     
-                    enhanced_transcript = enhanced_transcript.replace(
-                        drug['found_text'], 
-                        correction
-                    )
+                    edit_proposals.append(EditProposal(
+                        offset=start,
+                        length=end - start,
+                        replacement=correction,
+                        confidence=drug['confidence'],
+                        agent='Knowledge System',
+                        original=transcript[start:end],
+                        reason=f"Known drug {drug['generic_name']} ({drug['atc_code']})"
+                    ))
                     drug_corrections.append({
                         'original': drug['found_text'],
                         'corrected': correction,
                         'atc_code': drug['atc_code']
                     })
             
+            # Apply all corrections in a single pass
+            enhanced_transcript = apply_edits(transcript, edit_proposals).text
+            
             return {
                 'enhanced_transcript': enhanced_transcript,
                 'drugs_found': drugs_found,
                 'drug_corrections': drug_corrections,
+                'edit_proposals': [proposal.to_dict() for proposal in edit_proposals],
                 'context_used': context_results,
                 'enhancement_applied': len(drug_corrections) > 0 or len(context_results) > 0
             }
@@ -433,32 +462,35 @@ class MedicalKnowledgeSystem:
                 'enhanced_transcript': transcript,
                 'drugs_found': [],
                 'drug_corrections': [],
+                'edit_proposals': [],
                 'context_used': [],
                 'enhancement_applied': False,
                 'error': str(e)
             }
     
-    def _load_drug_patterns(self):
-        """Load drug recognition patterns from database"""
+    def _load_drug_patterns(self) -> DrugRecognizer:
+        """Load drug recognition patterns from database and compile them"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT p.pattern, p.pattern_type, d.generic_name
+            cursor = self.db.connection().execute('''
+                SELECT p.pattern, p.pattern_type, d.generic_name, d.brand_names, d.atc_code
                 FROM drug_patterns p
                 JOIN drugs d ON p.drug_id = d.id
+                ORDER BY p.id
             ''')
             
-            for pattern, pattern_type, generic in cursor.fetchall():
-                if pattern_type not in self.drug_patterns:
-                    self.drug_patterns[pattern_type] = {}
-                self.drug_patterns[pattern_type][pattern] = generic
+            rows = []
+            drug_patterns = {}
+            for pattern, pattern_type, generic, brands, atc in cursor.fetchall():
+                rows.append((pattern, pattern_type, generic, json.loads(brands) if brands else [], atc))
+                drug_patterns.setdefault(pattern_type, {})[pattern] = generic
             
-            conn.close()
+            self.drug_patterns = drug_patterns
+            self._recognizer = DrugRecognizer(rows)
+            return self._recognizer
             
         except Exception as e:
             logger.error(f"Error loading drug patterns: {e}")
+            return self._recognizer or DrugRecognizer()
     
     def import_from_bcfi(self, category_url: str = "/nl/chapters/1?frag=") -> Dict:
         """Import drugs from BCFI.be (Belgian drug database)"""
@@ -539,8 +571,7 @@ class MedicalKnowledgeSystem:
     def get_stats(self) -> Dict:
         """Get knowledge base statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self.db.connection().cursor()
             
             cursor.execute('SELECT COUNT(*) FROM drugs')
             drug_count = cursor.fetchone()[0]
@@ -558,8 +589,6 @@ class MedicalKnowledgeSystem:
                 except:
                     pass
             
-            conn.close()
-            
             # ChromaDB stats
             knowledge_chunks = 0
             if self.document_collection:
@@ -585,52 +614,13 @@ class MedicalKnowledgeSystem:
             }
 
 def initialize_belgian_medical_system() -> MedicalKnowledgeSystem:
-    """Initialize the medical knowledge system with some basic Belgian drugs"""
-    system = MedicalKnowledgeSystem()
-    
-    # Add some common Belgian cardiovascular drugs
-    common_drugs = [
-        Drug(
-            generic_name="Bisoprolol",
-            brand_names=["Bisoprolol EG", "Bisoblock", "Bisoprolol Mylan"],
-            atc_code="C07AB07",
-            indications="Hypertensie, angina pectoris, hartfalen",
-            dosage_forms=["tablet 2.5mg", "tablet 5mg", "tablet 10mg"]
-        ),
-        Drug(
-            generic_name="Rivaroxaban",
-            brand_names=["Xarelto"],
-            atc_code="B01AF01",
-            indications="Anticoagulatie, VTE preventie",
-            dosage_forms=["tablet 10mg", "tablet 15mg", "tablet 20mg"]
-        ),
-        Drug(
-            generic_name="Atorvastatine",
-            brand_names=["Lipitor", "Atorvastatine EG", "Atorvastatine Mylan"],
-            atc_code="C10AA05",
-            indications="Hypercholesterolemie, cardiovasculaire preventie",
-            dosage_forms=["tablet 10mg", "tablet 20mg", "tablet 40mg", "tablet 80mg"]
-        ),
-        Drug(
-            generic_name="Metoprolol",
-            brand_names=["Seloken", "Metoprolol EG"],
-            atc_code="C07AB02",
-            indications="Hypertensie, angina pectoris, hartfalen, post-MI",
-            dosage_forms=["tablet 25mg", "tablet 50mg", "tablet 100mg"]
-        ),
-        Drug(
-            generic_name="Amlodipine",
-            brand_names=["Norvasc", "Amlodipine EG"],
-            atc_code="C08CA01",
-            indications="Hypertensie, angina pectoris",
-            dosage_forms=["tablet 5mg", "tablet 10mg"]
-        )
-    ]
+    """Initialize the medical knowledge system with the Belgian drugs of the formulary"""
     
-    for drug in common_drugs:
-        system.add_drug(drug)
+    # The formulary seeds its drugs and their recognition patterns into a new database
+    formulary = get_formulary(KNOWLEDGE_DB_PATH).compiled()
+    system = MedicalKnowledgeSystem()
     
-    logger.info(f"Initialized medical knowledge system with {len(common_drugs)} drugs")
+    logger.info(f"Initialized medical knowledge system with {len(formulary.drugs)} drugs")
     return system
 
 # Global instance
@@ -3,12 +3,18 @@ Multi-Agent Orchestrator
 Coordinates multiple AI agents with iterative feedback for intelligent medical transcription
 """
 
+import re
+import time
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
-from datetime import datetime
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, field
 import json
 
+from .agent_scheduler import AgentScheduler, AgentTask
+from .agent_cache import get_agent_cache
+from .agent_metrics import get_metrics_registry
+
 # Import all agent systems
 try:
     from .odd_words_detector import get_odd_words_detector
@@ -16,6 +22,8 @@ try:
     from .contextual_drug_selector import get_contextual_drug_selector, DrugContext
     from .medical_knowledge_system import get_knowledge_system
     from .claude_medical_validator import ClaudeMedicalValidator
+    from .transcript_document import build_transcript_document
+    from .transcript_edits import EditProposal, apply_edits, map_spans
     AGENTS_AVAILABLE = True
 except ImportError as e:
     AGENTS_AVAILABLE = False
@@ -33,6 +41,11 @@ class AgentResult:
     processing_time: float
     suggestions: List[str]
     warnings: List[str]
+    cache_hit: bool = False
+    cpu_time: float = 0.0
+    input_size: int = 0  # Tokens analyzed
+    corrections_proposed: int = 0
+    corrections_accepted: int = 0
 
 @dataclass
 class IterationResult:
@@ -43,6 +56,13 @@ class IterationResult:
     overall_confidence: float
     improvements_made: List[str]
     convergence_score: float
+    edit_audit: List[Dict] = field(default_factory=list)
+    dirty_spans: List[Tuple[int, int]] = field(default_factory=list)
+    settled_spans: List[Tuple[int, int]] = field(default_factory=list)
+    tokens_analyzed: int = 0
+    agent_timings: Dict[str, float] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    wall_time: float = 0.0
 
 class MultiAgentOrchestrator:
     """Orchestrates multiple agents with iterative feedback"""
@@ -52,6 +72,16 @@ class MultiAgentOrchestrator:
         self.agents = {}
         self.max_iterations = 5
         self.convergence_threshold = 0.95
+        # Re-run agents only around spans changed by the previous iteration
+        self.incremental_processing = True
+        self.scheduler = AgentScheduler(max_workers=4)
+        # Unchanged transcripts return memoized agent results
+        self.cache_results = True
+        self.result_cache = get_agent_cache()
+        self.metrics = get_metrics_registry()
+        # 'final': validate remotely once local agents converged; 'every_iteration': validate each pass
+        self.validation_policy = 'final'
+        self.max_validation_rounds = 2
         self._initialize_agents()
     
     def _initialize_agents(self):
@@ -98,6 +128,12 @@ class MultiAgentOrchestrator:
             iterations = []
             current_transcript = original_transcript
             previous_confidence = 0.0
+            dirty_spans = None  # The whole transcript is dirty on the first pass
+            settled_spans = []  # Text written by earlier edits
+            validate_each_iteration = self.validation_policy == 'every_iteration'
+            remote_validations = 0  # Successful calls only
+            validation_failures = 0
+            validated_transcript = None
             
             logger.info(f"Starting multi-agent processing for transcript: {original_transcript[:100]}...")
             
@@ -110,25 +146,70 @@ class MultiAgentOrchestrator:
                     patient_id, 
                     medical_context, 
                     department,
-                    iteration + 1
+                    iteration + 1,
+                    dirty_spans,
+                    settled_spans,
+                    include_validator=validate_each_iteration
                 )
                 
                 iterations.append(iteration_result)
+                if validate_each_iteration and 'claude_validator' in self.agents:
+                    if any(result.agent_name == 'Claude Medical Validator' for result in iteration_result.agent_results):
+                        remote_validations += 1
+                    else:
+                        validation_failures += 1
                 
                 # Update transcript with improvements
+                settled_spans = iteration_result.settled_spans
                 if iteration_result.improvements_made:
                     current_transcript = iteration_result.transcript_version
                     logger.info(f"Iteration {iteration + 1}: Made {len(iteration_result.improvements_made)} improvements")
                 
                 # Check for convergence
-                confidence_improvement = iteration_result.overall_confidence - previous_confidence
-                
-                if (iteration_result.overall_confidence >= self.convergence_threshold or
-                    confidence_improvement < 0.05):  # Minimal improvement
-                    logger.info(f"Converged after {iteration + 1} iterations")
-                    break
+                converged = (iteration_result.overall_confidence >= self.convergence_threshold or
+                             iteration_result.overall_confidence - previous_confidence < 0.05)  # Minimal improvement
+                if self.incremental_processing:
+                    # Only text near changed spans can yield new findings
+                    dirty_spans = iteration_result.dirty_spans
+                    converged = converged or not dirty_spans
                 
                 previous_confidence = iteration_result.overall_confidence
+                
+                if not converged:
+                    continue
+                
+                logger.info(f"Converged after {iteration + 1} iterations")
+                
+                # Local agents settled: validate remotely once, and re-enter the loop only
+                # when the validator asks for concrete corrections
+                if self._should_validate_converged(validate_each_iteration, remote_validations + validation_failures):
+                    validator_spans = self._validate_converged_transcript(
+                        iteration_result, patient_id, department, settled_spans
+                    )
+                    if validator_spans is None:
+                        validation_failures += 1
+                    else:
+                        remote_validations += 1
+                    validated_transcript = iteration_result.transcript_version
+                    current_transcript = iteration_result.transcript_version
+                    settled_spans = iteration_result.settled_spans
+                    
+                    if validator_spans:
+                        logger.info(f"Validator requested {len(validator_spans)} corrections - re-entering agent loop")
+                        dirty_spans = validator_spans if self.incremental_processing else None
+                        previous_confidence = 0.0
+                        continue
+                
+                break
+            
+            # Iteration budget exhausted before convergence: the final transcript is still validated once
+            if (self._should_validate_converged(validate_each_iteration, remote_validations + validation_failures) and
+                    iterations and validated_transcript != current_transcript):
+                if self._validate_converged_transcript(iterations[-1], patient_id, department, settled_spans,
+                                                       apply_corrections=False) is None:
+                    validation_failures += 1
+                else:
+                    remote_validations += 1
             
             # Generate final summary
             total_improvements = sum(len(iter_result.improvements_made) for iter_result in iterations)
@@ -146,12 +227,34 @@ class MultiAgentOrchestrator:
                         'iteration': ir.iteration_number,
                         'confidence': ir.overall_confidence,
                         'improvements': len(ir.improvements_made),
-                        'agents_used': len(ir.agent_results)
+                        'agents_used': len(ir.agent_results),
+                        'tokens_analyzed': ir.tokens_analyzed,
+                        'wall_time': ir.wall_time,
+                        'agent_timings': ir.agent_timings,
+                        'critical_path': ir.critical_path,
+                        'agent_metrics': {
+                            result.agent_name: {
+                                'wall_time': result.processing_time,
+                                'cpu_time': result.cpu_time,
+                                'input_tokens': result.input_size,
+                                'corrections_proposed': result.corrections_proposed,
+                                'corrections_accepted': result.corrections_accepted,
+                                'cache_hit': result.cache_hit
+                            } for result in ir.agent_results
+                        }
                     } for ir in iterations
                 ],
                 'total_improvements': total_improvements,
                 'final_confidence': final_confidence,
                 'agent_feedback': agent_feedback,
+                'edit_diff': [entry for ir in iterations for entry in ir.edit_audit],
+                'validation_policy': self.validation_policy,
+                'remote_validations': remote_validations,
+                'remote_validation_failures': validation_failures,
+                # Calls an every-iteration policy would have made for the same passes, less those attempted
+                'remote_validations_saved': max(
+                    len(iterations) - remote_validations - validation_failures, 0
+                ) if 'claude_validator' in self.agents else 0,
                 'processing_successful': True
             }
             
@@ -171,146 +274,432 @@ class MultiAgentOrchestrator:
                            patient_id: str, 
                            medical_context: str, 
                            department: str,
-                           iteration_number: int) -> IterationResult:
-        """Run one iteration of all agents"""
+                           iteration_number: int,
+                           dirty_spans: Optional[List[Tuple[int, int]]] = None,
+                           settled_spans: Optional[List[Tuple[int, int]]] = None,
+                           include_validator: bool = True) -> IterationResult:
+        """Run one iteration of all agents, restricted to windows around dirty spans when given"""
         
-        agent_results = []
-        current_transcript = transcript
-        improvements_made = []
+        # Every agent reads the same tokenized transcript and proposes span edits
+        document = build_transcript_document(transcript)
+        settled_spans = settled_spans or []
         
-        # 1. Odd Words Detection Agent
-        if 'odd_words_detector' in self.agents:
-            start_time = datetime.now()
-            try:
-                odd_result = self.agents['odd_words_detector'].process_transcript_for_odd_words(
-                    current_transcript, medical_context
+        # Token windows each agent has to re-analyze (None means the whole transcript)
+        regions = {
+            name: self._agent_regions(agent, document, dirty_spans)
+            for name, agent in self.agents.items()
+        }
+        
+        # Analyzers only read the document, so they run concurrently; the validator checks
+        # the transcript this iteration started from, overlapping its latency with local work
+        schedule = self.scheduler.run(self._build_agent_tasks(settled_spans, include_validator), {
+            'transcript': transcript,
+            'document': document,
+            'regions': regions,
+            'patient_id': patient_id,
+            'medical_context': medical_context,
+            'department': department,
+            'iteration': iteration_number
+        })
+        
+        agent_results = schedule.collect('agent_results')
+        edit_result = schedule.collect('edited_transcript')
+        if edit_result:
+            edit_result = edit_result[0]
+        else:
+            edit_result = apply_edits(transcript, [])
+        current_transcript = edit_result.text
+        improvements_made = [
+            f"{edit.agent}: '{edit.original}' → '{edit.replacement}'"
+            for edit in edit_result.applied
+        ]
+        
+        self._record_agent_metrics(agent_results, edit_result.applied)
+        
+        # Calculate overall confidence and convergence
+        overall_confidence = self._calculate_overall_confidence(agent_results)
+        convergence_score = self._calculate_convergence_score(current_transcript, transcript)
+        
+        return IterationResult(
+            iteration_number=iteration_number,
+            transcript_version=current_transcript,
+            agent_results=agent_results,
+            overall_confidence=overall_confidence,
+            improvements_made=improvements_made,
+            convergence_score=convergence_score,
+            edit_audit=[dict(entry, iteration=iteration_number) for entry in edit_result.audit_log],
+            dirty_spans=edit_result.new_spans,
+            settled_spans=map_spans(settled_spans, edit_result) + edit_result.new_spans,
+            tokens_analyzed=sum(self._input_tokens(document, agent_regions) for agent_regions in regions.values()),
+            agent_timings={name: timing.wall_time for name, timing in schedule.timings.items()},
+            critical_path=schedule.critical_path,
+            wall_time=schedule.wall_time
+        )
+    
+    def _build_agent_tasks(self, settled_spans: List[Tuple[int, int]], include_validator: bool = True) -> List[AgentTask]:
+        """Declare what each available agent reads and writes for the scheduler"""
+        
+        analyzers = [
+            ('odd_words_detector', self._run_odd_words_detector),
+            ('pronunciation_system', self._run_pronunciation_system),
+            ('knowledge_system', self._run_knowledge_system)
+        ]
+        
+        tasks = [
+            AgentTask(
+                name=name,
+                run=run,
+                reads=('transcript', 'document', 'regions', 'patient_id', 'medical_context'),
+                writes=('agent_results', 'edit_proposals')
+            )
+            for name, run in analyzers if name in self.agents
+        ]
+        
+        # Deterministic merge point: conflicts are resolved on confidence, span and agent,
+        # never on the order in which the analyzers finished
+        tasks.append(AgentTask(
+            name='edit_resolution',
+            run=lambda inputs: {'edited_transcript': apply_edits(
+                inputs['transcript'],
+                [EditProposal.from_dict(p) for proposals in inputs['edit_proposals'] for p in proposals],
+                settled_spans
+            )},
+            reads=('transcript', 'edit_proposals'),
+            writes=('edited_transcript',)
+        ))
+        
+        if include_validator and 'claude_validator' in self.agents:
+            tasks.append(AgentTask(
+                name='claude_validator',
+                run=self._run_claude_validator,
+                reads=('transcript', 'document', 'patient_id', 'department', 'iteration'),
+                writes=('agent_results',),
+                remote=True
+            ))
+        
+        return tasks
+    
+    def _run_odd_words_detector(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Odd Words Detection Agent"""
+        
+        start_time = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            agent = self.agents['odd_words_detector']
+            regions = inputs['regions']['odd_words_detector']
+            odd_result, cache_hit = self._cached_agent_call(
+                'odd_words_detector', agent, inputs['transcript'], (inputs['medical_context'], regions),
+                lambda: agent.process_transcript_for_odd_words(
+                    inputs['transcript'], inputs['medical_context'], inputs['document'], regions
                 )
-                
-                processing_time = (datetime.now() - start_time).total_seconds()
-                
-                if odd_result.get('corrections_made'):
-                    current_transcript = odd_result['corrected_transcript']
-                    improvements_made.extend([
-                        f"Corrected '{corr['original']}' to '{corr['corrected']}'"
-                        for corr in odd_result['corrections_made']
-                    ])
-                
-                agent_results.append(AgentResult(
+            )
+            
+            processing_time = time.perf_counter() - start_time
+            cpu_time = time.thread_time() - start_cpu
+            
+            return {
+                'edit_proposals': odd_result.get('edit_proposals', []),
+                'agent_results': AgentResult(
                     agent_name='Odd Words Detector',
-                    success=True,
+                    success='error' not in odd_result,
                     confidence=0.8 if odd_result.get('corrections_made') else 0.9,
                     output=odd_result,
                     processing_time=processing_time,
                     suggestions=[corr['corrected'] for corr in odd_result.get('corrections_made', [])],
-                    warnings=[]
-                ))
-                
-            except Exception as e:
-                logger.error(f"Odd words detector error: {e}")
+                    warnings=[],
+                    cache_hit=cache_hit,
+                    cpu_time=cpu_time,
+                    input_size=self._input_tokens(inputs['document'], regions),
+                    corrections_proposed=len(odd_result.get('edit_proposals', []))
+                )
+            }
+            
+        except Exception as e:
+            logger.error(f"Odd words detector error: {e}")
+            self.metrics.record(
+                'Odd Words Detector', time.perf_counter() - start_time, time.thread_time() - start_cpu,
+                self._input_tokens(inputs['document'], inputs['regions']['odd_words_detector']), success=False
+            )
+            return {}
+    
+    def _run_pronunciation_system(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Belgian Pronunciation Agent"""
         
-        # 2. Belgian Pronunciation Agent
-        if 'pronunciation_system' in self.agents:
-            start_time = datetime.now()
-            try:
-                pronunciation_result = self.agents['pronunciation_system'].enhance_drug_recognition(
-                    current_transcript, medical_context
+        start_time = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            agent = self.agents['pronunciation_system']
+            regions = inputs['regions']['pronunciation_system']
+            pronunciation_result, cache_hit = self._cached_agent_call(
+                'pronunciation_system', agent, inputs['transcript'], (inputs['medical_context'], regions),
+                lambda: agent.enhance_drug_recognition(
+                    inputs['transcript'], inputs['medical_context'], inputs['document'], regions
                 )
-                
-                processing_time = (datetime.now() - start_time).total_seconds()
-                
-                if pronunciation_result.get('enhancement_applied'):
-                    current_transcript = pronunciation_result['enhanced_transcript']
-                    improvements_made.extend([
-                        f"Drug pronunciation: '{corr['original']}' → '{corr['corrected']}'"
-                        for corr in pronunciation_result.get('drug_corrections', [])
-                    ])
-                
-                agent_results.append(AgentResult(
+            )
+            
+            processing_time = time.perf_counter() - start_time
+            cpu_time = time.thread_time() - start_cpu
+            
+            return {
+                'edit_proposals': pronunciation_result.get('edit_proposals', []),
+                'agent_results': AgentResult(
                     agent_name='Belgian Pronunciation',
-                    success=True,
+                    success='error' not in pronunciation_result,
                     confidence=0.85 if pronunciation_result.get('enhancement_applied') else 0.9,
                     output=pronunciation_result,
                     processing_time=processing_time,
                     suggestions=[corr['corrected'] for corr in pronunciation_result.get('drug_corrections', [])],
-                    warnings=[]
-                ))
-                
-            except Exception as e:
-                logger.error(f"Pronunciation system error: {e}")
+                    warnings=[],
+                    cache_hit=cache_hit,
+                    cpu_time=cpu_time,
+                    input_size=self._input_tokens(inputs['document'], regions),
+                    corrections_proposed=len(pronunciation_result.get('edit_proposals', []))
+                )
+            }
+            
+        except Exception as e:
+            logger.error(f"Pronunciation system error: {e}")
+            self.metrics.record(
+                'Belgian Pronunciation', time.perf_counter() - start_time, time.thread_time() - start_cpu,
+                self._input_tokens(inputs['document'], inputs['regions']['pronunciation_system']), success=False
+            )
+            return {}
+    
+    def _run_knowledge_system(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Knowledge System Enhancement"""
         
-        # 3. Knowledge System Enhancement
-        if 'knowledge_system' in self.agents:
-            start_time = datetime.now()
-            try:
-                knowledge_result = self.agents['knowledge_system'].enhance_transcription(
-                    current_transcript, patient_id
+        start_time = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            agent = self.agents['knowledge_system']
+            regions = inputs['regions']['knowledge_system']
+            knowledge_result, cache_hit = self._cached_agent_call(
+                'knowledge_system', agent, inputs['transcript'], (inputs['patient_id'], regions),
+                lambda: agent.enhance_transcription(
+                    inputs['transcript'], inputs['patient_id'], inputs['document'], regions
                 )
-                
-                processing_time = (datetime.now() - start_time).total_seconds()
-                
-                if knowledge_result.get('enhancement_applied'):
-                    current_transcript = knowledge_result['enhanced_transcript']
-                    improvements_made.extend([
-                        f"Knowledge enhancement: {len(knowledge_result.get('drug_corrections', []))} drug corrections"
-                    ])
-                
-                agent_results.append(AgentResult(
+            )
+            
+            processing_time = time.perf_counter() - start_time
+            cpu_time = time.thread_time() - start_cpu
+            
+            return {
+                'edit_proposals': knowledge_result.get('edit_proposals', []),
+                'agent_results': AgentResult(
                     agent_name='Knowledge System',
-                    success=True,
+                    success='error' not in knowledge_result,
                     confidence=0.9 if knowledge_result.get('enhancement_applied') else 0.8,
                     output=knowledge_result,
                     processing_time=processing_time,
                     suggestions=[],
-                    warnings=[]
-                ))
-                
-            except Exception as e:
-                logger.error(f"Knowledge system error: {e}")
+                    warnings=[],
+                    cache_hit=cache_hit,
+                    cpu_time=cpu_time,
+                    input_size=self._input_tokens(inputs['document'], regions),
+                    corrections_proposed=len(knowledge_result.get('edit_proposals', []))
+                )
+            }
+            
+        except Exception as e:
+            logger.error(f"Knowledge system error: {e}")
+            self.metrics.record(
+                'Knowledge System', time.perf_counter() - start_time, time.thread_time() - start_cpu,
+                self._input_tokens(inputs['document'], inputs['regions']['knowledge_system']), success=False
+            )
+            return {}
+    
+    def _run_claude_validator(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Claude Medical Validator"""
         
-        # 4. Claude Medical Validator (final validation)
-        if 'claude_validator' in self.agents:
-            start_time = datetime.now()
+        start_time = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            report = {
+                'type': 'transcript',
+                'content': inputs['transcript'],
+                'patient_id': inputs['patient_id'],
+                'department': inputs['department'],
+                'iteration': inputs['iteration']
+            }
+            
+            # The validator is async; scheduler tasks run on worker threads, each with its own loop
+            loop = asyncio.new_event_loop()
             try:
-                claude_result = self.agents['claude_validator'].validate_medical_content(
-                    current_transcript, 
-                    context={
-                        'patient_id': patient_id,
-                        'department': department,
-                        'iteration': iteration_number
-                    }
+                claude_result = loop.run_until_complete(
+                    self.agents['claude_validator'].validate_medical_logic(report, inputs['transcript'])
                 )
-                
-                processing_time = (datetime.now() - start_time).total_seconds()
-                
-                warnings = []
-                if not claude_result.get('is_valid', True):
-                    warnings.extend(claude_result.get('issues', []))
-                
-                agent_results.append(AgentResult(
+            finally:
+                loop.close()
+            
+            # The validator reports an unreachable service instead of raising
+            if 'error' in claude_result:
+                raise RuntimeError(claude_result['error'])
+            
+            processing_time = time.perf_counter() - start_time
+            cpu_time = time.thread_time() - start_cpu
+            
+            warnings = []
+            if not claude_result.get('passed', True):
+                warnings.extend(
+                    issue.get('description', '') if isinstance(issue, dict) else str(issue)
+                    for issue in claude_result.get('issues', [])
+                )
+            
+            return {
+                'agent_results': AgentResult(
                     agent_name='Claude Medical Validator',
-                    success=claude_result.get('is_valid', True),
-                    confidence=claude_result.get('confidence', 0.8),
+                    success=True,
+                    confidence=float(claude_result.get('confidence_score', 80)) / 100,
                     output=claude_result,
                     processing_time=processing_time,
                     suggestions=claude_result.get('suggestions', []),
-                    warnings=warnings
+                    warnings=warnings,
+                    cpu_time=cpu_time,
+                    input_size=self._input_tokens(inputs['document'], None)
+                )
+            }
+            
+        except Exception as e:
+            logger.error(f"Claude validator error: {e}")
+            self.metrics.record(
+                'Claude Medical Validator', time.perf_counter() - start_time, time.thread_time() - start_cpu,
+                self._input_tokens(inputs['document'], None), success=False
+            )
+            return {}
+    
+    def _should_validate_converged(self, validate_each_iteration: bool, attempts: int) -> bool:
+        """Whether the final-only policy still has a remote validation round left; failed calls use up a round"""
+        return (
+            not validate_each_iteration and
+            self.validation_policy == 'final' and
+            'claude_validator' in self.agents and
+            attempts < self.max_validation_rounds
+        )
+    
+    def _validate_converged_transcript(self, iteration_result: IterationResult, patient_id: str, department: str,
+                                       settled_spans: List[Tuple[int, int]],
+                                       apply_corrections: bool = True) -> Optional[List[Tuple[int, int]]]:
+        """Validate the converged transcript remotely and apply the corrections it names.
+        
+        The validator result and its edits are recorded on the iteration that converged.
+        Returns the spans of the applied corrections, which the local agents re-check,
+        or None when the validation call failed.
+        """
+        
+        transcript = iteration_result.transcript_version
+        validation = self._run_claude_validator({
+            'transcript': transcript,
+            'document': build_transcript_document(transcript),
+            'patient_id': patient_id,
+            'department': department,
+            'iteration': iteration_result.iteration_number
+        }).get('agent_results')
+        
+        if validation is None:
+            return None
+        
+        iteration_result.agent_results.append(validation)
+        iteration_result.overall_confidence = self._calculate_overall_confidence(iteration_result.agent_results)
+        
+        if not apply_corrections:
+            self._record_agent_metrics([validation], [])
+            return []
+        
+        proposals = self._validator_edit_proposals(transcript, validation)
+        validation.corrections_proposed = len(proposals)
+        edit_result = apply_edits(transcript, proposals, settled_spans)
+        self._record_agent_metrics([validation], edit_result.applied)
+        if not edit_result.changed:
+            return []
+        
+        iteration_result.transcript_version = edit_result.text
+        iteration_result.improvements_made.extend([
+            f"{edit.agent}: '{edit.original}' → '{edit.replacement}'"
+            for edit in edit_result.applied
+        ])
+        iteration_result.edit_audit.extend([
+            dict(entry, iteration=iteration_result.iteration_number) for entry in edit_result.audit_log
+        ])
+        iteration_result.settled_spans = map_spans(settled_spans, edit_result) + edit_result.new_spans
+        
+        return edit_result.new_spans
+    
+    def _validator_edit_proposals(self, transcript: str, validation: AgentResult) -> List[EditProposal]:
+        """Turn validator suggestions into edits.
+        
+        Suggestions are {issue, original, correction, rationale}; only those quoting the
+        words they replace, found verbatim in the transcript, are actionable. Free-text
+        advice without 'original' stays a suggestion for the reviewer.
+        """
+        
+        document = build_transcript_document(transcript)
+        proposals = []
+        
+        for suggestion in validation.suggestions:
+            if not isinstance(suggestion, dict):
+                continue
+            original = (suggestion.get('original') or '').strip()
+            correction = (suggestion.get('correction') or '').strip()
+            if not original or not correction or original == correction:
+                continue
+            
+            for start, end in document.find_phrase(original.lower()):
+                proposals.append(EditProposal(
+                    offset=start,
+                    length=end - start,
+                    replacement=correction,
+                    confidence=validation.confidence,
+                    agent=validation.agent_name,
+                    original=transcript[start:end],
+                    reason=suggestion.get('rationale', '')
                 ))
-                
-            except Exception as e:
-                logger.error(f"Claude validator error: {e}")
         
-        # Calculate overall confidence and convergence
-        overall_confidence = self._calculate_overall_confidence(agent_results)
-        convergence_score = self._calculate_convergence_score(current_transcript, transcript)
+        return proposals
+    
+    def _input_tokens(self, document, regions: Optional[List[Tuple[int, int]]]) -> int:
+        """Number of tokens an agent analyzes within its regions"""
+        if regions is None:
+            return len(document)
+        return sum(last - first for first, last in regions)
+    
+    def _record_agent_metrics(self, agent_results: List[AgentResult], applied: List[EditProposal]):
+        """Count each agent's applied corrections and export its invocation metrics"""
         
-        return IterationResult(
-            iteration_number=iteration_number,
-            transcript_version=current_transcript,
-            agent_results=agent_results,
-            overall_confidence=overall_confidence,
-            improvements_made=improvements_made,
-            convergence_score=convergence_score
-        )
+        accepted = {}
+        for edit in applied:
+            accepted[edit.agent] = accepted.get(edit.agent, 0) + 1
+        
+        for result in agent_results:
+            result.corrections_accepted = accepted.get(result.agent_name, 0)
+            self.metrics.record(
+                result.agent_name,
+                result.processing_time,
+                result.cpu_time,
+                result.input_size,
+                result.corrections_proposed,
+                result.corrections_accepted,
+                result.cache_hit,
+                result.success
+            )
+    
+    def _cached_agent_call(self, operation: str, agent: Any, text: str, context: Any,
+                           compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run an agent call through the result cache; agents without a data version are never cached"""
+        
+        data_version = getattr(agent, 'data_version', None)
+        if not self.cache_results or data_version is None:
+            return compute(), False
+        
+        return self.result_cache.get_or_compute(operation, data_version, text, context, compute)
+    
+    def _agent_regions(self, agent: Any, document, dirty_spans: Optional[List[Tuple[int, int]]]) -> Optional[List[Tuple[int, int]]]:
+        """Token windows an agent must re-analyze, based on the context radius it declares"""
+        
+        radius = getattr(agent, 'context_radius', None)
+        if dirty_spans is None or radius is None:
+            return None
+        
+        return document.regions_around(dirty_spans, radius)
     
     def _calculate_overall_confidence(self, agent_results: List[AgentResult]) -> float:
         """Calculate overall confidence from all agent results"""
@@ -421,6 +810,38 @@ class MultiAgentOrchestrator:
             }
         }
         
+        # Per-agent totals for this job
+        for iter_data in iterations:
+            for agent_name, metrics in iter_data.get('agent_metrics', {}).items():
+                performance = insights['agent_performance'].setdefault(agent_name, {
+                    'invocations': 0,
+                    'wall_time': 0.0,
+                    'cpu_time': 0.0,
+                    'input_tokens': 0,
+                    'corrections_proposed': 0,
+                    'corrections_accepted': 0,
+                    'cache_hits': 0
+                })
+                performance['invocations'] += 1
+                performance['wall_time'] += metrics['wall_time']
+                performance['cpu_time'] += metrics['cpu_time']
+                performance['input_tokens'] += metrics['input_tokens']
+                performance['corrections_proposed'] += metrics['corrections_proposed']
+                performance['corrections_accepted'] += metrics['corrections_accepted']
+                performance['cache_hits'] += int(metrics['cache_hit'])
+        
+        total_wall_time = sum(perf['wall_time'] for perf in insights['agent_performance'].values())
+        for performance in insights['agent_performance'].values():
+            performance['wall_time_share'] = performance['wall_time'] / total_wall_time if total_wall_time else 0.0
+        
+        if insights['agent_performance']:
+            insights['processing_efficiency']['slowest_agent'] = max(
+                insights['agent_performance'], key=lambda name: insights['agent_performance'][name]['wall_time']
+            )
+        
+        # Process-wide view across all jobs since startup
+        insights['process_metrics'] = self.metrics.summary()
+        
         return insights
     
     def validate_final_output(self, transcript: str, context: Dict) -> Dict:
@@ -434,21 +855,27 @@ class MultiAgentOrchestrator:
         }
         
         try:
+            document = build_transcript_document(transcript)
+            
             # Check for remaining odd words
             if 'odd_words_detector' in self.agents:
-                odd_check = self.agents['odd_words_detector'].detect_odd_words(transcript)
+                agent = self.agents['odd_words_detector']
+                odd_check, _ = self._cached_agent_call(
+                    'odd_words_detector.detect', agent, transcript, None,
+                    lambda: agent.detect_odd_words(transcript, document=document)
+                )
                 if odd_check:
                     validation_result['issues'].append(f"Still contains {len(odd_check)} potentially odd words")
                     validation_result['confidence'] *= 0.9
             
             # Check medical coherence
-            medical_terms = re.findall(r'\b\w+(?:ol|pril|sartan|statin|dipine|ide)\b', transcript.lower())
+            drug_name = re.compile(r'\w+(?:ol|pril|sartan|statin|dipine|ide)')
+            medical_terms = [word for word in document.normalized_words if drug_name.fullmatch(word)]
             if medical_terms:
                 validation_result['suggestions'].append(f"Identified {len(medical_terms)} potential drug names")
             
             # Check for incomplete sentences
-            sentences = transcript.split('.')
-            incomplete_sentences = [s.strip() for s in sentences if s.strip() and len(s.strip().split()) < 3]
+            incomplete_sentences = [s for s in document.sentences if s.token_count < 3]
             if incomplete_sentences:
                 validation_result['issues'].append(f"{len(incomplete_sentences)} potentially incomplete sentences")
                 validation_result['confidence'] *= 0.95
@@ -6,13 +6,72 @@ Part of the multi-agent iterative feedback system
 
 import re
 import logging
-from typing import Dict, List, Tuple, Optional
+import numpy as np
+from typing import Dict, List, Sequence, Tuple, Optional
 from dataclasses import dataclass
 import sqlite3
 from collections import Counter
 
+from .transcript_document import TranscriptDocument, build_transcript_document
+from .transcript_edits import EditProposal, apply_edits
+from .agent_cache import data_fingerprint
+from .drug_fuzzy_index import get_drug_index
+from .formulary import get_formulary
+from .dutch_lexicon import get_dutch_lexicon
+from .vocabulary_feedback import get_vocabulary_feedback_store
+
 logger = logging.getLogger(__name__)
 
+# Generic drug-name endings, weaker evidence than a known drug-class pattern
+DRUG_INDICATOR_PATTERNS = [
+    r'^[a-z]+ol$',      # ends with -ol
+    r'^[a-z]+ine$',     # ends with -ine
+    r'^[a-z]+ide$',     # ends with -ide
+    r'^[a-z]+rin$',     # ends with -rin
+    r'^[a-z]+tan$',     # ends with -tan
+    r'^[a-z]+pril$',    # ends with -pril
+    r'^[a-z]+statin$',  # ends with -statin
+    r'^[a-z]*card$',    # ends with -card (like cedocard)
+    r'^[a-z]*car$',     # ends with -car (like sedocar)
+    r'^[a-z]+mide$',    # ends with -mide
+]
+
+DRUG_CLASS_SCORE = 0.8
+DRUG_INDICATOR_SCORE = 0.6
+DRUG_INDICATOR_GROUP = 'drug_indicator'
+
+# Oddness of a known speech recognition error for a drug name (formulary misrecognitions)
+KNOWN_MISPRONUNCIATION_SCORE = 0.9
+
+# Drug context indicators
+DRUG_CONTEXT_WORDS = {
+    'medicatie', 'medicijn', 'geneesmiddel', 'tablet', 'capsule',
+    'voorschrijven', 'innemen', 'slikken', 'dosering', 'mg', 'gram',
+    'dagelijks', 'tweemaal', 'driemaal', 'ochtend', 'avond',
+    'behandeling', 'therapie', 'stoppen', 'starten', 'verhogen',
+    'verlagen', 'bijwerkingen', 'allergisch', 'contra-indicatie'
+}
+
+# Pharmaceutical naming patterns
+FOREIGN_PATTERNS = [
+    r'[xz]',           # Contains x or z (common in drug names)
+    r'ph',             # Contains ph
+    r'th',             # Contains th
+    r'qu',             # Contains qu
+    r'[aeiou]{3,}',    # Multiple vowels together
+    r'[bcdfghjklmnpqrstvwxyz]{3,}',  # Multiple consonants
+]
+_FOREIGN_PATTERNS = [re.compile(pattern) for pattern in FOREIGN_PATTERNS]
+
+# Weights of the oddness sub-scores, in the order they are added up
+ODDNESS_WEIGHTS = {
+    'drug_pattern': 0.4,
+    'drug_context': 0.3,
+    'phonetic': 0.2,
+    'foreign': 0.1,
+    'unknown': 0.3,
+}
+
 @dataclass
 class OddWord:
     """Represents a word that seems out of place"""
@@ -23,16 +82,63 @@ class OddWord:
     oddness_score: float
     potential_type: str  # 'drug', 'medical_term', 'unknown'
     suggestions: List[str]
+    learned_suggestion: Optional[str] = None  # learned from doctor feedback; shown, never applied
 
 class OddWordsDetector:
     """Detects words that seem odd in medical context and suggests corrections"""
     
+    # Tokens on either side that can influence a word's score (drug context window)
+    context_radius = 5
+    
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.medical_vocabulary = set()
         self.common_words = set()
         self.drug_patterns = {}
+        self._data_version = None
+        self.drug_index = get_drug_index()
+        self.formulary = get_formulary()
+        self.misrecognitions = {}
+        self.drug_corrections = {}
+        self._formulary_fingerprint = None
+        self.lexicon = get_dutch_lexicon()
+        self.feedback = get_vocabulary_feedback_store(db_path)
+        self.learned_vocabulary = set()
+        self.learned_corrections = {}
+        self._feedback_version = None
         self._initialize_vocabularies()
+        self._sync_formulary()
+    
+    @property
+    def data_version(self) -> str:
+        """Fingerprint of the vocabularies, lexicon, drug patterns, formulary and drug index; changes whenever they do"""
+        self._sync_formulary()
+        self._sync_learned_vocabulary()
+        if self._data_version is None:
+            self._data_version = data_fingerprint(self.medical_vocabulary, self.common_words, self.drug_patterns,
+                                                  [self.lexicon.fingerprint, self._formulary_fingerprint],
+                                                  self.learned_vocabulary, self.learned_corrections)
+        self.drug_index.refresh()
+        return f"{self._data_version}:{self.drug_index.version}"
+    
+    def _sync_formulary(self):
+        """Take the drug misrecognitions and corrections of the current formulary version"""
+        compiled = self.formulary.compiled()
+        if compiled.fingerprint == self._formulary_fingerprint:
+            return
+        self.misrecognitions = compiled.misrecognitions
+        self.drug_corrections = compiled.corrections
+        self._formulary_fingerprint = compiled.fingerprint
+        self._data_version = None
+    
+    def _sync_learned_vocabulary(self):
+        """Load the vocabulary and corrections learned from doctor feedback when their version moved"""
+        version = self.feedback.version()
+        if version is None or version == self._feedback_version:
+            return
+        self.learned_vocabulary, self.learned_corrections = self.feedback.load()
+        self._feedback_version = version
+        self._data_version = None
     
     def _initialize_vocabularies(self):
         """Initialize medical and common vocabularies"""
@@ -108,25 +214,72 @@ class OddWordsDetector:
                 r'\w*gatran\w*'   # -gatran ending (dabigatran)
             ]
         }
+        
+        self._compile_drug_patterns()
     
-    def detect_odd_words(self, transcript: str, context: str = "") -> List[OddWord]:
-        """Detect words that seem odd in medical context"""
+    def _compile_drug_patterns(self):
+        """Compile all drug-name patterns into a single matcher.
         
-        words = re.findall(r'\b\w+\b', transcript)
+        Each drug class becomes a named group, followed by the generic indicators;
+        alternation tries branches in order, so the first class that matches wins
+        over the weaker indicators and one match call scores a word.
+        """
+        
+        branches = [
+            f"(?P<{drug_class}>{'|'.join(patterns)})"
+            for drug_class, patterns in self.drug_patterns.items()
+        ]
+        branches.append(f"(?P<{DRUG_INDICATOR_GROUP}>{'|'.join(DRUG_INDICATOR_PATTERNS)})")
+        self._drug_matcher = re.compile('|'.join(branches))
+    
+    def match_drug_class(self, word: str) -> Tuple[Optional[str], float]:
+        """Get the drug class a word looks like (None for generic indicators) and its pattern score"""
+        
+        match = self._drug_matcher.match(word.lower())
+        if match is None:
+            return None, 0.0
+        if match.lastgroup == DRUG_INDICATOR_GROUP:
+            return None, DRUG_INDICATOR_SCORE
+        return match.lastgroup, DRUG_CLASS_SCORE
+    
+    def is_known_word(self, word_lower: str) -> bool:
+        """Whether a lowercase word is ordinary Dutch or medical vocabulary.
+        
+        Known mispronunciations stay unknown even when they are real Dutch words
+        ('metro', 'aten'), so they keep reaching the drug suggestions.
+        """
+        
+        if (word_lower in self.medical_vocabulary or word_lower in self.common_words or
+                word_lower in self.learned_vocabulary):
+            return True
+        return word_lower not in self.misrecognitions and word_lower in self.lexicon
+    
+    def detect_odd_words(self, transcript: str, context: str = "",
+                         document: Optional[TranscriptDocument] = None,
+                         regions: Optional[List[Tuple[int, int]]] = None) -> List[OddWord]:
+        """Detect words that seem odd in medical context (only within token regions when given)"""
+        
+        if document is None:
+            document = build_transcript_document(transcript)
+        
+        self.drug_index.refresh()
+        self._sync_formulary()
+        self._sync_learned_vocabulary()
+        
+        words = document.words
         odd_words = []
         
-        for i, word in enumerate(words):
-            word_lower = word.lower()
-            
-            # Skip if it's a known medical or common word
-            if (word_lower in self.medical_vocabulary or 
-                word_lower in self.common_words or
-                len(word) < 3 or
-                word.isdigit()):
-                continue
-            
-            # Calculate oddness score
-            oddness_score = self._calculate_oddness_score(word, i, words, context)
+        # Skip known medical or common words, then score the rest of the transcript at once
+        candidates = [
+            i for i in document.token_indices(regions)
+            if not (self.is_known_word(document.normalized_words[i]) or
+                    len(words[i]) < 3 or
+                    words[i].isdigit())
+        ]
+        scores = self.score_tokens(document, candidates)
+        
+        for i, oddness_score in zip(candidates, scores.tolist()):
+            word = words[i]
             
             if oddness_score > 0.4:  # Lowered threshold to catch more potential drugs
                 # Get context
@@ -146,13 +299,80 @@ class OddWordsDetector:
                     context_after=context_after,
                     oddness_score=oddness_score,
                     potential_type=potential_type,
-                    suggestions=suggestions
+                    suggestions=suggestions,
+                    learned_suggestion=self.learned_corrections.get(word.lower())
                 )
                 
                 odd_words.append(odd_word)
         
         return odd_words
     
+    def score_tokens(self, document: TranscriptDocument, indices: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Oddness score of the given tokens (all by default), computed for the whole transcript at once.
+        
+        Word-level sub-scores are computed once per distinct word into feature arrays;
+        drug-context cues are counted per window by convolution. Matches
+        _calculate_oddness_score token for token.
+        """
+        
+        words = document.normalized_words
+        indices = np.arange(len(words)) if indices is None else np.asarray(indices, dtype=int)
+        if not len(indices):
+            return np.zeros(0)
+        
+        word_features = {}
+        for i in indices.tolist():
+            if words[i] not in word_features:
+                word_features[words[i]] = self._word_oddness_features(words[i])
+        features = np.array([word_features[words[i]] for i in indices.tolist()])
+        drug_pattern, phonetic, foreign, unknown, known = features.T
+        drug_context = self._drug_context_scores(words)[indices]
+        
+        score = drug_pattern * ODDNESS_WEIGHTS['drug_pattern']
+        score = score + drug_context * ODDNESS_WEIGHTS['drug_context']
+        score = score + phonetic * ODDNESS_WEIGHTS['phonetic']
+        score = score + foreign * ODDNESS_WEIGHTS['foreign']
+        score = score + unknown * ODDNESS_WEIGHTS['unknown']
+        
+        return np.where(known > 0, KNOWN_MISPRONUNCIATION_SCORE, np.minimum(score, 1.0))
+    
+    def _word_oddness_features(self, word_lower: str) -> Tuple[float, float, float, float, float]:
+        """Context-free sub-scores of a word: drug pattern, phonetic, foreign, unknown flag, known flag"""
+        
+        if word_lower in self.misrecognitions:
+            return 0.0, 0.0, 0.0, 0.0, 1.0
+        
+        unknown = not self.is_known_word(word_lower) and len(word_lower) > 4
+        return (self._check_drug_patterns(word_lower),
+                self._check_phonetic_drug_similarity(word_lower),
+                self._check_foreign_pattern(word_lower),
+                float(unknown),
+                0.0)
+    
+    def _drug_context_scores(self, words: List[str]) -> np.ndarray:
+        """Drug-context score of every token: 0.2 per distinct cue word within context_radius tokens"""
+        
+        cue_columns: Dict[str, int] = {}
+        cue_positions = []
+        for position, word in enumerate(words):
+            if word in DRUG_CONTEXT_WORDS:
+                cue_positions.append((cue_columns.setdefault(word, len(cue_columns)), position))
+        
+        if not cue_positions:
+            return np.zeros(len(words))
+        
+        cue_presence = np.zeros((len(cue_columns), len(words)))
+        for column, position in cue_positions:
+            cue_presence[column, position] = 1.0
+        
+        # Box-filter convolution gives each cue's count in the window centred on every token
+        radius = self.context_radius
+        kernel = np.ones(2 * radius + 1)
+        window_counts = np.array([np.convolve(row, kernel)[radius:radius + len(words)] for row in cue_presence])
+        distinct_cues = (window_counts > 0).sum(axis=0)
+        
+        return np.minimum(distinct_cues * 0.2, 1.0)
+    
     def _calculate_oddness_score(self, word: str, position: int, all_words: List[str], context: str) -> float:
         """Calculate how 'odd' a word is in medical context"""
         
@@ -160,88 +380,45 @@ class OddWordsDetector:
         word_lower = word.lower()
         
         # First check if it's a known correction - if so, mark as very odd
-        known_corrections = {
-            'sedocar': 'cedocard', 'sedocard': 'cedocard', 'biso': 'bisoprolol',
-            'metro': 'metoprolol', 'aten': 'atenolol', 'carve': 'carvedilol'
-        }
-        
-        if word_lower in known_corrections:
-            return 0.9  # Very high oddness for known mispronunciations
+        if word_lower in self.misrecognitions:
+            return KNOWN_MISPRONUNCIATION_SCORE  # Very high oddness for known mispronunciations
         
         # 1. Check if it looks like a drug name pattern
         drug_pattern_score = self._check_drug_patterns(word)
-        score += drug_pattern_score * 0.4
+        score += drug_pattern_score * ODDNESS_WEIGHTS['drug_pattern']
         
         # 2. Check if it's in a drug context
         context_score = self._check_drug_context(position, all_words)
-        score += context_score * 0.3
+        score += context_score * ODDNESS_WEIGHTS['drug_context']
         
         # 3. Check phonetic similarity to known drugs
         phonetic_score = self._check_phonetic_drug_similarity(word)
-        score += phonetic_score * 0.2
+        score += phonetic_score * ODDNESS_WEIGHTS['phonetic']
         
         # 4. Check if it's a non-Dutch word pattern
         foreign_score = self._check_foreign_pattern(word)
-        score += foreign_score * 0.1
+        score += foreign_score * ODDNESS_WEIGHTS['foreign']
         
         # 5. Check if it's not in any vocabulary (unknown word)
-        if (word_lower not in self.medical_vocabulary and 
-            word_lower not in self.common_words and
-            len(word) > 4):
-            score += 0.3  # Unknown words are potentially odd
+        if not self.is_known_word(word_lower) and len(word) > 4:
+            score += ODDNESS_WEIGHTS['unknown']  # Unknown words are potentially odd
         
         return min(score, 1.0)
     
     def _check_drug_patterns(self, word: str) -> float:
         """Check if word matches drug name patterns"""
-        
-        word_lower = word.lower()
-        pattern_score = 0.0
-        
-        for drug_class, patterns in self.drug_patterns.items():
-            for pattern in patterns:
-                if re.match(pattern, word_lower):
-                    pattern_score = max(pattern_score, 0.8)
-        
-        # Additional drug-like patterns
-        drug_indicators = [
-            r'^[a-z]+ol$',      # ends with -ol
-            r'^[a-z]+ine$',     # ends with -ine
-            r'^[a-z]+ide$',     # ends with -ide
-            r'^[a-z]+rin$',     # ends with -rin
-            r'^[a-z]+tan$',     # ends with -tan
-            r'^[a-z]+pril$',    # ends with -pril
-            r'^[a-z]+statin$',  # ends with -statin
-            r'^[a-z]*card$',    # ends with -card (like cedocard)
-            r'^[a-z]*car$',     # ends with -car (like sedocar)
-            r'^[a-z]+mide$',    # ends with -mide
-        ]
-        
-        for pattern in drug_indicators:
-            if re.match(pattern, word_lower):
-                pattern_score = max(pattern_score, 0.6)
-        
-        return pattern_score
+        return self.match_drug_class(word)[1]
     
     def _check_drug_context(self, position: int, words: List[str]) -> float:
         """Check if word appears in drug-related context"""
         
         # Get surrounding context
-        start = max(0, position - 5)
-        end = min(len(words), position + 6)
+        start = max(0, position - self.context_radius)
+        end = min(len(words), position + self.context_radius + 1)
         context_words = [w.lower() for w in words[start:end]]
         
-        # Drug context indicators
-        drug_context_words = {
-            'medicatie', 'medicijn', 'geneesmiddel', 'tablet', 'capsule',
-            'voorschrijven', 'innemen', 'slikken', 'dosering', 'mg', 'gram',
-            'dagelijks', 'tweemaal', 'driemaal', 'ochtend', 'avond',
-            'behandeling', 'therapie', 'stoppen', 'starten', 'verhogen',
-            'verlagen', 'bijwerkingen', 'allergisch', 'contra-indicatie'
-        }
-        
         context_score = 0.0
-        for context_word in drug_context_words:
+        for context_word in DRUG_CONTEXT_WORDS:
             if context_word in context_words:
                 context_score += 0.2
         
@@ -250,48 +427,19 @@ class OddWordsDetector:
     def _check_phonetic_drug_similarity(self, word: str) -> float:
         """Check phonetic similarity to known drugs"""
         
-        # Known Belgian drug names for comparison
-        known_drugs = [
-            'bisoprolol', 'atenolol', 'metoprolol', 'carvedilol', 'nebivolol',
-            'enalapril', 'lisinopril', 'ramipril', 'perindopril',
-            'losartan', 'valsartan', 'irbesartan', 'candesartan',
-            'amlodipine', 'nifedipine', 'felodipine',
-            'furosemide', 'hydrochlorothiazide', 'spironolactone',
-            'atorvastatin', 'simvastatin', 'rosuvastatin',
-            'warfarin', 'rivaroxaban', 'apixaban', 'dabigatran',
-            'metformin', 'gliclazide', 'insulin',
-            'paracetamol', 'ibuprofen', 'diclofenac',
-            'amoxicillin', 'azithromycin', 'ciprofloxacin',
-            'cedocard', 'isosorbide', 'nitroglycerin'  # Added Cedocard and related
-        ]
-        
-        max_similarity = 0.0
-        word_lower = word.lower()
+        # Best match among indexed drug names sharing n-grams with the word
+        matches = self.drug_index.search(word, threshold=0.0, limit=1, similarity=self._phonetic_similarity)
         
-        for drug in known_drugs:
-            similarity = self._phonetic_similarity(word_lower, drug)
-            max_similarity = max(max_similarity, similarity)
-        
-        return max_similarity
+        return matches[0][1] if matches else 0.0
     
     def _check_foreign_pattern(self, word: str) -> float:
         """Check if word has foreign/pharmaceutical naming patterns"""
         
         word_lower = word.lower()
         
-        # Pharmaceutical naming patterns
-        pharma_patterns = [
-            r'[xz]',           # Contains x or z (common in drug names)
-            r'ph',             # Contains ph
-            r'th',             # Contains th
-            r'qu',             # Contains qu
-            r'[aeiou]{3,}',    # Multiple vowels together
-            r'[bcdfghjklmnpqrstvwxyz]{3,}',  # Multiple consonants
-        ]
-        
         pattern_score = 0.0
-        for pattern in pharma_patterns:
-            if re.search(pattern, word_lower):
+        for pattern in _FOREIGN_PATTERNS:
+            if pattern.search(word_lower):
                 pattern_score += 0.2
         
         return min(pattern_score, 1.0)
@@ -338,33 +486,8 @@ class OddWordsDetector:
     def _get_drug_suggestions(self, word: str, context: str) -> List[str]:
         """Get drug name suggestions for an odd word"""
         
-        # Known drug corrections for common speech recognition errors
-        common_corrections = {
-            'sedocar': 'cedocard',
-            'sedocard': 'cedocard',
-            'cedo card': 'cedocard',
-            'sedo card': 'cedocard',
-            'biso': 'bisoprolol',
-            'aten': 'atenolol',
-            'metro': 'metoprolol',
-            'carve': 'carvedilol',
-            'enal': 'enalapril',
-            'lisin': 'lisinopril',
-            'losar': 'losartan',
-            'valsar': 'valsartan',
-            'amlo': 'amlodipine',
-            'furo': 'furosemide',
-            'ator': 'atorvastatin',
-            'simva': 'simvastatin',
-            'para': 'paracetamol',
-            'ibu': 'ibuprofen',
-            'amoxi': 'amoxicillin',
-            'azithro': 'azithromycin',
-            # Add more common mispronunciations
-            'isosorbid': 'isosorbide',
-            'nitroglycerine': 'nitroglycerin',
-            'acetylsalicyl': 'acetylsalicylic acid'
-        }
+        # Formulary corrections for common speech recognition errors and truncated names
+        common_corrections = self.drug_corrections
         
         word_lower = word.lower()
         suggestions = []
@@ -379,25 +502,10 @@ class OddWordsDetector:
                 if full not in suggestions:
                     suggestions.append(full)
         
-        # Phonetic matching with known drugs
-        known_drugs = [
-            'bisoprolol', 'atenolol', 'metoprolol', 'carvedilol', 'nebivolol', 'propranolol',
-            'enalapril', 'lisinopril', 'ramipril', 'perindopril',
-            'losartan', 'valsartan', 'irbesartan', 'candesartan',
-            'amlodipine', 'nifedipine', 'felodipine',
-            'furosemide', 'hydrochlorothiazide', 'spironolactone',
-            'atorvastatin', 'simvastatin', 'rosuvastatin',
-            'warfarin', 'rivaroxaban', 'apixaban', 'dabigatran',
-            'metformin', 'gliclazide', 'insulin',
-            'paracetamol', 'ibuprofen', 'diclofenac',
-            'amoxicillin', 'azithromycin', 'ciprofloxacin',
-            'cedocard', 'isosorbide', 'nitroglycerin'
-        ]
-        
-        for drug in known_drugs:
-            similarity = self._phonetic_similarity(word_lower, drug)
-            if similarity > 0.6 and drug not in suggestions:
-                suggestions.append(drug)
+        # Phonetic matching with known drugs, most similar first
+        for entry, similarity in self.drug_index.search(word_lower, threshold=0.6, similarity=self._phonetic_similarity):
+            if entry.name not in suggestions:
+                suggestions.append(entry.name)
         
         return suggestions
     
@@ -459,47 +567,61 @@ class OddWordsDetector:
         # Combine similarities
         return (char_similarity * 0.4 + position_similarity * 0.6)
     
-    def process_transcript_for_odd_words(self, transcript: str, medical_context: str = "") -> Dict:
+    def process_transcript_for_odd_words(self, transcript: str, medical_context: str = "",
+                                         document: Optional[TranscriptDocument] = None,
+                                         regions: Optional[List[Tuple[int, int]]] = None) -> Dict:
         """Process transcript to find and suggest corrections for odd words"""
         
         try:
-            odd_words = self.detect_odd_words(transcript, medical_context)
+            if document is None:
+                document = build_transcript_document(transcript)
+            
+            odd_words = self.detect_odd_words(transcript, medical_context, document, regions)
             
-            corrected_transcript = transcript
             corrections_made = []
+            edit_proposals = []
             
-            # Process odd words from end to start to maintain positions
-            for odd_word in reversed(odd_words):
+            for odd_word in odd_words:
                 if odd_word.suggestions and odd_word.oddness_score > 0.7:
                     # Use the best suggestion
                     best_suggestion = odd_word.suggestions[0]
+                    token = document.tokens[odd_word.position]
+                    reasoning = f"Detected as odd word (score: {odd_word.oddness_score:.2f}), suggested: {best_suggestion}"
                     
-                    # Replace in transcript
-                    words = transcript.split()
-                    if odd_word.position < len(words):
-                        original_word = words[odd_word.position]
-                        words[odd_word.position] = best_suggestion
-                        corrected_transcript = ' '.join(words)
-                        
-                        corrections_made.append({
-                            'original': original_word,
-                            'corrected': best_suggestion,
-                            'confidence': 1.0 - odd_word.oddness_score,
-                            'type': odd_word.potential_type,
-                            'context': f"{odd_word.context_before} [{original_word}] {odd_word.context_after}",
-                            'reasoning': f"Detected as odd word (score: {odd_word.oddness_score:.2f}), suggested: {best_suggestion}"
-                        })
+                    edit_proposals.append(EditProposal(
+                        offset=token.start,
+                        length=token.end - token.start,
+                        replacement=best_suggestion,
+                        confidence=odd_word.oddness_score,
+                        agent='Odd Words Detector',
+                        original=token.text,
+                        reason=reasoning
+                    ))
+                    
+                    corrections_made.append({
+                        'original': token.text,
+                        'corrected': best_suggestion,
+                        'confidence': 1.0 - odd_word.oddness_score,
+                        'type': odd_word.potential_type,
+                        'context': f"{odd_word.context_before} [{token.text}] {odd_word.context_after}",
+                        'reasoning': reasoning
+                    })
+            
+            # Apply all corrections in a single pass at their token offsets
+            corrected_transcript = apply_edits(transcript, edit_proposals).text
             
             return {
                 'corrected_transcript': corrected_transcript,
                 'odd_words_found': len(odd_words),
                 'corrections_made': corrections_made,
+                'edit_proposals': [proposal.to_dict() for proposal in edit_proposals],
                 'odd_words_details': [
                     {
                         'word': ow.word,
                         'oddness_score': ow.oddness_score,
                         'type': ow.potential_type,
-                        'suggestions': ow.suggestions
+                        'suggestions': ow.suggestions,
+                        'learned_suggestion': ow.learned_suggestion
                     } for ow in odd_words
                 ]
             }
@@ -510,16 +632,20 @@ class OddWordsDetector:
                 'corrected_transcript': transcript,
                 'odd_words_found': 0,
                 'corrections_made': [],
+                'edit_proposals': [],
                 'error': str(e)
             }
     
     def add_to_vocabulary(self, word: str, word_type: str = 'medical'):
-        """Add word to appropriate vocabulary to reduce false positives"""
+        """Add word to appropriate vocabulary to reduce false positives, for every worker sharing the database"""
         
         if word_type == 'medical':
             self.medical_vocabulary.add(word.lower())
         elif word_type == 'common':
             self.common_words.add(word.lower())
+        
+        self.feedback.add_word(word, word_type)
+        self._data_version = None
     
     def get_detection_stats(self) -> Dict:
         """Get statistics about the odd words detection"""
@@ -527,6 +653,9 @@ class OddWordsDetector:
         return {
             'medical_vocabulary_size': len(self.medical_vocabulary),
             'common_vocabulary_size': len(self.common_words),
+            'lexicon_size': len(self.lexicon),
+            'learned_vocabulary_size': len(self.learned_vocabulary),
+            'learned_corrections_count': len(self.learned_corrections),
             'drug_patterns_count': sum(len(patterns) for patterns in self.drug_patterns.values()),
             'detection_threshold': 0.6,
             'supported_languages': ['Dutch', 'Medical Latin']
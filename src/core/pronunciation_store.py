@@ -0,0 +1,172 @@
+"""
+Pronunciation Store
+Custom drug pronunciations persisted in SQLite and shared by every worker. A version
+counter lets each worker pick up only what changed, and compiled matcher snapshots let
+a new worker start without recompiling the built-in pronunciation table
+"""
+
+import marshal
+import sqlite3
+import logging
+import threading
+import importlib.util
+from typing import Any, Dict, List, Optional, Tuple
+
+from .sqlite_pool import get_connection_pool
+
+logger = logging.getLogger(__name__)
+
+# marshal is only stable within one interpreter version: snapshots written by another
+# Python, sharing the same database, never match
+SNAPSHOT_FORMAT = f"marshal{marshal.version}-{importlib.util.MAGIC_NUMBER.hex()}"
+
+class PronunciationStore:
+    """Custom pronunciation variants and compiled snapshots in the application database"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # Version checks run on every agent call; they read through a pooled connection
+        self.db = get_connection_pool(db_path)
+        self._snapshots: Dict[str, Tuple[str, int, bytes]] = {}
+        self._init_db()
+
+    def _init_db(self):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS custom_pronunciations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    generic_name TEXT NOT NULL,
+                    variant TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (generic_name, variant)
+                )
+            ''')
+
+            # Bumped in the same transaction as every change workers must pick up
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS pronunciation_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO pronunciation_version (id, version) VALUES (1, 0)')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS pronunciation_snapshots (
+                    name TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    last_custom_id INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Pronunciation store initialization failed: {e}")
+
+    def version(self) -> Optional[int]:
+        """Current data version; None when the database cannot be read"""
+        try:
+            row = self.db.connection().execute('SELECT version FROM pronunciation_version WHERE id = 1').fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            logger.error(f"Error reading pronunciation version: {e}")
+            return None
+
+    def add(self, generic_name: str, variants: List[str]) -> Optional[int]:
+        """Persist variants for a drug and return the new version; None if they could not be stored"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            added = 0
+            for variant in variants:
+                cursor.execute(
+                    'INSERT OR IGNORE INTO custom_pronunciations (generic_name, variant) VALUES (?, ?)',
+                    (generic_name, variant)
+                )
+                added += cursor.rowcount
+            if added:
+                cursor.execute('UPDATE pronunciation_version SET version = version + 1 WHERE id = 1')
+            conn.commit()
+            version = cursor.execute('SELECT version FROM pronunciation_version WHERE id = 1').fetchone()[0]
+            conn.close()
+            return version
+        except Exception as e:
+            logger.error(f"Error storing custom pronunciation: {e}")
+            return None
+
+    def load(self, since_id: int = 0) -> List[Tuple[int, str, str]]:
+        """Custom variants stored after since_id, as (id, generic name, variant) in insertion order"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            rows = conn.execute(
+                'SELECT id, generic_name, variant FROM custom_pronunciations WHERE id > ? ORDER BY id',
+                (since_id,)
+            ).fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            logger.error(f"Error loading custom pronunciations: {e}")
+            return []
+
+    def save_snapshot(self, name: str, fingerprint: str, last_custom_id: int, state: Any):
+        """Store a compiled matcher; state must be built from plain lists, dicts, tuples, strings and numbers"""
+        fingerprint = f"{fingerprint}/{SNAPSHOT_FORMAT}"
+        data = marshal.dumps(state)
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute(
+                'INSERT OR REPLACE INTO pronunciation_snapshots (name, fingerprint, last_custom_id, data) '
+                'VALUES (?, ?, ?, ?)',
+                (name, fingerprint, last_custom_id, data)
+            )
+            conn.commit()
+            conn.close()
+            self._snapshots[name] = (fingerprint, last_custom_id, data)
+        except Exception as e:
+            logger.error(f"Error saving pronunciation snapshot: {e}")
+
+    def load_snapshot(self, name: str, fingerprint: str) -> Optional[Tuple[int, Any]]:
+        """(last custom id, state) of the stored matcher, if it was compiled from the same sources.
+
+        A snapshot that cannot be read is a miss: the caller compiles and saves a new one.
+        """
+        fingerprint = f"{fingerprint}/{SNAPSHOT_FORMAT}"
+        cached = self._snapshots.get(name)
+        if cached is None or cached[0] != fingerprint:
+            try:
+                conn = sqlite3.connect(self.db_path)
+                row = conn.execute(
+                    'SELECT fingerprint, last_custom_id, data FROM pronunciation_snapshots WHERE name = ?',
+                    (name,)
+                ).fetchone()
+                conn.close()
+            except Exception as e:
+                logger.error(f"Error loading pronunciation snapshot: {e}")
+                return None
+            if row is None or row[0] != fingerprint:
+                return None
+            cached = self._snapshots[name] = (row[0], row[1], bytes(row[2]))
+
+        try:
+            return cached[1], marshal.loads(cached[2])
+        except Exception as e:
+            logger.warning(f"Discarding unreadable pronunciation snapshot {name}: {e}")
+            self._snapshots.pop(name, None)
+            return None
+
+# Global instances, one per database
+_pronunciation_stores: Dict[str, PronunciationStore] = {}
+_pronunciation_stores_lock = threading.Lock()
+
+def get_pronunciation_store(db_path: str) -> PronunciationStore:
+    """Get or create the shared pronunciation store for a database"""
+    with _pronunciation_stores_lock:
+        if db_path not in _pronunciation_stores:
+            _pronunciation_stores[db_path] = PronunciationStore(db_path)
+        return _pronunciation_stores[db_path]
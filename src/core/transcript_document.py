@@ -0,0 +1,175 @@
+"""
+Transcript Document Model
+Tokenizes a transcript once so every agent in the multi-agent system shares the same
+tokens, character offsets, normalized forms and sentence boundaries
+"""
+
+import re
+import bisect
+from typing import Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+
+# Same word definition the agents used individually before sharing a document
+TOKEN_PATTERN = re.compile(r'\b\w+\b')
+
+# Sentence ends at terminal punctuation followed by whitespace/end, or at a line break
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'[.!?]+(?=\s|$)|\n+')
+
+@dataclass
+class Token:
+    """A single word of the transcript with its position in the original text"""
+    text: str
+    normalized: str
+    start: int
+    end: int
+    index: int
+    sentence_index: int
+
+@dataclass
+class Sentence:
+    """A sentence span, expressed both in characters and in token indices"""
+    index: int
+    start: int
+    end: int
+    first_token: int
+    last_token: int  # exclusive
+
+    @property
+    def token_count(self) -> int:
+        return self.last_token - self.first_token
+
+class TranscriptDocument:
+    """Tokenized view of a transcript, built once and passed to every agent"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.normalized_text = text.lower()
+        if len(self.normalized_text) != len(text):
+            # Keep offsets aligned when lowercasing changes the length of a character
+            self.normalized_text = ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+        self.tokens: List[Token] = []
+        self.sentences: List[Sentence] = []
+        self._tokenize()
+
+    def _tokenize(self):
+        """Split text into tokens and sentences in a single pass over the text"""
+
+        boundaries = [match.end() for match in SENTENCE_BOUNDARY_PATTERN.finditer(self.text)]
+        boundaries.append(len(self.text))
+
+        sentence_index = 0
+        sentence_start = 0
+        first_token = 0
+
+        for match in TOKEN_PATTERN.finditer(self.text):
+            # Close every sentence that ended before this token
+            while match.start() >= boundaries[sentence_index]:
+                self._close_sentence(sentence_start, boundaries[sentence_index], first_token)
+                sentence_start = boundaries[sentence_index]
+                first_token = len(self.tokens)
+                sentence_index += 1
+
+            word = match.group()
+            self.tokens.append(Token(
+                text=word,
+                normalized=word.lower(),
+                start=match.start(),
+                end=match.end(),
+                index=len(self.tokens),
+                sentence_index=len(self.sentences)
+            ))
+
+        if len(self.tokens) > first_token:
+            self._close_sentence(sentence_start, len(self.text), first_token)
+
+        self.words = [token.text for token in self.tokens]
+        self.normalized_words = [token.normalized for token in self.tokens]
+        self._start_offsets = [token.start for token in self.tokens]
+        self._end_offsets = [token.end for token in self.tokens]
+        self._token_starts = set(self._start_offsets)
+        self._token_ends = set(self._end_offsets)
+
+    def _close_sentence(self, start: int, end: int, first_token: int):
+        """Record a sentence if it contains at least one token"""
+        if len(self.tokens) == first_token:
+            return
+
+        self.sentences.append(Sentence(
+            index=len(self.sentences),
+            start=start,
+            end=end,
+            first_token=first_token,
+            last_token=len(self.tokens)
+        ))
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def context_words(self, index: int, before: int, after: int, normalized: bool = True) -> str:
+        """Get the words around a token as a single string"""
+        words = self.normalized_words if normalized else self.words
+        start = max(0, index - before)
+        end = min(len(words), index + after + 1)
+        return ' '.join(words[start:end])
+
+    def token_at(self, offset: int) -> Optional[Token]:
+        """Find the token covering a character offset"""
+        low, high = 0, len(self.tokens)
+        while low < high:
+            middle = (low + high) // 2
+            token = self.tokens[middle]
+            if offset < token.start:
+                high = middle
+            elif offset >= token.end:
+                low = middle + 1
+            else:
+                return token
+        return None
+
+    def regions_around(self, spans: Iterable[Tuple[int, int]], radius: int) -> List[Tuple[int, int]]:
+        """Get merged token ranges [first, last) covering character spans plus radius tokens on each side"""
+        ranges = []
+        for start, end in sorted(spans):
+            first = bisect.bisect_right(self._end_offsets, start)
+            last = max(bisect.bisect_left(self._start_offsets, end), first)
+            first = max(0, first - radius)
+            last = min(len(self.tokens), last + radius)
+
+            if ranges and first <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], last))
+            else:
+                ranges.append((first, last))
+        return ranges
+
+    def token_indices(self, regions: Optional[List[Tuple[int, int]]] = None) -> Iterable[int]:
+        """Iterate token indices, restricted to token ranges when regions are given"""
+        if regions is None:
+            return range(len(self.tokens))
+        return (index for first, last in regions for index in range(first, last))
+
+    def span_in_regions(self, start: int, end: int, regions: Optional[List[Tuple[int, int]]]) -> bool:
+        """Check whether a character span touches any token inside the given token ranges"""
+        if regions is None:
+            return True
+        first = bisect.bisect_right(self._end_offsets, start)
+        last = bisect.bisect_left(self._start_offsets, end)
+        return any(first < region_last and last > region_first for region_first, region_last in regions)
+
+    def is_token_span(self, start: int, end: int) -> bool:
+        """Whether a character span starts and ends on token boundaries"""
+        return start in self._token_starts and end in self._token_ends
+
+    def find_phrase(self, phrase: str) -> List[Tuple[int, int]]:
+        """Find all occurrences of a lowercase phrase that start and end on token boundaries"""
+        spans = []
+        start = self.normalized_text.find(phrase)
+        while start != -1:
+            end = start + len(phrase)
+            if self.is_token_span(start, end):
+                spans.append((start, end))
+            start = self.normalized_text.find(phrase, start + 1)
+        return spans
+
+def build_transcript_document(text: str) -> TranscriptDocument:
+    """Build the shared document model for a transcript"""
+    return TranscriptDocument(text)
@@ -0,0 +1,180 @@
+"""
+Transcript Edit Engine
+Collects span-level edit proposals from all agents, resolves conflicts and applies the
+accepted edits to the transcript in a single linear pass with an auditable diff
+"""
+
+import bisect
+import logging
+import dataclasses
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict, field
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class EditProposal:
+    """A replacement an agent proposes for a span of the transcript"""
+    offset: int
+    length: int
+    replacement: str
+    confidence: float
+    agent: str
+    original: str = ""
+    reason: str = ""
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.length
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EditProposal':
+        return cls(**data)
+
+@dataclass
+class EditResult:
+    """Outcome of applying a set of proposals to a transcript"""
+    text: str
+    applied: List[EditProposal] = field(default_factory=list)
+    rejected: List[EditProposal] = field(default_factory=list)
+    audit_log: List[Dict] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.applied)
+
+    @property
+    def new_spans(self) -> List[Tuple[int, int]]:
+        """Spans of the applied replacements in the edited text"""
+        return [
+            (entry['new_offset'], entry['new_offset'] + len(entry['replacement']))
+            for entry in self.audit_log if entry['status'] == 'applied'
+        ]
+
+def resolve_conflicts(proposals: List[EditProposal]) -> Tuple[List[EditProposal], List[EditProposal]]:
+    """Select a non-overlapping set of proposals, preferring the most confident ones.
+
+    Ties are broken on span length (longer wins), then offset and agent name so the
+    result does not depend on the order in which agents reported.
+    """
+
+    accepted = []
+    rejected = []
+    starts: List[int] = []
+    ends: List[int] = []
+
+    ranked = sorted(proposals, key=lambda p: (-p.confidence, -p.length, p.offset, p.agent, p.replacement))
+
+    for proposal in ranked:
+        # Neighbouring accepted spans are the only ones that can overlap
+        position = bisect.bisect_left(starts, proposal.offset)
+        overlaps_previous = position > 0 and ends[position - 1] > proposal.offset
+        overlaps_next = position < len(starts) and (
+            starts[position] < proposal.end or
+            (proposal.length == 0 and starts[position] == proposal.offset)
+        )
+
+        if overlaps_previous or overlaps_next:
+            rejected.append(proposal)
+            continue
+
+        starts.insert(position, proposal.offset)
+        ends.insert(position, proposal.end)
+        accepted.insert(position, proposal)
+
+    return accepted, rejected
+
+def apply_edits(text: str, proposals: List[EditProposal],
+                locked_spans: Optional[List[Tuple[int, int]]] = None) -> EditResult:
+    """Resolve conflicts and apply all accepted proposals in one pass over the text.
+
+    Locked spans hold text written by earlier edits: a proposal may replace such a
+    span as a whole, but not rewrite part of it, so agents cannot undo each other.
+    The proposals passed in are left untouched; the applied and rejected ones in the
+    result are copies carrying the original text of their span.
+    """
+
+    valid = []
+    for proposal in proposals:
+        if proposal.offset < 0 or proposal.length < 0 or proposal.end > len(text):
+            logger.warning(f"Discarding out-of-range edit from {proposal.agent} at {proposal.offset}")
+            continue
+        proposal = dataclasses.replace(proposal, original=text[proposal.offset:proposal.end])
+
+        # Proposals that would not change the text are dropped, not audited
+        if proposal.original == proposal.replacement:
+            continue
+
+        if locked_spans and any(
+            start <= proposal.offset and proposal.end <= end and proposal.length < end - start
+            for start, end in locked_spans
+        ):
+            logger.debug(f"Discarding edit from {proposal.agent} inside a locked span at {proposal.offset}")
+            continue
+
+        valid.append(proposal)
+
+    accepted, rejected = resolve_conflicts(valid)
+
+    parts = []
+    audit_log = []
+    cursor = 0
+    shift = 0
+
+    for proposal in accepted:
+        parts.append(text[cursor:proposal.offset])
+        parts.append(proposal.replacement)
+        cursor = proposal.end
+
+        audit_log.append({
+            'status': 'applied',
+            'agent': proposal.agent,
+            'offset': proposal.offset,
+            'new_offset': proposal.offset + shift,
+            'original': proposal.original,
+            'replacement': proposal.replacement,
+            'confidence': proposal.confidence,
+            'reason': proposal.reason
+        })
+        shift += len(proposal.replacement) - proposal.length
+
+    parts.append(text[cursor:])
+
+    for proposal in rejected:
+        audit_log.append({
+            'status': 'rejected',
+            'agent': proposal.agent,
+            'offset': proposal.offset,
+            'new_offset': None,
+            'original': proposal.original,
+            'replacement': proposal.replacement,
+            'confidence': proposal.confidence,
+            'reason': proposal.reason
+        })
+
+    return EditResult(
+        text=''.join(parts),
+        applied=accepted,
+        rejected=rejected,
+        audit_log=audit_log
+    )
+
+def map_spans(spans: List[Tuple[int, int]], result: EditResult) -> List[Tuple[int, int]]:
+    """Translate spans of the original text to the edited text; spans touched by an edit are dropped"""
+
+    mapped = []
+    for start, end in spans:
+        shift = 0
+        touched = False
+        for proposal in result.applied:
+            if proposal.end <= start:
+                shift += len(proposal.replacement) - proposal.length
+            else:
+                touched = proposal.offset < end
+                break
+        if not touched:
+            mapped.append((start + shift, end + shift))
+    return mapped
@@ -0,0 +1,112 @@
+"""
+Variant Scanner
+Aho-Corasick automaton over drug pronunciation variants: every single- and multi-word
+variant is found, with its character offsets, in one linear pass over the transcript
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+class VariantScanner:
+    """Aho-Corasick automaton mapping each pattern to the values registered for it.
+
+    Adding a pattern only extends the trie; the failure links are recomputed in one
+    breadth-first pass before the next scan, so no pattern is ever re-inserted.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._report: List[int] = [0]  # nearest proper suffix node that ends a pattern
+        self._outputs: List[List[int]] = [[]]
+        self.patterns: List[str] = []
+        self.values: List[List[Any]] = []
+        self._pattern_ids: Dict[str, int] = {}
+        self._links_stale = False
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __contains__(self, pattern: str) -> bool:
+        return pattern in self._pattern_ids
+
+    def add(self, pattern: str, value: Any):
+        """Register a value for a pattern, inserting the pattern into the trie if it is new"""
+        if not pattern:
+            return
+        if pattern in self._pattern_ids:
+            self.values[self._pattern_ids[pattern]].append(value)
+            return
+
+        node = 0
+        for character in pattern:
+            next_node = self._goto[node].get(character)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][character] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._report.append(0)
+                self._outputs.append([])
+            node = next_node
+
+        self._pattern_ids[pattern] = len(self.patterns)
+        self._outputs[node].append(len(self.patterns))
+        self.patterns.append(pattern)
+        self.values.append([value])
+        self._links_stale = True
+
+    def _build_links(self):
+        """Compute failure and output links breadth-first from the root"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+            self._report[node] = 0
+
+        for node in queue:
+            for character, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and character not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                fail = self._goto[fallback].get(character, 0)
+                self._fail[child] = fail
+                self._report[child] = fail if self._outputs[fail] else self._report[fail]
+                queue.append(child)
+
+        self._links_stale = False
+
+    def to_state(self, encode: Callable[[Any], Any] = lambda value: value) -> Tuple:
+        """The compiled automaton as plain lists, for snapshots; values go through encode"""
+        if self._links_stale:
+            self._build_links()
+        return (self._goto, self._fail, self._report, self._outputs, self.patterns,
+                [[encode(value) for value in values] for values in self.values])
+
+    @classmethod
+    def from_state(cls, state: Tuple, decode: Callable[[Any], Any] = lambda value: value) -> 'VariantScanner':
+        """Rebuild a scanner from to_state output without re-inserting any pattern"""
+        scanner = cls()
+        goto, fail, report, outputs, patterns, values = state
+        scanner._goto, scanner._fail, scanner._report, scanner._outputs = goto, fail, report, outputs
+        scanner.patterns = patterns
+        scanner.values = [[decode(value) for value in pattern_values] for pattern_values in values]
+        scanner._pattern_ids = {pattern: pattern_id for pattern_id, pattern in enumerate(patterns)}
+        return scanner
+
+    def scan(self, text: str) -> Iterator[Tuple[int, int, str, List[Any]]]:
+        """Yield (start, end, pattern, values) for every occurrence of every pattern, overlapping ones included"""
+        if self._links_stale:
+            self._build_links()
+
+        goto, fail, report, outputs = self._goto, self._fail, self._report, self._outputs
+        node = 0
+        for position, character in enumerate(text):
+            while node and character not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(character, 0)
+
+            match = node if outputs[node] else report[node]
+            while match:
+                for pattern_id in outputs[match]:
+                    pattern = self.patterns[pattern_id]
+                    yield position + 1 - len(pattern), position + 1, pattern, self.values[pattern_id]
+                match = report[match]
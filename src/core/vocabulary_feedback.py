@@ -0,0 +1,306 @@
+"""
+Vocabulary Feedback
+Learns from how doctors review agent corrections: corrections of unknown words they mark
+as correct or wrong are recorded once per job as feedback events, aggregated in the
+background into a versioned correction table, and loaded by every worker's
+OddWordsDetector alongside the vocabulary doctors add. Learned corrections are only ever
+offered as suggestions
+"""
+
+import re
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .sqlite_pool import get_connection_pool
+
+logger = logging.getLogger(__name__)
+
+# Times a word or correction must be confirmed before detectors use it
+MIN_FEEDBACK_SUPPORT = 2
+
+FEEDBACK_ACCEPTED = 'accepted'        # agent correction the doctor marked as correct
+FEEDBACK_REJECTED = 'rejected'        # agent correction the doctor marked as wrong
+
+# What the doctor can say about an applied agent correction on the review page; feedback
+# only, the report itself is edited by hand
+EDIT_DECISIONS = {'correct': FEEDBACK_ACCEPTED, 'wrong': FEEDBACK_REJECTED}
+
+_WORD = re.compile(r'\w+(?:-\w+)*')
+
+@dataclass
+class FeedbackEvent:
+    """One piece of evidence about a correction: a doctor's decision on an agent correction"""
+    kind: str
+    original: str
+    replacement: str
+    agent: str = ''
+    edit: Optional[int] = None  # position of the agent correction in the job's edit audit
+
+def _contains_phrase(text: str, phrase: str) -> bool:
+    return bool(phrase) and re.search(rf'(?<!\w){re.escape(phrase.lower())}(?!\w)', text) is not None
+
+def parse_edit_decisions(value) -> Dict[int, str]:
+    """Decisions from a save request: edit positions to 'correct' or 'wrong', anything else dropped"""
+    if not isinstance(value, dict):
+        return {}
+    return {int(edit): decision for edit, decision in value.items()
+            if isinstance(edit, str) and edit.isdigit() and isinstance(decision, str) and decision in EDIT_DECISIONS}
+
+def extract_feedback_events(agent_edits: List[Dict], decisions: Dict[int, str], agent_transcript: str,
+                            is_known_word: Callable[[str], bool]) -> List[FeedbackEvent]:
+    """Feedback events from the doctor's decisions on a job's agent corrections.
+
+    decisions maps positions in agent_edits to 'correct' or 'wrong'. The edits are
+    transcript corrections, so each is checked against the transcript the agents
+    produced: an edit whose replacement is not there was overwritten by a later one.
+    Only corrections of words unknown to the vocabulary are feedback: rewording
+    clinical content ('links' to 'rechts', 'start' to 'stop') must never become a
+    correction.
+    """
+    events = []
+    transcript_lower = agent_transcript.lower()
+
+    for position, decision in sorted(decisions.items()):
+        if decision not in EDIT_DECISIONS or not 0 <= position < len(agent_edits):
+            continue
+        edit = agent_edits[position]
+        if edit.get('status') != 'applied':
+            continue
+        original, replacement = edit.get('original', ''), edit.get('replacement', '')
+        words = _WORD.findall(original.lower())
+        if not words or any(is_known_word(word) or word.isdigit() for word in words):
+            continue
+        if not _contains_phrase(transcript_lower, replacement):
+            continue
+        events.append(FeedbackEvent(EDIT_DECISIONS[decision], original, replacement, edit.get('agent', ''), position))
+
+    return events
+
+class VocabularyFeedbackStore:
+    """Feedback events and the vocabulary and corrections learned from them"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # Version checks run on every agent call; they read through a pooled connection
+        self.db = get_connection_pool(db_path)
+        self._aggregation_lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS vocabulary_feedback_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT,
+                    kind TEXT NOT NULL,
+                    original TEXT NOT NULL,
+                    replacement TEXT NOT NULL,
+                    agent TEXT,
+                    edit_index INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Add edit_index column for existing databases
+            try:
+                cursor.execute('ALTER TABLE vocabulary_feedback_events ADD COLUMN edit_index INTEGER')
+            except sqlite3.OperationalError:
+                # Column already exists
+                pass
+
+            # One decision per agent correction of a job, however often the report is saved
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_vocabulary_feedback_job_edit
+                ON vocabulary_feedback_events (job_id, edit_index)
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learned_vocabulary (
+                    word TEXT PRIMARY KEY,
+                    word_type TEXT NOT NULL,
+                    support INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learned_corrections (
+                    original TEXT NOT NULL,
+                    replacement TEXT NOT NULL,
+                    accepted INTEGER NOT NULL DEFAULT 0,
+                    rejected INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (original, replacement)
+                )
+            ''')
+
+            # Bumped in the same transaction as every change workers must pick up
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS vocabulary_feedback_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL,
+                    last_event_id INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO vocabulary_feedback_state (id, version, last_event_id) VALUES (1, 0, 0)')
+
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Vocabulary feedback initialization failed: {e}")
+
+    def version(self) -> Optional[int]:
+        """Current vocabulary version; None when the database cannot be read"""
+        try:
+            row = self.db.connection().execute('SELECT version FROM vocabulary_feedback_state WHERE id = 1').fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            logger.error(f"Error reading vocabulary version: {e}")
+            return None
+
+    def record(self, job_id: str, events: List[FeedbackEvent]) -> int:
+        """Store feedback events for later aggregation; returns how many were stored.
+
+        Only the first decision on each agent correction of a job is stored, so saving
+        a report again never counts the same correction twice.
+        """
+        if not events:
+            return 0
+        try:
+            conn = sqlite3.connect(self.db_path)
+            stored = conn.executemany(
+                'INSERT OR IGNORE INTO vocabulary_feedback_events '
+                '(job_id, kind, original, replacement, agent, edit_index) VALUES (?, ?, ?, ?, ?, ?)',
+                [(job_id, event.kind, event.original, event.replacement, event.agent, event.edit) for event in events]
+            ).rowcount
+            conn.commit()
+            conn.close()
+            return stored
+        except Exception as e:
+            logger.error(f"Error recording vocabulary feedback: {e}")
+            return 0
+
+    def add_word(self, word: str, word_type: str = 'medical') -> Optional[int]:
+        """Add a word to the shared vocabulary right away; returns the new version"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO learned_vocabulary (word, word_type, support) VALUES (?, ?, ?)
+                ON CONFLICT (word) DO UPDATE SET
+                    word_type = excluded.word_type,
+                    support = MAX(support, excluded.support),
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (word.lower(), word_type, MIN_FEEDBACK_SUPPORT))
+            cursor.execute('UPDATE vocabulary_feedback_state SET version = version + 1 WHERE id = 1')
+            conn.commit()
+            version = cursor.execute('SELECT version FROM vocabulary_feedback_state WHERE id = 1').fetchone()[0]
+            conn.close()
+            return version
+        except Exception as e:
+            logger.error(f"Error adding vocabulary word: {e}")
+            return None
+
+    def aggregate(self) -> Optional[int]:
+        """Fold feedback events recorded since the last run into the learned tables.
+
+        Corrections marked correct count for the correction, those marked wrong against
+        it; a wrong correction says nothing about whether the original word was right,
+        so neither teaches vocabulary. Events of other kinds are skipped. The version is
+        bumped when anything was folded in. Returns the version, None on failure.
+        """
+        with self._aggregation_lock:
+            conn = None
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+                cursor = conn.cursor()
+                # Take the write lock before reading the position, so aggregations in other
+                # processes (web workers, the Celery beat task) queue instead of folding the
+                # same events twice
+                cursor.execute('BEGIN IMMEDIATE')
+                version, last_event_id = cursor.execute(
+                    'SELECT version, last_event_id FROM vocabulary_feedback_state WHERE id = 1'
+                ).fetchone()
+                events = cursor.execute(
+                    'SELECT id, kind, original, replacement FROM vocabulary_feedback_events WHERE id > ? ORDER BY id',
+                    (last_event_id,)
+                ).fetchall()
+                if not events:
+                    conn.rollback()
+                    return version
+
+                for _, kind, original, replacement in events:
+                    original, replacement = original.lower(), replacement.lower()
+                    if kind == FEEDBACK_REJECTED:
+                        self._count_correction(cursor, original, replacement, 'rejected')
+                    elif kind == FEEDBACK_ACCEPTED:
+                        self._count_correction(cursor, original, replacement, 'accepted')
+
+                cursor.execute(
+                    'UPDATE vocabulary_feedback_state SET version = version + 1, last_event_id = ? WHERE id = 1',
+                    (events[-1][0],)
+                )
+                conn.commit()
+                logger.info(f"Aggregated {len(events)} vocabulary feedback events")
+                return version + 1
+            except Exception as e:
+                if conn is not None and conn.in_transaction:
+                    conn.rollback()
+                logger.error(f"Error aggregating vocabulary feedback: {e}")
+                return None
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    @staticmethod
+    def _count_correction(cursor: sqlite3.Cursor, original: str, replacement: str, column: str):
+        cursor.execute(f'''
+            INSERT INTO learned_corrections (original, replacement, {column}) VALUES (?, ?, 1)
+            ON CONFLICT (original, replacement) DO UPDATE SET
+                {column} = {column} + 1, updated_at = CURRENT_TIMESTAMP
+        ''', (original, replacement))
+
+    def load(self) -> Tuple[Set[str], Dict[str, str]]:
+        """Learned vocabulary and corrections (original -> best replacement) with enough support"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            vocabulary = {
+                row[0] for row in conn.execute(
+                    'SELECT word FROM learned_vocabulary WHERE support >= ?', (MIN_FEEDBACK_SUPPORT,)
+                )
+            }
+            corrections = {}
+            for original, replacement in conn.execute('''
+                SELECT original, replacement FROM learned_corrections
+                WHERE accepted - rejected >= ?
+                ORDER BY accepted - rejected, accepted
+            ''', (MIN_FEEDBACK_SUPPORT,)):
+                corrections[original] = replacement  # best supported replacement comes last
+            conn.close()
+            return vocabulary, corrections
+        except Exception as e:
+            logger.error(f"Error loading learned vocabulary: {e}")
+            return set(), {}
+
+    def schedule_aggregation(self):
+        """Aggregate on a background thread, unless a run is already in progress"""
+        if self._aggregation_lock.locked():
+            return
+        threading.Thread(target=self.aggregate, name='vocabulary-feedback', daemon=True).start()
+
+# Global instances, one per database
+_feedback_stores: Dict[str, VocabularyFeedbackStore] = {}
+_feedback_stores_lock = threading.Lock()
+
+def get_vocabulary_feedback_store(db_path: str) -> VocabularyFeedbackStore:
+    """Get or create the shared vocabulary feedback store for a database"""
+    with _feedback_stores_lock:
+        if db_path not in _feedback_stores:
+            _feedback_stores[db_path] = VocabularyFeedbackStore(db_path)
+        return _feedback_stores[db_path]
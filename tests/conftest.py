@@ -0,0 +1,22 @@
+"""
+Shared test setup: make `core` importable the same way src/app.py does, and keep the
+databases agents create at relative paths inside one temporary directory per session
+"""
+
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+@pytest.fixture(scope='session', autouse=True)
+def workdir(tmp_path_factory):
+    """Run the session in a temporary directory; global agents keep their relative database paths"""
+    directory = tmp_path_factory.mktemp('work')
+    previous = os.getcwd()
+    os.chdir(directory)
+    yield directory
+    os.chdir(previous)
@@ -0,0 +1,89 @@
+"""
+Tests for agent result caching: entries are keyed on each agent's data version, and
+reading that version on a cache hit stays cheap
+"""
+
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from core.agent_cache import AgentResultCache
+from core.belgian_drug_pronunciation import BelgianDrugPronunciation
+from core.medical_knowledge_system import Drug, MedicalKnowledgeSystem
+from core.multi_agent_orchestrator import MultiAgentOrchestrator
+from core.odd_words_detector import OddWordsDetector
+from core.vocabulary_feedback import FEEDBACK_ACCEPTED, MIN_FEEDBACK_SUPPORT, FeedbackEvent
+
+@pytest.fixture
+def orchestrator(workdir):
+    orchestrator = MultiAgentOrchestrator(str(workdir / 'agents.db'))
+    orchestrator.result_cache = AgentResultCache()
+    return orchestrator
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'agents.db')
+
+def test_cached_results_are_reused_until_the_data_version_changes(orchestrator):
+    agent = SimpleNamespace(data_version='1')
+    calls = []
+    def compute():
+        calls.append(agent.data_version)
+        return {'corrections': len(calls)}
+
+    first, first_hit = orchestrator._cached_agent_call('detect', agent, 'Start sedocar.', None, compute)
+    second, second_hit = orchestrator._cached_agent_call('detect', agent, 'Start sedocar.', None, compute)
+    agent.data_version = '2'
+    third, third_hit = orchestrator._cached_agent_call('detect', agent, 'Start sedocar.', None, compute)
+
+    assert (first_hit, second_hit, third_hit) == (False, True, False)
+    assert first == second == {'corrections': 1}
+    assert third == {'corrections': 2}
+
+def test_agents_without_a_data_version_are_never_cached(orchestrator):
+    calls = []
+    for _ in range(2):
+        orchestrator._cached_agent_call('detect', object(), 'Start sedocar.', None, lambda: calls.append(1))
+
+    assert len(calls) == 2
+
+def test_knowledge_data_version_moves_with_changes_by_other_instances(db_path):
+    reader, writer = MedicalKnowledgeSystem(db_path), MedicalKnowledgeSystem(db_path)
+    before = reader.data_version
+
+    assert writer.add_drug(Drug('ziltrex', ['Ziltrex'], 'C09AA99', 'hypertensie', ['tablet']))
+
+    assert reader.data_version != before
+    unchanged = reader.data_version
+    writer.learn_from_document('Ziltrex 5 mg bij hypertensie.', 'report')
+    assert reader.data_version != unchanged
+
+def test_pronunciation_data_version_moves_with_stored_pronunciations(db_path):
+    reader, writer = BelgianDrugPronunciation(db_path), BelgianDrugPronunciation(db_path)
+    before = reader.data_version
+
+    writer.add_custom_pronunciation('bisoprolol', ['bisoprolool'])
+
+    assert reader.data_version != before
+
+def test_odd_words_data_version_moves_with_learned_vocabulary(db_path):
+    detector = OddWordsDetector(db_path)
+    before = detector.data_version
+
+    for job in range(MIN_FEEDBACK_SUPPORT):
+        detector.feedback.record(f"job-{job}", [FeedbackEvent(FEEDBACK_ACCEPTED, 'zorvex', 'ziltrex', edit=0)])
+    detector.feedback.aggregate()
+
+    assert detector.data_version != before
+
+def test_reading_data_versions_opens_no_connections(db_path, monkeypatch):
+    agents = [MedicalKnowledgeSystem(db_path), BelgianDrugPronunciation(db_path), OddWordsDetector(db_path)]
+    versions = [agent.data_version for agent in agents]
+
+    connects = []
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', lambda *args, **kwargs: connects.append(args) or connect(*args, **kwargs))
+
+    assert [agent.data_version for agent in agents] == versions
+    assert connects == []
@@ -0,0 +1,79 @@
+"""
+Tests for the dependency-aware agent scheduler
+"""
+
+import threading
+
+from core.agent_scheduler import AgentScheduler, AgentTask
+
+def recording(name, log, writes=(), value=None, wait_for=None):
+    """A task that logs when it runs and writes one value to each artifact"""
+    def run(inputs):
+        if wait_for is not None:
+            wait_for.wait(timeout=5)
+        log.append((name, inputs))
+        return {artifact: value if value is not None else name for artifact in writes}
+    return run
+
+def test_tasks_run_after_the_producers_of_what_they_read():
+    log = []
+    tasks = [
+        AgentTask('report', recording('report', log, ('report',)), reads=('edits',), writes=('report',)),
+        AgentTask('odd words', recording('odd words', log, ('edits',)), reads=('transcript',), writes=('edits',)),
+        AgentTask('pronunciation', recording('pronunciation', log, ('edits',)), reads=('transcript',), writes=('edits',)),
+    ]
+
+    result = AgentScheduler().run(tasks, {'transcript': 'Start sedocar.'})
+
+    assert log[-1] == ('report', {'edits': ['odd words', 'pronunciation']})
+    assert result.collect('edits') == ['odd words', 'pronunciation']
+    assert result.collect('report') == ['report']
+    assert result.critical_path[-1] == 'report'
+    assert set(result.timings) == {'report', 'odd words', 'pronunciation'}
+
+def test_merged_artifacts_follow_declaration_order_not_finish_order():
+    log = []
+    slow_released = threading.Event()
+    def fast(inputs):
+        slow_released.set()
+        return {'edits': 'fast'}
+    tasks = [
+        AgentTask('slow', recording('slow', log, ('edits',), wait_for=slow_released), writes=('edits',)),
+        AgentTask('fast', fast, writes=('edits',)),
+    ]
+
+    result = AgentScheduler().run(tasks, {})
+
+    assert result.collect('edits') == ['slow', 'fast']
+
+def test_failed_tasks_contribute_nothing_and_dependents_still_run():
+    log = []
+    def fail(inputs):
+        raise RuntimeError('validator unavailable')
+    tasks = [
+        AgentTask('validator', fail, writes=('issues',), remote=True),
+        AgentTask('odd words', recording('odd words', log, ('issues',)), writes=('issues',)),
+        AgentTask('report', recording('report', log, ('report',)), reads=('issues',), writes=('report',)),
+    ]
+
+    result = AgentScheduler().run(tasks, {})
+
+    assert not result.timings['validator'].succeeded
+    assert result.timings['report'].succeeded
+    assert result.collect('issues') == ['odd words']
+    assert log[-1] == ('report', {'issues': ['odd words']})
+
+def test_initial_artifacts_are_passed_through_and_worker_threads_outlive_a_run():
+    scheduler = AgentScheduler(max_workers=2)
+    threads = set()
+    def run(inputs):
+        threads.add(threading.current_thread())
+        return {'length': len(inputs['transcript'])}
+
+    for _ in range(5):
+        result = scheduler.run([AgentTask('count', run, reads=('transcript',), writes=('length',))],
+                               {'transcript': 'Start sedocar.'})
+
+    assert result.collect('length') == [14]
+    assert result.artifacts['transcript'] == 'Start sedocar.'
+    assert len(threads) <= scheduler.max_workers
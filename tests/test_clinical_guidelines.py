@@ -0,0 +1,44 @@
+"""
+Tests for the compiled clinical guideline snapshots
+"""
+
+import glob
+import os
+
+from core.clinical_guidelines import GUIDELINES_FILE, load_clinical_guidelines
+
+def snapshot_path(cache_dir) -> str:
+    paths = glob.glob(os.path.join(str(cache_dir), 'clinical_guidelines_*.bin'))
+    assert len(paths) == 1
+    return paths[0]
+
+def test_snapshot_is_compiled_once_and_reused(tmp_path):
+    first = load_clinical_guidelines(cache_dir=str(tmp_path))
+    path = snapshot_path(tmp_path)
+    modified = os.path.getmtime(path)
+
+    second = load_clinical_guidelines(cache_dir=str(tmp_path))
+
+    assert os.path.getmtime(path) == modified
+    assert second.guidelines == first.guidelines
+    assert second.elderly_safe == first.elderly_safe
+
+def test_corrupt_snapshot_is_recompiled(tmp_path):
+    expected = load_clinical_guidelines(cache_dir=str(tmp_path))
+    path = snapshot_path(tmp_path)
+    with open(path, 'r+b') as snapshot:
+        snapshot.seek(8)
+        snapshot.write(b'\x00garbage')
+
+    guidelines = load_clinical_guidelines(cache_dir=str(tmp_path))
+
+    assert guidelines.guidelines == expected.guidelines
+    assert load_clinical_guidelines(cache_dir=str(tmp_path)).dosages == expected.dosages
+
+def test_unwritable_cache_falls_back_to_the_data_file(tmp_path):
+    expected = load_clinical_guidelines(cache_dir=str(tmp_path))
+
+    guidelines = load_clinical_guidelines(GUIDELINES_FILE, cache_dir=str(tmp_path / 'missing'))
+
+    assert guidelines.guidelines == expected.guidelines
+    assert guidelines.revision == expected.revision
@@ -0,0 +1,68 @@
+"""
+Tests for the n-gram fuzzy drug index: its Levenshtein searches must return exactly
+what scoring every name would
+"""
+
+import random
+
+import pytest
+
+from core.drug_fuzzy_index import DrugFuzzyIndex, FuzzyIndex, normalize_drug_name
+from core.edit_distance import levenshtein_distance
+from core.formulary import compile_seed
+
+KEYS = sorted({normalize_drug_name(name) for name, _ in compile_seed().drug_names()} - {''})
+
+def brute_force(keys, query, threshold):
+    scored = [(key, 1 - levenshtein_distance(query, key) / max(len(query), len(key))) for key in keys]
+    results = [(key, score) for key, score in scored if score > threshold]
+    results.sort(key=lambda result: (-result[1], result[0]))
+    return results
+
+def misspell(word, rng, edits):
+    """Apply random deletions, insertions and substitutions"""
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    for _ in range(edits):
+        position = rng.randrange(len(word) + 1)
+        operation = rng.choice(['delete', 'insert', 'substitute']) if position < len(word) else 'insert'
+        if operation == 'delete' and len(word) > 1:
+            word = word[:position] + word[position + 1:]
+        elif operation == 'insert':
+            word = word[:position] + rng.choice(letters) + word[position:]
+        else:
+            word = word[:position] + rng.choice(letters) + word[position + 1:]
+    return word
+
+def queries():
+    rng = random.Random(34)
+    misspelled = [misspell(rng.choice(KEYS), rng, rng.randint(0, 3)) for _ in range(150)]
+    return misspelled + ['sedocar', 'metro', 'biso', 'xarelto', 'pijn', 'a', 'zz']
+
+@pytest.fixture(scope='module')
+def index():
+    index = FuzzyIndex()
+    for key in KEYS:
+        index.add(key)
+    return index
+
+@pytest.mark.parametrize('threshold', [0.6, 0.7, 0.8])
+def test_search_matches_brute_force(index, threshold):
+    for query in queries():
+        assert index.search(query, threshold) == brute_force(KEYS, query, threshold), query
+
+def test_limit_keeps_the_best_matches(index):
+    assert index.search('bisoprolo', 0.5, limit=3) == brute_force(KEYS, 'bisoprolo', 0.5)[:3]
+
+def test_custom_similarity_scores_keys_sharing_ngrams(index):
+    results = index.search('sedocar', 0.0, similarity=lambda query, key: 1.0 if key == 'cedocard' else 0.5)
+
+    assert results[0] == ('cedocard', 1.0)
+    assert all(score == 0.5 for _, score in results[1:])
+    assert len(results) < len(KEYS)
+
+def test_names_resolve_to_their_generic(workdir):
+    drug_index = DrugFuzzyIndex(str(workdir / 'fuzzy.db'))
+    drug_index.add_names(['Zorvex'], generic_name='ziltrex')
+
+    assert [(entry.generic_name, entry.source) for entry, _ in drug_index.search('zorvax', 0.7)] == [('ziltrex', 'agent')]
+    assert drug_index.search('Bisoblok', 0.8)[0][0].generic_name == 'bisoprolol'
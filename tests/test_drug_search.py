@@ -0,0 +1,69 @@
+"""
+Tests for drug search: the FTS5 trigram index must return what scanning the drugs table
+with LIKE returns, and queries too short for trigrams must still find drugs
+"""
+
+import pytest
+
+from core.drug_search import DRUG_SEARCH_TABLE, MIN_INDEXED_QUERY, search_drug_rows
+from core.formulary import get_formulary
+from core.medical_knowledge_system import Drug, MedicalKnowledgeSystem
+
+QUERIES = ['bisoprolol', 'BISO', 'prolol', 'eg', 'c0', 'C07AB07', 'a', 'xarelto', 'olol"', '50%', 'olo_',
+           'nothing like it', 'Sandoz']
+
+@pytest.fixture
+def knowledge(tmp_path):
+    db_path = str(tmp_path / 'knowledge.db')
+    get_formulary(db_path).compiled()  # seeds the formulary drugs
+    knowledge = MedicalKnowledgeSystem(db_path)
+    if not knowledge.drug_search_indexed:
+        pytest.skip('SQLite without the FTS5 trigram tokenizer')
+    return knowledge
+
+def scan(knowledge, query, limit=None, offset=0):
+    return search_drug_rows(knowledge.db.connection(), query, limit, offset, indexed=False)
+
+def test_indexed_search_matches_a_scan(knowledge):
+    conn = knowledge.db.connection()
+    indexed = conn.execute(f"SELECT COUNT(*) FROM {DRUG_SEARCH_TABLE} WHERE {DRUG_SEARCH_TABLE} MATCH '\"prolol\"'").fetchone()
+    assert indexed[0] == len(scan(knowledge, 'prolol')) > 0
+
+    for query in QUERIES:
+        assert search_drug_rows(conn, query) == scan(knowledge, query), query
+
+def test_short_queries_fall_back_to_a_scan(knowledge):
+    short = [query for query in QUERIES if len(query) < MIN_INDEXED_QUERY]
+    assert short
+
+    for query in short:
+        results = knowledge.search_drugs(query)
+        assert results
+        assert all(query.lower() in ' '.join([drug['generic_name'], drug['atc_code']] + drug['brand_names']).lower()
+                   for drug in results)
+
+def test_best_matches_come_first(knowledge):
+    results = [drug['generic_name'] for drug in knowledge.search_drugs('bisoprolol')]
+
+    assert results[0].lower() == 'bisoprolol'
+
+def test_pages_follow_the_full_result(knowledge):
+    full = knowledge.search_drugs('ol')
+
+    pages = knowledge.search_drugs('ol', limit=3) + knowledge.search_drugs('ol', limit=3, offset=3)
+
+    assert len(full) > 6 and pages == full[:6]
+
+def test_index_follows_added_replaced_and_deleted_drugs(knowledge):
+    drug = Drug('ziltrex', ['Zorvex', 'Ziltrex Mylan'], 'C09ZZ99', 'hypertensie', ['tablet'])
+    assert knowledge.add_drug(drug)
+    assert [found['generic_name'] for found in knowledge.search_drugs('zorvex')] == ['ziltrex']
+
+    assert knowledge.add_drug(Drug('ziltrex', ['Qalvex'], 'C09ZZ99', 'hypertensie', ['tablet']))
+    assert knowledge.search_drugs('zorvex') == []
+    assert [found['brand_names'] for found in knowledge.search_drugs('qalvex')] == [['Qalvex']]
+
+    with knowledge.db.transaction() as cursor:
+        cursor.execute("DELETE FROM drugs WHERE generic_name = 'ziltrex'")
+    assert knowledge.search_drugs('qalvex') == []
+    assert search_drug_rows(knowledge.db.connection(), 'ziltrex') == scan(knowledge, 'ziltrex') == []
@@ -0,0 +1,79 @@
+"""
+Tests for memoized drug selection: equivalent patient contexts share one cache entry
+"""
+
+import dataclasses
+
+import pytest
+
+from core.contextual_drug_selector import ContextualDrugSelector, DrugContext
+
+def context(**changes):
+    fields = dict(
+        medical_condition='hypertensie', department='Cardiologie', patient_age_group='adult',
+        contraindications=['asthma'], current_medications=['warfarin', 'aspirin'], allergies=[],
+        severity='moderate', urgency='routine'
+    )
+    fields.update(changes)
+    return DrugContext(**fields)
+
+@pytest.fixture
+def selector(workdir):
+    return ContextualDrugSelector(str(workdir / 'selector.db'))
+
+def counts(selector):
+    stats = selector.get_stats()
+    return stats['hits'], stats['misses']
+
+def test_equivalent_contexts_have_the_same_key():
+    reference = context()
+    equivalent = context(medical_condition=' Hypertensie', department='cardiologie ',
+                         contraindications=['Asthma', 'asthma', ' '],
+                         current_medications=['Aspirin', 'WARFARIN'])
+
+    assert equivalent.canonical_key() == reference.canonical_key()
+    assert hash(equivalent) == hash(reference)
+    assert equivalent.canonical() == reference.canonical()
+
+@pytest.mark.parametrize('changes', [
+    {'medical_condition': 'hartfalen'},
+    {'patient_age_group': 'elderly'},
+    {'severity': 'severe'},
+    {'contraindications': ['asthma', 'pregnancy']},
+    {'current_medications': ['warfarin']},
+    {'allergies': ['penicillin']},
+])
+def test_contexts_that_can_select_differently_have_different_keys(changes):
+    assert context(**changes).canonical_key() != context().canonical_key()
+
+def test_equivalent_contexts_hit_the_selection_cache(selector):
+    first = selector.select_optimal_drug('Hypertensie', context(), ['bisoprolol'])
+    hits, misses = counts(selector)
+
+    again = selector.select_optimal_drug('hypertensie', context(current_medications=['Aspirin', 'Warfarin']),
+                                         ['bisoprolol'])
+
+    assert counts(selector) == (hits + 1, misses)
+    assert again == first
+
+def test_other_candidates_or_contexts_miss_the_selection_cache(selector):
+    selector.select_optimal_drug('hypertensie', context(), ['bisoprolol'])
+    hits, misses = counts(selector)
+
+    selector.select_optimal_drug('hypertensie', context(), ['amlodipine'])
+    selector.select_optimal_drug('hypertensie', context(patient_age_group='elderly'), ['bisoprolol'])
+
+    assert counts(selector) == (hits, misses + 2)
+
+def warfarin(recommendations):
+    return next(rec for rec in recommendations if rec.generic_name == 'warfarin')
+
+def test_cached_recommendations_are_copies(selector):
+    first = selector.select_optimal_drug('hypertensie', context(), ['warfarin'])
+    warfarin(first).interaction_warnings.append('changed by the caller')
+    first[:] = [dataclasses.replace(rec, confidence=0.0) for rec in first]
+
+    again = selector.select_optimal_drug('hypertensie', context(), ['warfarin'])
+
+    assert warfarin(again).interaction_warnings == ['Major interaction with aspirin']
+    assert all(rec.confidence > 0 for rec in again)
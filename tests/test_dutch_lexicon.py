@@ -0,0 +1,70 @@
+"""
+Tests for the memory-mapped Dutch lexicon and its compiled cache file
+"""
+
+import glob
+import os
+
+import pytest
+
+from core.dutch_lexicon import LEXICON_CACHE_ENV, CompactLexicon, compile_lexicon, load_dutch_lexicon
+
+WORDS = ['linker', 'rechter', 'Bloeddruk', 'ziekenhuis', 'één', 'start', 'stop']
+
+@pytest.fixture
+def wordlist(tmp_path):
+    path = tmp_path / 'words.txt'
+    path.write_text('# test words\n' + '\n'.join(WORDS) + '\n', encoding='utf-8')
+    return str(path)
+
+def lexicon_path(cache_dir) -> str:
+    paths = glob.glob(os.path.join(str(cache_dir), 'dutch_lexicon_*.bin'))
+    assert len(paths) == 1
+    return paths[0]
+
+def test_membership_matches_the_word_list(tmp_path):
+    path = str(tmp_path / 'lexicon.bin')
+    assert compile_lexicon(WORDS * 2, path) == len(WORDS)
+
+    lexicon = CompactLexicon(path)
+
+    assert len(lexicon) == len(WORDS)
+    assert all(word in lexicon for word in WORDS)
+    assert 'bloeddruk' in lexicon and 'EEN' not in lexicon
+    assert not any(word in lexicon for word in ['linke', 'linkers', 'sedocar', ''])
+
+def test_lexicon_is_compiled_once_and_reused(tmp_path, wordlist):
+    first = load_dutch_lexicon([wordlist], cache_dir=str(tmp_path))
+    path = lexicon_path(tmp_path)
+    modified = os.path.getmtime(path)
+
+    second = load_dutch_lexicon([wordlist], cache_dir=str(tmp_path))
+
+    assert os.path.getmtime(path) == modified
+    assert second.fingerprint == first.fingerprint
+    assert 'ziekenhuis' in second
+
+@pytest.mark.parametrize('damage', [b'', b'garbage', b'NLLEX001' + b'\xff' * 12])
+def test_unreadable_cache_file_is_recompiled(tmp_path, wordlist, damage):
+    load_dutch_lexicon([wordlist], cache_dir=str(tmp_path))
+    with open(lexicon_path(tmp_path), 'wb') as lexicon_file:
+        lexicon_file.write(damage)
+
+    lexicon = load_dutch_lexicon([wordlist], cache_dir=str(tmp_path))
+
+    assert len(lexicon) == len(WORDS) and 'linker' in lexicon
+
+def test_truncated_cache_file_is_recompiled(tmp_path, wordlist):
+    load_dutch_lexicon([wordlist], cache_dir=str(tmp_path))
+    path = lexicon_path(tmp_path)
+    with open(path, 'r+b') as lexicon_file:
+        lexicon_file.truncate(os.path.getsize(path) - 3)
+
+    assert 'stop' in load_dutch_lexicon([wordlist], cache_dir=str(tmp_path))
+
+def test_cache_directory_comes_from_the_environment(tmp_path, wordlist, monkeypatch):
+    monkeypatch.setenv(LEXICON_CACHE_ENV, str(tmp_path))
+
+    load_dutch_lexicon([wordlist])
+
+    assert lexicon_path(tmp_path)
@@ -0,0 +1,73 @@
+"""
+Tests for seeding the formulary tables from the clinical guidelines
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+import core.formulary as formulary
+from core.clinical_guidelines import GUIDELINES_FILE, ClinicalGuidelines, _index
+
+def guidelines_revision(change=None) -> ClinicalGuidelines:
+    """The shipped guidelines under the next revision, edited by change"""
+    with open(GUIDELINES_FILE, encoding='utf-8') as data_file:
+        data = json.load(data_file)
+    data['revision'] += 1
+    if change:
+        change(data)
+    return ClinicalGuidelines(_index(data))
+
+def rows(db_path: str, query: str) -> list:
+    conn = sqlite3.connect(db_path)
+    result = conn.execute(query).fetchall()
+    conn.close()
+    return result
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'formulary.db')
+    formulary.Formulary(path)
+    return path
+
+def test_guideline_revision_replaces_changed_rows(db_path, monkeypatch):
+    def change(data):
+        data['guidelines']['hypertensie']['second_line'] = ['nebivolol']
+        data['interactions']['warfarin']['major'] = ['aspirin']
+        data['interactions']['warfarin']['monitoring'] = 'INR wekelijks'
+        data['contraindications']['asthma'] = ['propranolol']
+        del data['guidelines']['aritmie']
+
+    monkeypatch.setattr(formulary, 'get_clinical_guidelines', lambda: guidelines_revision(change))
+    compiled = formulary.Formulary(db_path).compiled()
+
+    assert compiled.clinical_guidelines['hypertensie']['second_line'] == ['nebivolol']
+    assert 'aritmie' not in compiled.clinical_guidelines
+    assert compiled.guideline_tiers['hypertensie'][1] == frozenset(['nebivolol'])
+    assert rows(db_path, "SELECT other_drug, monitoring FROM drug_interactions "
+                         "WHERE drug = 'warfarin' AND severity = 'major'") == [('aspirin', 'INR wekelijks')]
+    assert rows(db_path, "SELECT generic_name FROM drug_contraindications WHERE condition = 'asthma'") == [('propranolol',)]
+
+def test_older_guidelines_never_replace_newer_ones(db_path, monkeypatch):
+    def change(data):
+        data['guidelines']['hypertensie']['second_line'] = ['nebivolol']
+
+    monkeypatch.setattr(formulary, 'get_clinical_guidelines', lambda: guidelines_revision(change))
+    formulary.Formulary(db_path)
+    monkeypatch.undo()
+
+    compiled = formulary.Formulary(db_path).compiled()
+
+    assert compiled.clinical_guidelines['hypertensie']['second_line'] == ['nebivolol']
+
+def test_reseeding_keeps_drugs_added_since(db_path, monkeypatch):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO drugs (generic_name, brand_names, source) VALUES ('Plopamine', '[]', 'manual')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(formulary, 'get_clinical_guidelines', lambda: guidelines_revision())
+    compiled = formulary.Formulary(db_path).compiled()
+
+    assert 'plopamine' in compiled.drugs
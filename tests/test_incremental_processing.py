@@ -0,0 +1,54 @@
+"""
+Tests for incremental agent iterations: after the first pass, agents only re-analyze the
+tokens around the spans the previous iteration edited
+"""
+
+import pytest
+
+from core.multi_agent_orchestrator import MultiAgentOrchestrator
+from core.transcript_document import TranscriptDocument
+
+TRANSCRIPT = ("Patiënt met hypertensie en hartfalen. Start sedocar 5 mg dagelijks. Stop metro in de ochtend. "
+              "Verder geen klachten, controle over drie maanden bij de huisarts.")
+
+@pytest.fixture
+def orchestrator(workdir):
+    orchestrator = MultiAgentOrchestrator(str(workdir / 'agents.db'))
+    orchestrator.cache_results = False
+    orchestrator.agents.pop('claude_validator', None)
+    return orchestrator
+
+def test_regions_cover_the_radius_around_each_span_and_merge():
+    document = TranscriptDocument('een twee drie vier vijf zes zeven acht negen tien')
+
+    # 'drie' is token 2, 'zes' token 5 and 'acht' token 7
+    assert document.regions_around([(9, 13)], 1) == [(1, 4)]
+    assert document.regions_around([(35, 39), (9, 13)], 1) == [(1, 4), (6, 9)]
+    assert document.regions_around([(9, 13), (24, 27)], 1) == [(1, 7)]
+    assert document.regions_around([(0, 3)], 5) == [(0, 6)]
+
+def test_regions_around_an_insertion_between_tokens():
+    document = TranscriptDocument('een twee drie')
+
+    assert document.regions_around([(8, 8)], 0) == [(2, 2)]
+    assert document.regions_around([(8, 8)], 1) == [(1, 3)]
+
+def test_only_text_near_edits_is_analyzed_again(orchestrator):
+    orchestrator.incremental_processing = False
+    full = orchestrator.process_transcript_intelligently(TRANSCRIPT, medical_context='cardiologie')
+    orchestrator.incremental_processing = True
+    incremental = orchestrator.process_transcript_intelligently(TRANSCRIPT, medical_context='cardiologie')
+
+    assert incremental['final_transcript'] == full['final_transcript'] != TRANSCRIPT
+    first, second = incremental['iteration_details'][:2]
+    assert second['tokens_analyzed'] < first['tokens_analyzed']
+    assert first['tokens_analyzed'] == full['iteration_details'][0]['tokens_analyzed']
+
+def test_an_iteration_without_edits_ends_the_loop(orchestrator):
+    orchestrator.incremental_processing = True
+    orchestrator.convergence_threshold = 1.0
+
+    result = orchestrator.process_transcript_intelligently('Verder geen klachten.')
+
+    assert result['iterations'] == 1
+    assert result['final_transcript'] == 'Verder geen klachten.'
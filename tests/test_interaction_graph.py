@@ -0,0 +1,78 @@
+"""
+Tests for the bitset interaction graph: interactions are undirected, names are matched
+lowercase, and a regimen check reports each pair once
+"""
+
+import itertools
+
+from core.contextual_drug_selector import ContextualDrugSelector
+from core.interaction_graph import SEVERITY_MAJOR, SEVERITY_MODERATE, Interaction, InteractionGraph
+
+INTERACTIONS = [
+    ('warfarin', 'aspirin', SEVERITY_MAJOR, 'INR'),
+    ('warfarin', 'atorvastatin', SEVERITY_MODERATE, 'INR'),
+    ('digoxin', 'amiodarone', SEVERITY_MAJOR, ''),
+    ('warfarin', 'amiodarone', SEVERITY_MAJOR, 'INR'),
+]
+CONTRAINDICATIONS = [('asthma', 'propranolol'), ('pregnancy', 'warfarin'), ('pregnancy', 'atorvastatin')]
+
+def graph():
+    return InteractionGraph(INTERACTIONS, CONTRAINDICATIONS, ['warfarin', 'digoxin'])
+
+def test_interactions_are_symmetric():
+    interactions = graph()
+
+    for drug, other_drug, severity, _ in INTERACTIONS:
+        assert interactions.interacts(drug, other_drug, severity)
+        assert interactions.interacts(other_drug, drug, severity)
+    assert not interactions.interacts('warfarin', 'atorvastatin', SEVERITY_MAJOR)
+    assert not interactions.interacts('aspirin', 'digoxin')
+    assert interactions.pair_count == len(INTERACTIONS)
+
+def test_names_are_matched_case_insensitively():
+    interactions = graph()
+
+    assert interactions.interacts('Aspirin', 'WARFARIN')
+    assert interactions.interactions_with('Amiodarone', ['Digoxin', 'paracetamol', 'Warfarin']) == ['Digoxin', 'Warfarin']
+    assert interactions.contraindications_for('Propranolol', ['Asthma', 'copd']) == ['Asthma']
+
+def test_unknown_drugs_have_no_interactions():
+    interactions = graph()
+
+    assert interactions.drug_id('ziltrex') is None
+    assert interactions.interactions_with('ziltrex', ['warfarin']) == []
+    assert interactions.contraindications_for('ziltrex', ['pregnancy']) == []
+
+def test_regimen_check_reports_each_pair_once_in_any_order():
+    expected = {
+        (frozenset(['warfarin', 'aspirin']), SEVERITY_MAJOR, 'INR'),
+        (frozenset(['warfarin', 'amiodarone']), SEVERITY_MAJOR, 'INR'),
+        (frozenset(['digoxin', 'amiodarone']), SEVERITY_MAJOR, ''),
+        (frozenset(['warfarin', 'atorvastatin']), SEVERITY_MODERATE, 'INR'),
+    }
+    interactions = graph()
+
+    for medications in itertools.permutations(['aspirin', 'warfarin', 'digoxin', 'amiodarone', 'atorvastatin']):
+        check = interactions.check_regimen(list(medications))
+        found = [(frozenset([i.drug, i.other_drug]), i.severity, i.monitoring) for i in check.interactions]
+        assert len(found) == len(expected) and set(found) == expected
+
+def test_regimen_check_keeps_the_names_as_given():
+    check = graph().check_regimen(['Aspirin', 'Warfarin', 'propranolol', 'Warfarin'], ['Asthma', 'pregnancy'])
+
+    assert check.interactions == [Interaction('Warfarin', 'Aspirin', SEVERITY_MAJOR, 'INR')]
+    assert check.contraindications == [('propranolol', 'Asthma'), ('Warfarin', 'pregnancy')]
+    assert not check.safe
+
+def test_regimen_without_findings_is_safe():
+    check = graph().check_regimen(['warfarin', 'paracetamol'], ['asthma'])
+
+    assert check.safe
+
+def test_selector_checks_regimens_against_the_formulary(workdir):
+    selector = ContextualDrugSelector(str(workdir / 'selector.db'))
+
+    check = selector.check_regimen(['Aspirin', 'warfarin', 'propranolol'], ['Asthma'])
+
+    assert [(i.drug, i.other_drug, i.severity) for i in check.interactions] == [('warfarin', 'Aspirin', SEVERITY_MAJOR)]
+    assert check.contraindications == [('propranolol', 'Asthma')]
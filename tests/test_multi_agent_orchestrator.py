@@ -0,0 +1,94 @@
+"""
+Tests for the multi-agent orchestrator's use of the remote validator
+"""
+
+import json
+
+import pytest
+
+from core.claude_medical_validator import ClaudeMedicalValidator
+from core.multi_agent_orchestrator import MultiAgentOrchestrator
+
+def validator_replying(suggestions, calls=None):
+    """A real validator whose API call returns a canned response"""
+    validator = ClaudeMedicalValidator()
+
+    async def call_claude(prompt):
+        if calls is not None:
+            calls.append(prompt)
+        return json.dumps({'passed': False, 'confidence_score': 90, 'issues': [], 'suggestions': suggestions})
+
+    validator._call_claude = call_claude
+    return validator
+
+@pytest.fixture
+def orchestrator(workdir):
+    orchestrator = MultiAgentOrchestrator(str(workdir / 'agents.db'))
+    orchestrator.cache_results = False
+    return orchestrator
+
+def test_validator_corrections_quoting_the_transcript_are_applied(orchestrator):
+    calls = []
+    orchestrator.agents['claude_validator'] = validator_replying([{
+        'issue': 'Systolic pressure is implausible',
+        'original': '1400 over 80',
+        'correction': '140 over 80',
+        'rationale': 'A blood pressure of 1400 mmHg is not physiological'
+    }], calls)
+
+    result = orchestrator.process_transcript_intelligently('Bloeddruk 1400 over 80, verder geen klachten.')
+
+    assert calls, 'the validator API was never called'
+    assert '"original"' in calls[0], 'the prompt must ask for the words a correction replaces'
+    assert '140 over 80' in result['final_transcript']
+    assert '1400' not in result['final_transcript']
+    assert any(entry['agent'] == 'Claude Medical Validator' and entry['status'] == 'applied'
+               for entry in result['edit_diff'])
+
+def test_validator_advice_without_original_text_is_not_applied(orchestrator):
+    orchestrator.agents['claude_validator'] = validator_replying([{
+        'issue': 'Blood pressure should be rechecked',
+        'correction': 'Herhaal de bloeddrukmeting',
+        'rationale': 'Single measurement'
+    }])
+
+    transcript = 'Bloeddruk 140 over 80, verder geen klachten.'
+    result = orchestrator.process_transcript_intelligently(transcript)
+
+    assert result['final_transcript'] == transcript
+    assert result['remote_validations'] == 1
+
+def test_failed_remote_validations_are_not_counted(orchestrator):
+    validator = ClaudeMedicalValidator()
+
+    async def unreachable(prompt):
+        raise ConnectionError('validation service unreachable')
+
+    validator._call_claude = unreachable
+    orchestrator.agents['claude_validator'] = validator
+
+    result = orchestrator.process_transcript_intelligently('Bloeddruk 140 over 80, verder geen klachten.')
+
+    assert result['processing_successful']
+    assert result['remote_validations'] == 0
+    assert result['remote_validation_failures'] == 1
+    assert result['remote_validations_saved'] == result['iterations'] - 1
+
+class FailingOddWordsDetector:
+    """Reports a failure in its result, as the detector does, instead of raising"""
+
+    def process_transcript_for_odd_words(self, transcript, medical_context='', document=None, regions=None):
+        return {'original_transcript': transcript, 'corrected_transcript': transcript,
+                'corrections_made': [], 'edit_proposals': [], 'error': 'lexicon unavailable'}
+
+def test_agent_errors_reported_in_results_count_as_failures(orchestrator):
+    orchestrator.agents.pop('claude_validator', None)
+    orchestrator.agents['odd_words_detector'] = FailingOddWordsDetector()
+    before = orchestrator.metrics.summary('Odd Words Detector').get('Odd Words Detector', {})
+
+    result = orchestrator.process_transcript_intelligently('Bloeddruk 140 over 80, verder geen klachten.')
+
+    after = orchestrator.metrics.summary('Odd Words Detector')['Odd Words Detector']
+    calls = after['invocations'] - before.get('invocations', 0)
+    assert calls == result['iterations']
+    assert after['failures'] - before.get('failures', 0) == calls
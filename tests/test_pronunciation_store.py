@@ -0,0 +1,59 @@
+"""
+Tests for the compiled pronunciation snapshots shared through the database
+"""
+
+import marshal
+import sqlite3
+
+import pytest
+
+from core.belgian_drug_pronunciation import BelgianDrugPronunciation
+from core.pronunciation_store import PronunciationStore, get_pronunciation_store
+
+TRANSCRIPT = 'Start biso prolol 5 mg en xarelto 20 mg.'
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'pronunciation.db')
+    BelgianDrugPronunciation(path)  # compiles and stores the snapshot
+    return path
+
+def overwrite_snapshots(db_path: str, **columns):
+    """Change the stored snapshots as another worker would, unseen by this process's store"""
+    assignments = ', '.join(f"{column} = ?" for column in columns)
+    conn = sqlite3.connect(db_path)
+    conn.execute(f'UPDATE pronunciation_snapshots SET {assignments}', tuple(columns.values()))
+    conn.commit()
+    conn.close()
+    get_pronunciation_store(db_path)._snapshots.clear()
+
+def test_snapshot_round_trip(db_path):
+    fresh = BelgianDrugPronunciation(db_path)
+    assert fresh.enhance_drug_recognition(TRANSCRIPT)['enhanced_transcript'] != TRANSCRIPT
+
+def test_corrupt_snapshot_is_rebuilt(db_path):
+    expected = BelgianDrugPronunciation(db_path).enhance_drug_recognition(TRANSCRIPT)['enhanced_transcript']
+    overwrite_snapshots(db_path, data=b'\x00not a marshal stream')
+
+    system = BelgianDrugPronunciation(db_path)
+
+    assert system.enhance_drug_recognition(TRANSCRIPT)['enhanced_transcript'] == expected
+    fingerprint = system._snapshot_fingerprint
+    assert PronunciationStore(db_path).load_snapshot(system.snapshot_name, fingerprint) is not None
+
+def test_malformed_snapshot_state_is_rebuilt(db_path):
+    expected = BelgianDrugPronunciation(db_path).enhance_drug_recognition(TRANSCRIPT)['enhanced_transcript']
+    overwrite_snapshots(db_path, data=marshal.dumps(('wrong', 'shape')))
+
+    assert BelgianDrugPronunciation(db_path).enhance_drug_recognition(TRANSCRIPT)['enhanced_transcript'] == expected
+
+def test_snapshot_from_another_interpreter_is_a_miss(db_path, monkeypatch):
+    import core.pronunciation_store as pronunciation_store
+
+    store = PronunciationStore(db_path)
+    monkeypatch.setattr(pronunciation_store, 'SNAPSHOT_FORMAT', 'marshal0-00000000')
+    store.save_snapshot('other', 'sources', 0, ['state'])
+    assert PronunciationStore(db_path).load_snapshot('other', 'sources') == (0, ['state'])
+
+    monkeypatch.undo()
+    assert PronunciationStore(db_path).load_snapshot('other', 'sources') is None
@@ -0,0 +1,65 @@
+"""
+Tests for the offset-based edit engine
+"""
+
+from core.transcript_edits import EditProposal, apply_edits, map_spans, resolve_conflicts
+
+TEXT = "Start sedocar 5 mg en biso prolol tablet."
+
+def proposal(original, replacement, confidence=0.9, agent='agent', text=TEXT):
+    offset = text.index(original)
+    return EditProposal(offset=offset, length=len(original), replacement=replacement,
+                        confidence=confidence, agent=agent)
+
+def test_edits_are_applied_in_one_pass_keeping_whitespace():
+    text = "Start  sedocar\t5 mg en\nbiso prolol tablet."
+    result = apply_edits(text, [proposal('biso prolol', 'bisoprolol', text=text),
+                                proposal('sedocar', 'Cedocard', text=text)])
+
+    assert result.text == "Start  Cedocard\t5 mg en\nbisoprolol tablet."
+    assert [entry['original'] for entry in result.audit_log] == ['sedocar', 'biso prolol']
+    assert result.new_spans == [(7, 15), (24, 34)]
+
+def test_overlapping_proposals_keep_the_most_confident():
+    weak = proposal('biso', 'Bisoprolol', confidence=0.6, agent='odd words')
+    strong = proposal('biso prolol', 'bisoprolol', confidence=0.9, agent='pronunciation')
+
+    result = apply_edits(TEXT, [weak, strong])
+
+    assert result.text == "Start sedocar 5 mg en bisoprolol tablet."
+    assert [p.agent for p in result.applied] == ['pronunciation']
+    assert [(entry['status'], entry['agent']) for entry in result.audit_log] == [
+        ('applied', 'pronunciation'), ('rejected', 'odd words')]
+
+def test_conflict_resolution_does_not_depend_on_report_order():
+    proposals = [proposal('sedocar', 'Cedocard', agent='a'), proposal('sedocar', 'Sedocard', agent='b'),
+                 proposal('biso', 'Biso', confidence=0.5), proposal('biso prolol', 'bisoprolol', confidence=0.5)]
+
+    forward, _ = resolve_conflicts(proposals)
+    backward, _ = resolve_conflicts(list(reversed(proposals)))
+
+    assert [(p.agent, p.replacement) for p in forward] == [(p.agent, p.replacement) for p in backward]
+    assert [p.replacement for p in forward] == ['Cedocard', 'bisoprolol']
+
+def test_locked_spans_can_only_be_replaced_whole():
+    text = "Neemt Bisoprolol (Bisoprolol EG) dagelijks."
+    locked = [(6, 32)]
+
+    result = apply_edits(text, [proposal('Bisoprolol EG', 'Bisoblock', text=text),
+                                proposal('Bisoprolol (Bisoprolol EG)', 'Bisoprolol', text=text)], locked)
+
+    assert result.text == "Neemt Bisoprolol dagelijks."
+    assert [entry['replacement'] for entry in result.audit_log] == ['Bisoprolol']
+
+def test_proposals_passed_in_are_not_modified():
+    stale = EditProposal(offset=6, length=7, replacement='Cedocard', confidence=0.9, agent='a', original='stale')
+
+    result = apply_edits(TEXT, [stale])
+
+    assert stale.original == 'stale'
+    assert result.applied[0].original == 'sedocar'
+
+def test_spans_touched_by_an_edit_are_dropped_and_the_rest_shifted():
+    result = apply_edits(TEXT, [proposal('sedocar', 'Cedocard')])
+
+    assert map_spans([(0, 5), (8, 10), (22, 26)], result) == [(0, 5), (23, 27)]
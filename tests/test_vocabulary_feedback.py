@@ -0,0 +1,110 @@
+"""
+Vocabulary feedback: which agent corrections become learned corrections, and how the
+odd words detector uses them
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from core.odd_words_detector import OddWordsDetector
+from core.vocabulary_feedback import (FEEDBACK_ACCEPTED, FEEDBACK_REJECTED, MIN_FEEDBACK_SUPPORT, FeedbackEvent,
+                                      VocabularyFeedbackStore, extract_feedback_events,
+                                      get_vocabulary_feedback_store, parse_edit_decisions)
+
+@pytest.fixture
+def detector(tmp_path):
+    return OddWordsDetector(str(tmp_path / 'feedback.db'))
+
+def applied(original, replacement, agent='Claude Medical Validator'):
+    return {'status': 'applied', 'agent': agent, 'original': original, 'replacement': replacement}
+
+def save_jobs(detector, agent_edits, decisions, agent_transcript, jobs=MIN_FEEDBACK_SUPPORT):
+    """Record the doctor's decisions on several jobs with the same corrections, then aggregate them"""
+    store = get_vocabulary_feedback_store(detector.db_path)
+    for job in range(jobs):
+        store.record(f"job-{job}", extract_feedback_events(agent_edits, decisions, agent_transcript,
+                                                           detector.is_known_word))
+    store.aggregate()
+    return store
+
+def test_corrections_of_known_words_are_not_learned(detector):
+    edits = [applied('linker', 'rechter'), applied('start', 'stop')]
+    decisions = {0: 'correct', 1: 'correct'}
+    transcript = 'Pijn in de rechter knie. Stop Cedocard.'
+
+    assert extract_feedback_events(edits, decisions, transcript, detector.is_known_word) == []
+    _, corrections = save_jobs(detector, edits, decisions, transcript).load()
+    assert corrections == {}
+
+def test_learned_corrections_are_suggested_not_applied(detector):
+    edits = [applied('zorvex', 'Ziltrex', agent='Odd Words Detector')]
+    events = extract_feedback_events(edits, {0: 'correct'}, 'Neemt Ziltrex 5 mg.', detector.is_known_word)
+    assert [(event.kind, event.edit) for event in events] == [(FEEDBACK_ACCEPTED, 0)]
+
+    _, corrections = save_jobs(detector, edits, {0: 'correct'}, 'Neemt Ziltrex 5 mg.').load()
+    assert corrections == {'zorvex': 'ziltrex'}
+
+    transcript = 'Patient neemt zorvex 5 mg per dag voor de bloeddruk.'
+    result = detector.process_transcript_for_odd_words(transcript)
+    assert result['corrected_transcript'] == transcript
+    assert [(word['word'], word['learned_suggestion']) for word in result['odd_words_details']] == [('zorvex', 'ziltrex')]
+
+def test_only_decided_edits_still_in_the_agent_transcript_count(detector):
+    edits = [applied('zorvex', 'Ziltrex'), applied('baxolan', 'Bexolan'), applied('quorin', 'Quoran')]
+    # Bexolan was rewritten by a later correction, Quoran was not decided on
+    transcript = 'Neemt Ziltrex en Bexalon.'
+
+    events = extract_feedback_events(edits, {0: 'wrong', 1: 'correct'}, transcript, detector.is_known_word)
+    assert [(event.kind, event.original, event.edit) for event in events] == [(FEEDBACK_REJECTED, 'zorvex', 0)]
+
+def test_saving_a_job_again_does_not_count_its_decisions_twice(detector):
+    edits = [applied('zorvex', 'Ziltrex')]
+    store = get_vocabulary_feedback_store(detector.db_path)
+    events = extract_feedback_events(edits, {0: 'correct'}, 'Neemt Ziltrex.', detector.is_known_word)
+
+    assert store.record('job-1', events) == 1
+    assert store.record('job-1', events) == 0
+    store.aggregate()
+    _, corrections = store.load()
+    assert corrections == {}
+
+def test_concurrent_aggregations_fold_each_event_once(tmp_path):
+    # Two stores on one database stand in for the web process and the Celery worker
+    db_path = str(tmp_path / 'shared.db')
+    first, second = VocabularyFeedbackStore(db_path), VocabularyFeedbackStore(db_path)
+    first.record('job-1', [FeedbackEvent(FEEDBACK_ACCEPTED, 'zorvex', 'ziltrex', edit=0)])
+    first.record('job-2', [FeedbackEvent(FEEDBACK_ACCEPTED, 'zorvex', 'ziltrex', edit=0)])
+
+    # Start the second aggregation while the first is folding events in
+    racing = []
+    count_correction = first._count_correction
+    def count_while_racing(cursor, *args):
+        if not racing:
+            racing.append(threading.Thread(target=second.aggregate))
+            racing[0].start()
+            racing[0].join(timeout=0.5)
+        count_correction(cursor, *args)
+    first._count_correction = count_while_racing
+
+    first.aggregate()
+    racing[0].join()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT accepted FROM learned_corrections').fetchall() == [(2,)]
+    conn.close()
+
+def test_corrections_marked_wrong_teach_no_vocabulary(detector):
+    edits = [applied('zorvex', 'Ziltrex')]
+    vocabulary, corrections = save_jobs(detector, edits, {0: 'wrong'}, 'Neemt Ziltrex.').load()
+
+    assert vocabulary == set()
+    assert corrections == {}
+
+@pytest.mark.parametrize('value', [None, [], ['correct'], 'correct', 3, {'x': 'correct'}, {'0': 'undone'}, {'0': ['wrong']}])
+def test_malformed_edit_decisions_are_ignored(value):
+    assert parse_edit_decisions(value) == {}
+
+def test_edit_decisions_keep_known_values():
+    assert parse_edit_decisions({'0': 'correct', '2': 'wrong', '3': 'maybe'}) == {0: 'correct', 2: 'wrong'}